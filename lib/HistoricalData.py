@@ -2,14 +2,16 @@
 # All credit for this file goes to David-Woroniuk
 # https://github.com/David-Woroniuk/Historic_Crypto/blob/main/HistoricalData.py
 # I have done minor tweaks to remove print statements
+# and added an optional ChunkCache so that failed downloads can be resumed
 
+import calendar
 import requests
 import json
 import time
 from random import randint
 import pandas as pd
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 
 
 class HistoricalData(object):
@@ -25,6 +27,7 @@ class HistoricalData(object):
     :param: start_date: a date string in the format YYYY-MM-DD-HH-MM. (str)
     :param: end_date: a date string in the format YYYY-MM-DD-HH-MM,  Default=Now. (str)
     :param: verbose: printing during extraction, Default=True. (bool)
+    :param: cache: a ChunkCache used to skip chunks that were already downloaded, Default=None. (ChunkCache)
     :returns: data: a Pandas DataFrame which contains requested cryptocurrency data. (pd.DataFrame)
     """
     def __init__(self,
@@ -32,7 +35,8 @@ class HistoricalData(object):
                  granularity,
                  start_date,
                  end_date=None,
-                 verbose=True):
+                 verbose=True,
+                 cache=None):
 
         if verbose:
             print("Checking input parameters are in the correct format.")
@@ -62,6 +66,7 @@ class HistoricalData(object):
         self.end_date = end_date
         self.end_date_string = None
         self.verbose = verbose
+        self.cache = cache
 
     def _ticker_checker(self):
         """This helper function checks if the ticker is available on the CoinBase Pro API."""
@@ -106,19 +111,65 @@ class HistoricalData(object):
             output_date = output_date[:10] + 'T' + output_date[12:]
         return output_date
 
+    def _chunk_start(self, start, i, max_per_mssg):
+        """This helper function returns the start of chunk i as a timestamp in seconds."""
+        return calendar.timegm(start.timetuple()) + i * (self.granularity * max_per_mssg)
+
+    def _request_chunk(self, window_start, window_end):
+        """This helper function requests a single chunk (timestamps in seconds) and returns the raw rows."""
+        provisional_start = self._date_cleaner(datetime.utcfromtimestamp(window_start))
+        provisional_end = self._date_cleaner(datetime.utcfromtimestamp(window_end))
+
+        # print("Provisional Start: {}".format(provisional_start))
+        # print("Provisional End: {}".format(provisional_end))
+        response = requests.get(
+            "https://api.pro.coinbase.com/products/{0}/candles?start={1}&end={2}&granularity={3}".format(
+                self.ticker,
+                provisional_start,
+                provisional_end,
+                self.granularity))
+
+        if response.status_code in [200, 201, 202, 203, 204]:
+            time.sleep(randint(0, 2))
+            return json.loads(response.text)
+        elif response.status_code in [400, 401, 404]:
+            if self.verbose:
+                print(
+                    "Status Code: {}, malformed request to the CoinBase Pro API.".format(response.status_code))
+            sys.exit()
+        elif response.status_code in [403, 500, 501]:
+            if self.verbose:
+                print(
+                    "Status Code: {}, could not connect to the CoinBase Pro API.".format(response.status_code))
+            sys.exit()
+        else:
+            if self.verbose:
+                print("Status Code: {}, error in connecting to the CoinBase Pro API.".format(
+                    response.status_code))
+            sys.exit()
+
     def retrieve_data(self):
         """This function returns the data."""
         if self.verbose:
             print("Formatting Dates.")
 
-        self._ticker_checker()
         self.start_date_string = self._date_cleaner(self.start_date)
         self.end_date_string = self._date_cleaner(self.end_date)
         start = datetime.strptime(self.start_date, "%Y-%m-%d-%H-%M")
         end = datetime.strptime(self.end_date, "%Y-%m-%d-%H-%M")
         request_volume = abs((end - start).total_seconds()) / self.granularity
-
-        if request_volume <= 300:
+        # The api limit:
+        max_per_mssg = 300
+        chunk_count = int(request_volume / max_per_mssg) + 1
+
+        # Only check the ticker if we actually have to go to the API
+        if self.cache is None or not all(
+            self.cache.has(self._chunk_start(start, i, max_per_mssg), self._chunk_start(start, i + 1, max_per_mssg))
+            for i in range(chunk_count)
+        ):
+            self._ticker_checker()
+
+        if request_volume <= 300 and self.cache is None:
             response = requests.get(
                 "https://api.pro.coinbase.com/products/{0}/candles?start={1}&end={2}&granularity={3}".format(
                     self.ticker,
@@ -151,53 +202,24 @@ class HistoricalData(object):
                     print("Status Code: {}, error in connecting to the CoinBase Pro API.".format(response.status_code))
                 sys.exit()
         else:
-            # The api limit:
-            max_per_mssg = 300
             data = pd.DataFrame()
-            for i in range(int(request_volume / max_per_mssg) + 1):
-                provisional_start = start + timedelta(0, i * (self.granularity * max_per_mssg))
-                provisional_start = self._date_cleaner(provisional_start)
-                provisional_end = start + timedelta(0, (i + 1) * (self.granularity * max_per_mssg))
-                provisional_end = self._date_cleaner(provisional_end)
-
-                # print("Provisional Start: {}".format(provisional_start))
-                # print("Provisional End: {}".format(provisional_end))
-                response = requests.get(
-                    "https://api.pro.coinbase.com/products/{0}/candles?start={1}&end={2}&granularity={3}".format(
-                        self.ticker,
-                        provisional_start,
-                        provisional_end,
-                        self.granularity))
-
-                if response.status_code in [200, 201, 202, 203, 204]:
-                    if self.verbose:
-                        print('Data for chunk {} of {} extracted'.format(i+1,
-                                                                         (int(request_volume / max_per_mssg) + 1)))
-                    dataset = pd.DataFrame(json.loads(response.text))
-                    if not dataset.empty:
-                        data = data.append(dataset)
-                        time.sleep(randint(0, 2))
-                    else:
-                        print("""CoinBase Pro API did not have available data for '{}' beginning at {}.  
-                        Trying a later date:'{}'""".format(self.ticker,
-                                                           self.start_date,
-                                                           provisional_start))
-                        time.sleep(randint(0, 2))
-                elif response.status_code in [400, 401, 404]:
-                    if self.verbose:
-                        print(
-                            "Status Code: {}, malformed request to the CoinBase Pro API.".format(response.status_code))
-                    sys.exit()
-                elif response.status_code in [403, 500, 501]:
-                    if self.verbose:
-                        print(
-                            "Status Code: {}, could not connect to the CoinBase Pro API.".format(response.status_code))
-                    sys.exit()
+            for i in range(chunk_count):
+                window_start = self._chunk_start(start, i, max_per_mssg)
+                window_end = self._chunk_start(start, i + 1, max_per_mssg)
+                if self.cache is None:
+                    rows = self._request_chunk(window_start, window_end)
+                else:
+                    rows = self.cache.fetch(window_start, window_end, self._request_chunk)
+                if self.verbose:
+                    print('Data for chunk {} of {} extracted'.format(i+1, chunk_count))
+                dataset = pd.DataFrame(rows)
+                if not dataset.empty:
+                    data = data.append(dataset)
                 else:
-                    if self.verbose:
-                        print("Status Code: {}, error in connecting to the CoinBase Pro API.".format(
-                            response.status_code))
-                    sys.exit()
+                    print("""CoinBase Pro API did not have available data for '{}' beginning at {}.  
+                    Trying a later date:'{}'""".format(self.ticker,
+                                                       self.start_date,
+                                                       self._date_cleaner(datetime.utcfromtimestamp(window_start))))
             data.columns = ["time", "low", "high", "open", "close", "volume"]
             data["time"] = pd.to_datetime(data["time"], unit='s')
             data = data[data['time'].between(start, end)]
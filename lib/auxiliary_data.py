@@ -0,0 +1,73 @@
+"""
+Auxiliary data series (fear and greed, NUPL, risk free rate...) lined up with the price data.
+Each series is joined "as of" each price row: the row gets the last value known at that time (optionally lagged),
+found for every row at once with searchsorted.
+To add a new series, add an AuxiliarySeries to AUXILIARY_SERIES and list its name in a strategy's `auxiliary` attribute.
+"""
+import numpy as np
+import pandas as pd
+
+SECONDS_IN_A_DAY = 60*60*24
+
+def as_of(series_timestamps, series_values, timestamps, lag=0, max_age=None):
+    """
+    Value of a series at each timestamp, using the last series value at or before timestamp-lag.
+    Values older than max_age seconds (measured from timestamp-lag) are treated as missing.
+    Missing values are NaN.
+    series_timestamps must be sorted.
+    """
+    series_timestamps = np.asarray(series_timestamps, dtype=np.int64)
+    series_values = np.asarray(series_values, dtype=float)
+    known_times = np.asarray(timestamps, dtype=np.int64)-lag
+    rows = np.searchsorted(series_timestamps, known_times, side='right')-1
+    values = np.full(len(known_times), np.nan)
+    found = rows >= 0
+    if max_age is not None:
+        found[found] = (known_times[found]-series_timestamps[rows[found]]) < max_age
+    values[found] = series_values[rows[found]]
+    return values
+
+class AuxiliarySeries:
+    """
+    A timestamped csv of values, eg fear_and_greed.csv.
+    lag is how many seconds after its timestamp a value can be used, so strategies never see data before it exists.
+    max_age is how many seconds a value stays usable, after that the row is treated as missing data.
+    """
+    def __init__(self, csv, value_column='value', timestamp_column='timestamp', lag=0, max_age=None):
+        self.csv = csv
+        self.value_column = value_column
+        self.timestamp_column = timestamp_column
+        self.lag = lag
+        self.max_age = max_age
+
+    def align(self, series_df, timestamps):
+        """Value of the series at every timestamp, NaN when there is no data."""
+        series_df = series_df.sort_values(self.timestamp_column)
+        if series_df[self.timestamp_column].duplicated().any():
+            raise ValueError(f'{self.csv} has more than one value for a timestamp')
+        return as_of(
+            series_df[self.timestamp_column].to_numpy(),
+            series_df[self.value_column].to_numpy(),
+            timestamps,
+            self.lag,
+            self.max_age
+        )
+
+    def load(self, path, timestamps):
+        """Read the series from path and line it up with timestamps."""
+        return self.align(pd.read_csv(path), timestamps)
+
+# Series that strategies can ask for
+AUXILIARY_SERIES = {
+    # Fear and greed is daily, the NOTE in base_FOMO.buy_sell_logic explains why a day's value can only be used the day after
+    'fear_and_greed': AuxiliarySeries('fear_and_greed.csv', lag=SECONDS_IN_A_DAY, max_age=SECONDS_IN_A_DAY),
+}
+
+def check_coverage(name, values, timestamps, rows):
+    """Raise a LookupError if the series has no data at any of the rows."""
+    missing = np.isnan(values[rows])
+    if missing.any():
+        first_missing = pd.to_datetime(timestamps[rows][missing][0], unit='s', utc=True)
+        raise LookupError(
+            f'No {name} data for {first_missing} ({missing.sum()} of {len(rows)} action rows are missing data)'
+        )
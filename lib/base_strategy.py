@@ -2,14 +2,28 @@
 Base strategy class.
 Gets inherited by specific strategies.
 """
+from contextlib import nullcontext
 from fractions import Fraction as frac
+import numpy as np
 import pandas as pd
+import lib.auxiliary_data as ax
+import lib.bootstrap as bst
+import lib.candle_tiers as ct
+import lib.exact_prices as ep
+import lib.indicators as ind
+import lib.irr as irr
+import lib.schedules as sc
+import lib.trade_log as tl
 
 class LoopComplete(Exception):
     """
     Raised to indicate that the loop has reached the end of the price_period csv.
     """
 
+# Lock held while Overall_Results.csv is updated, set when strategies run in more than one process at once
+# (see strategy_performance.py). None when there is only one process.
+RESULTS_LOCK = None
+
 def unfrac(fraction, round_to=4):
     """Turn a fraction into a float rounded to the fourth decimal."""
     float_num = round(float(fraction), round_to)
@@ -27,6 +41,13 @@ def returns_history_path(csv):
         csv = csv + '.csv'
     return f'results\\returns_history\\{csv}'
 
+def trade_log_path(file_name):
+    """Path to saved trade logs."""
+    # Make sure we have the file ending
+    if file_name[-4:] != '.npz':
+        file_name = file_name + '.npz'
+    return f'results\\trade_logs\\{file_name}'
+
 def results_path(csv):
     """Path to overall results files."""
     # Make sure we have the file ending
@@ -34,6 +55,10 @@ def results_path(csv):
         csv = csv + '.csv'
     return f'results\\{csv}'
 
+def graph_path(file_name=''):
+    """Path to saved graphs, the graphs folder itself if file_name is empty."""
+    return f'results\\graphs\\{file_name}'
+
 def period_path(csv):
     """Path to price_period csv files."""
     # Make sure we have the file ending
@@ -50,6 +75,27 @@ def full_path(csv):
 
 class Strategy:
     """Base strategy class, specific strategies should inherent this."""
+    # Indicators the strategy needs, name: (indicator, params), eg {'slow_average': ('sma', {'window': 60*24})}
+    # Set this on the class, or on self before calling super().__init__ if it depends on the parameters
+    indicators = {}
+    # Times between actions (in seconds) to run when no time is given, eg by strategy_performance.py
+    default_times_between_action = []
+    # Folder to save calculated indicators in, blank uses csv_files\indicator_cache
+    indicator_cache_dir = ''
+    # Auxiliary series the strategy needs (see lib/auxiliary_data.py), eg ['fear_and_greed']
+    auxiliary = []
+    # Paths to use instead of csv_files\<series csv> (used by tests), name: path
+    auxiliary_paths = {}
+    # Seconds in each period to work out Sharpe and Sortino from the Total Value change over, eg 60*60*24 for daily
+    # None uses the annualized % Return of every row
+    risk_frequency = None
+    # Block bootstrap replicas of the Total Value history to add confidence intervals to the results (see lib/bootstrap.py)
+    # 0 skips them as they take a few minutes for long price periods
+    bootstrap_replicas = 0
+    # Seconds of history in each resampled block, and the seed so the intervals are the same every run
+    bootstrap_block_seconds = 60*60*24
+    bootstrap_seed = 0
+
     def __init__(
         self,
         name,
@@ -59,12 +105,23 @@ class Strategy:
         price_df = pd.DataFrame(),
         starting_eth = 0,
         save_results = True,
-        save_balance_history = True
+        save_balance_history = True,
+        resolution = '1m',
+        schedule = None
     ):
         # Save if we should save the results of this run (used to stop tests adding info)
         self.save_results = save_results
         # See if we should save the history of all of the balances throughout the run
         self.save_balance_history = save_balance_history
+        # Candle tier the strategy makes decisions on ('1m', '1h' or '1d')
+        # Strategies that only act every hour/day can use a coarser tier to skip most of the minute rows
+        ct.check_resolution(resolution)
+        if resolution != '1m' and time_between_action < ct.TIER_SECONDS[resolution]:
+            raise ValueError(f'time_between_action is shorter than the {resolution} resolution')
+        self.resolution = resolution
+        # Keep results from coarser tiers separate from the minute results
+        if resolution != '1m':
+            name = f'{name} ({resolution} candles)'
         # Name of the strategy
         self.name = name
         # Name of the price period given
@@ -73,18 +130,51 @@ class Strategy:
         print(f'For price period of: {price_period_name}')
         # Holds the historical price data, open file using price_period_name.csv if no df given
         if price_df.empty:
-            self.price_df = pd.read_csv(period_path(price_period_name))
+            if resolution == '1m':
+                self.price_df = pd.read_csv(period_path(price_period_name))
+            else:
+                # Use the saved tier so we never have to read the minute data
+                self.price_df = ct.decision_frame(
+                    ct.read_candles(period_path(ct.tier_name(price_period_name, resolution)))
+                )
+        elif resolution != '1m':
+            self.price_df = ct.decision_frame(ct.build_candles(price_df, resolution))
         else:
             self.price_df = price_df
+        # Parse the exact prices once so getting a price is just an array lookup
+        self.price_numerators, self.price_denominators = ep.parse_fractions(self.price_df['fraction_price'])
+        # Timestamps as an array so moving through time doesn't have to search price_df
+        self.timestamps = self.price_df['timestamp'].to_numpy(dtype=np.int64)
         self.start_time = int(self.price_df['timestamp'].iloc[0])
         self.end_time = int(self.price_df['timestamp'].iloc[-1])
         self.max_index = int(self.price_df.index.values[-1])
+        # Work out every indicator once over the whole price period, loading it if it was saved before
+        self.indicator_values = ind.load_indicators(
+            self.indicators,
+            self.timestamps,
+            self.price_df['decimal_price'].to_numpy(dtype=float),
+            self.indicator_cache_dir
+        )
         # Index of price_df
         self.current_index = 0
         # This will be in timestamp units (aka seconds)
         # Time between when the strategy will check if it wants to buy or sell
         # Each data point is collected 60 seconds apart
         self.time_between_action = time_between_action
+        # Rows to act on, defaults to every time_between_action seconds (see lib/schedules.py)
+        if schedule is None:
+            schedule = sc.Every(time_between_action)
+        self.schedule = schedule
+        # Line up every auxiliary series with the price rows
+        # Check now that there is data for every row we act on, instead of finding out part way through a run
+        self.auxiliary_values = {}
+        if self.auxiliary:
+            action_rows = np.r_[0, schedule.compile(self.timestamps)]
+            for series_name in self.auxiliary:
+                series = ax.AUXILIARY_SERIES[series_name]
+                values = series.load(self.auxiliary_paths.get(series_name, full_path(series.csv)), self.timestamps)
+                ax.check_coverage(series_name, values, self.timestamps, action_rows)
+                self.auxiliary_values[series_name] = values
         self.starting_usd = frac(starting_usd)
         self.starting_eth = frac(starting_eth)
         self.current_usd = frac(starting_usd)
@@ -92,27 +182,48 @@ class Strategy:
         self.current_eth = frac(starting_eth)
         self.current_time = self.start_time
         # Get price at the first time period
-        self.current_price = frac(self.price_df['fraction_price'].iloc[0])
+        self.current_price = self.price_at(0)
         self.starting_total_value = self.starting_usd + (self.starting_eth*self.current_price)
         self.trades_made = 0
         # set trading fee, using uniswap's 0.3%. Aka 100-0.3=99.7
         self.trading_fee = frac(99.7/100)
         # Keep track of fees paid
         self.fees_paid = frac(0)
-        # Create all of the rows for price_df so we don't have to append rows, just add data
-        # Get timestamps and fraction_price from price_df
-        self.returns_df = pd.DataFrame(self.price_df[['timestamp', 'fraction_price', 'decimal_price']])
-        # Add other columns we need
-        self.returns_df = self.returns_df.append(pd.DataFrame(columns=[
-            '# of USD',
-            '# of ETH',
-            'Total Value',
-            '% Return'
-        ]))
-        # Rename the index to 'index'
-        self.returns_df.index.names = ['index']
+        # Every buy and sell made (see lib/trade_log.py)
+        self.trade_log = tl.TradeLog()
+        # Returns history, one row for every row of price_df, kept as typed arrays (see returns_df)
+        # Balances are NaN until we move past their row, Total Value and % Return are filled in by add_data_to_results
+        row_count = len(self.price_df.index)
+        self.usd_history = np.full(row_count, np.nan)
+        self.eth_history = np.full(row_count, np.nan)
+        self.total_value_history = np.full(row_count, np.nan)
+        self.return_history = np.full(row_count, np.nan)
+        # Final returns history DataFrame, set by add_data_to_results
+        self._returns_df = None
         # Make sure the first row has initial data
-        self.add_to_returns(time_slice=(self.price_df['timestamp'] == self.current_time))
+        self.add_to_returns(self.timestamps == self.current_time)
+
+    @property
+    def returns_df(self):
+        """
+        Returns history as a DataFrame, only built from the arrays when it is asked for.
+        Once add_data_to_results has run this is the final history that gets saved.
+        """
+        if self._returns_df is not None:
+            return self._returns_df
+        return pd.DataFrame({
+            'timestamp': self.timestamps,
+            'fraction_price': self.price_df['fraction_price'].to_numpy(),
+            'decimal_price': self.price_df['decimal_price'].to_numpy(dtype=float),
+            '# of USD': self.usd_history,
+            '# of ETH': self.eth_history,
+            'Total Value': self.total_value_history,
+            '% Return': self.return_history
+        }, index=self.price_df.index.rename('index'))
+
+    @returns_df.setter
+    def returns_df(self, returns_df):
+        self._returns_df = returns_df
 
     def run_logic(self):
         """
@@ -121,46 +232,81 @@ class Strategy:
         """
         raise NotImplementedError('Override this.')
 
+    def price_at(self, index):
+        """Exact price (as a fraction) at an index of price_df."""
+        return ep.fraction_at(self.price_numerators, self.price_denominators, index)
+
+    def indicator(self, name):
+        """Value of an indicator at the current index, only uses data up to the current time."""
+        return self.indicator_values[name][self.current_index]
+
+    def auxiliary_value(self, name):
+        """Value of an auxiliary series (eg fear and greed) at the current index."""
+        value = self.auxiliary_values[name][self.current_index]
+        if np.isnan(value):
+            raise LookupError(f'No {name} data for timestamp {self.current_time}')
+        return value
+
     def go_to_next_action(self):
         """
         Move time forward until the next buy period in an optimized way.
         Raise LoopComplete when we reach the last index.
-        Optimized version.
+        Optimized version, run_schedule is preferred for new strategies.
         """
-        # get all values between time+delta_time
-        time_slice = ((self.price_df['timestamp'] >= self.current_time) &
-            (self.price_df['timestamp'] < self.current_time+self.time_between_action))
-
-        # add_to_returns for all values given
-        self.add_to_returns(time_slice)
-        # Go to the final index + 1
-        self.current_index = int(self.price_df.loc[time_slice].index[-1])+1
+        # Find the first row at or after time+delta_time
+        next_index = int(np.searchsorted(self.timestamps, self.current_time+self.time_between_action, side='left'))
         # stop if done looping
-        if self.current_index > self.price_df.index[-1]: # pylint: disable=no-member
-            # set index to last value
-            self.current_index = int(self.price_df.index[-1]) # pylint: disable=no-member
-            # update current time/price for last values
-            self.current_time = self.price_df['timestamp'].iloc[self.current_index]
-            # Update price so we can update total value/total returns
-            self.current_price = frac(self.price_df['fraction_price'].iloc[self.current_index])
+        if next_index >= len(self.timestamps):
+            self.move_to_end()
             raise LoopComplete('All done')
+        self.move_to(next_index)
+
+    def move_to(self, index):
+        """
+        Move forward in time to a row of price_df.
+        Every row we pass over gets our current balances in returns_df.
+        """
+        # add_to_returns for every row from where we are up to (but not including) the new row
+        self.add_to_returns(slice(self.current_index, index))
+        self.current_index = int(index)
         # update current time/price for latest index values
-        self.current_time = self.price_df['timestamp'].iloc[self.current_index]
+        self.current_time = self.timestamps[self.current_index]
         # Update price so we can update total value/total returns
-        self.current_price = frac(self.price_df['fraction_price'].iloc[self.current_index])
+        self.current_price = self.price_at(self.current_index)
+
+    def move_to_end(self):
+        """
+        Move to the last row of price_df, filling in returns_df for every row up to and including it.
+        """
+        # set index to last value
+        self.move_to(len(self.timestamps)-1)
+        # move_to doesn't fill in the row it lands on, so add the last row too
+        self.add_to_returns(slice(self.current_index, None))
 
-    def add_to_returns(self, time_slice):
+    def run_schedule(self, schedule=None):
         """
-        Called on buy or sell. Adds current values to returns df.
+        Generator that moves to each row of a schedule and yields its index, eg:
+            for _ in self.run_schedule():
+                self.buy_eth(usd_eth_to_buy=100)
+        Defaults to self.schedule (every time_between_action seconds unless a schedule was given).
+        Only rows after the current one are used. Once the schedule is done we move to the last row.
+        """
+        if schedule is None:
+            schedule = self.schedule
+        # All of the rows are found up front, the loop just moves between them
+        for index in schedule.compile(self.timestamps, self.current_index):
+            self.move_to(index)
+            yield self.current_index
+        self.move_to_end()
+
+    def add_to_returns(self, rows):
+        """
+        Called on buy or sell. Adds current values to the returns history.
+        rows is a slice or mask of row positions.
         Optimized version.
         """
-        self.returns_df.loc[time_slice, [
-            '# of USD',
-            '# of ETH'
-        ]] = [
-            unfrac(self.current_usd),
-            unfrac(self.current_eth),
-        ]
+        self.usd_history[rows] = unfrac(self.current_usd)
+        self.eth_history[rows] = unfrac(self.current_eth)
 
     def get_total_value(self):
         """
@@ -186,6 +332,24 @@ class Strategy:
             returns = return_val/fraction_of_year
         return returns
 
+    def money_weighted_return(self):
+        """
+        Returns money weighted annual % Return (XIRR) of the USD put into ETH, see lib/irr.py.
+        Unlike get_returns, USD only counts once it is spent, so slow DCA buys aren't measured against idle USD.
+        None if there is no rate that works (eg no trades).
+        """
+        amounts, times = irr.trade_cash_flows(
+            self.trade_log,
+            start_value=float(self.starting_eth*self.price_at(0)),
+            start_time=self.start_time,
+            end_value=float(self.current_eth*self.current_price),
+            end_time=self.current_time
+        )
+        rate = irr.xirr(amounts, times)
+        if np.isnan(rate):
+            return None
+        return round(rate*100, 4)
+
     def sharpe_ratio_of_returns(self):
         """
         Calculate the sharpe ratio of a column for a dataframe. This is a measure of risk vs reward.
@@ -195,7 +359,12 @@ class Strategy:
         annual_expected_return = annual expected return of the strategy
         risk free rate = set by as default of 3% (0.03) (stable coin lp-ing, Aave lending and etc)
         sigma = standard deviation of anualized returns
+        If risk_frequency is set, the returns over each period are used instead, annualized by sqrt(periods in a year).
         """
+        if self.risk_frequency is not None:
+            excess_returns, periods_in_year = self.period_excess_returns()
+            sigma = excess_returns.std(ddof=1) if len(excess_returns) > 1 else np.nan
+            return self.annualized_ratio(excess_returns, sigma, periods_in_year)
         # Drop na values in case we are not at the end of the price period
         returns = self.returns_df['% Return'].dropna()
         # Divide by 100 to turn % return into decimal version
@@ -219,7 +388,14 @@ class Strategy:
         annual_expected_return = annual expected return of the strategy
         risk free rate = set by as default of 3% (0.03) (stable coin lp-ing, Aave lending and etc)
         sigma = downside only standard deviation of anualized returns
+        If risk_frequency is set, the returns over each period are used instead, with the downside deviation
+        below the risk free return as sigma.
         """
+        if self.risk_frequency is not None:
+            excess_returns, periods_in_year = self.period_excess_returns()
+            # Downside deviation, only returns below the risk free return count
+            downside_sigma = np.sqrt(np.mean(np.minimum(excess_returns, 0)**2)) if len(excess_returns) else np.nan
+            return self.annualized_ratio(excess_returns, downside_sigma, periods_in_year)
         # Drop na values in case we are not at the end of the price period
         returns = self.returns_df['% Return'].dropna()
         # Divide by 100 to turn % return into decimal version
@@ -233,6 +409,85 @@ class Strategy:
             return None
         return round((average_annual_expected_return-annual_risk_free_return)/sigma, 4)
 
+    def period_excess_returns(self):
+        """
+        Returns of Total Value over each full risk_frequency period from the start (eg day over day returns),
+        minus the risk free return for a period, and how many periods are in a year.
+        Only looks up one row per period, so the cost depends on the number of periods, not rows.
+        """
+        # Convert seconds to year (account for a fourth of a leap year day)
+        seconds_in_year = 60*60*24*365.25
+        periods_in_year = seconds_in_year/self.risk_frequency
+        annual_risk_free_return = .03
+        # Total value as of the last row at or before the start of each period
+        period_starts = np.arange(self.start_time, self.timestamps[-1]+1, self.risk_frequency)
+        rows = np.searchsorted(self.timestamps, period_starts, side='right')-1
+        values = self.total_value_history[rows]
+        return values[1:]/values[:-1]-1-annual_risk_free_return/periods_in_year, periods_in_year
+
+    def annualized_ratio(self, excess_returns, sigma, periods_in_year):
+        """Sharpe or Sortino of per period excess returns, scaled to a year. None if sigma is 0 or undefined."""
+        if len(excess_returns) < 2 or pd.isna(sigma) or sigma == 0:
+            return None
+        return round(float(excess_returns.mean()/sigma*np.sqrt(periods_in_year)), 4)
+
+    def drawdown_metrics(self):
+        """
+        Path risk of the Total Value history, in one pass over it:
+        Max Drawdown % = largest % drop from a previous high
+        Max Drawdown Days = longest time spent below a previous high
+        % Time Underwater = % of the price period spent below a previous high
+        Calmar Ratio = Final Annual % Return/Max Drawdown %, None if we never went below a previous high
+        """
+        total_value = self.total_value_history
+        # Highest total value so far at every row
+        peaks = np.maximum.accumulate(total_value)
+        underwater = total_value < peaks
+        drawdown = np.zeros(len(total_value))
+        np.divide(peaks-total_value, peaks, out=drawdown, where=peaks > 0)
+        max_drawdown = float(drawdown.max())*100
+        # Time of the last high at every row, so each row knows how long it has been under it
+        last_peak_times = np.maximum.accumulate(np.where(underwater, self.timestamps[0], self.timestamps))
+        seconds_in_a_day = 60*60*24
+        max_drawdown_days = float((self.timestamps-last_peak_times).max())/seconds_in_a_day
+        # Each row holds until the next row's time
+        row_seconds = np.diff(self.timestamps)
+        total_seconds = row_seconds.sum()
+        time_underwater = float(row_seconds[underwater[:-1]].sum()*100/total_seconds) if total_seconds > 0 else 0.0
+        calmar = None
+        if max_drawdown > 0:
+            calmar = round(float(self.get_returns())/max_drawdown, 4)
+        return {
+            'Max Drawdown %': round(max_drawdown, 4),
+            'Max Drawdown Days': round(max_drawdown_days, 4),
+            '% Time Underwater': round(time_underwater, 4),
+            'Calmar Ratio': calmar
+        }
+
+    def bootstrap_intervals(self, confidence=.95):
+        """
+        Confidence intervals of Final Annual % Return, Sharpe, Sortino and Max Drawdown % from
+        bootstrap_replicas block bootstrapped Total Value histories, eg 'Sharpe of Returns CI Low'.
+        Sharpe and Sortino are worked out the same way as the results row, so they follow risk_frequency.
+        """
+        # A single row has no steps to resample, so every interval is undefined
+        if len(self.timestamps) < 2:
+            return bst.confidence_intervals(pd.DataFrame(columns=bst.METRICS, dtype=float), confidence)
+        # Rows are usually a minute apart, or an hour/day for coarser resolutions.
+        # Only used to size the blocks, the replicas resample the real time between rows
+        step_seconds = max(1, int(np.median(np.diff(self.timestamps))))
+        replicas = bst.bootstrap_metrics(
+            self.total_value_history,
+            float(self.starting_total_value),
+            n_replicas=self.bootstrap_replicas,
+            block_size=max(1, self.bootstrap_block_seconds//step_seconds),
+            seed=self.bootstrap_seed,
+            risk_frequency=self.risk_frequency,
+            timestamps=self.timestamps,
+            start_time=self.start_time
+        )
+        return bst.confidence_intervals(replicas, confidence)
+
     def buy_eth(self, usd_eth_to_buy=0, eth_to_buy=0,):
         """
         Buy ETH with USD.
@@ -267,6 +522,10 @@ class Strategy:
         self.current_eth += eth_amount_to_buy-eth_fee
         self.current_usd -= usd_eth_to_buy
         self.trades_made += 1
+        self.trade_log.append(
+            self.current_index, self.current_time, tl.BUY,
+            float(eth_amount_to_buy-eth_fee), float(usd_eth_to_buy), float(self.current_price), float(usd_fee)
+        )
 
     def sell_eth(self, eth_to_sell=0, usd_eth_to_sell=0):
         """
@@ -297,6 +556,10 @@ class Strategy:
         self.current_eth -= eth_to_sell
         self.current_usd += amount_to_sell-usd_fee
         self.trades_made += 1
+        self.trade_log.append(
+            self.current_index, self.current_time, tl.SELL,
+            float(eth_to_sell), float(amount_to_sell), float(self.current_price), float(usd_fee)
+        )
 
     def add_data_to_results(self, testing=False):
         """
@@ -306,48 +569,37 @@ class Strategy:
         if self.trades_made == 0:
             raise ValueError('Error: No trades were made! Double check your strategy.')
         # Now, at the end in vector calculate Total Value and yearly_%_return
-        # Use lambda function to make sure we have a fraction and not a string
-        self.returns_df['Total Value'] = self.returns_df['# of USD']+(
-            self.returns_df['# of ETH']*self.returns_df['fraction_price'].apply(lambda x: frac(x)))
+        # Use the prices parsed in __init__ instead of parsing fraction_price again
+        total_value = self.usd_history+(self.eth_history*ep.to_floats(self.price_numerators, self.price_denominators))
         # Convert seconds to year (account for a fourth of a leap year day)
         seconds_in_year = 60*60*24*365.25
         # figure out how far into a year we are so we can annualize the returns
-        # Use lambda as dataframes don't play nicely with fractions
-        fraction_of_year = self.returns_df['timestamp'].apply(lambda x:
-            frac(x-self.start_time)/
-            frac(seconds_in_year)
-        )
-        # Remove the first entry in fraction_of_year as it will be 0
-        fraction_of_year = fraction_of_year.drop([0])
+        fraction_of_year = (self.timestamps-self.start_time)/seconds_in_year
         # Set first yearly return to zero so we don't have to divide by 0 in the next section
-        self.returns_df.loc[0, ('% Return')] = 0
+        percent_return = np.zeros(len(total_value))
         # Then don't change the first entry
-        self.returns_df.loc[1:, ('% Return')] = (
-            (self.returns_df['Total Value'].drop([0])*100/self.starting_total_value)-100
-            )/fraction_of_year
-            # ^ be careful of dividing by 0
-
+        percent_return[1:] = ((total_value[1:]*100/float(self.starting_total_value))-100)/fraction_of_year[1:]
         # Round the new columns, Total Value and % Return
-        # Break into two columns so we can use astype, otherwise we can get problems due to typing
-        self.returns_df['Total Value'] = self.returns_df['Total Value'].astype(float).round(4)
-        self.returns_df['% Return'] = self.returns_df['% Return'].astype(float).round(4)
+        self.total_value_history = total_value.round(4)
+        self.return_history = percent_return.round(4)
 
-        # drop fraction_price
-        self.returns_df = self.returns_df.drop(['fraction_price'], axis = 1)
-        # rename decimal_price to price
-        self.returns_df.rename(columns = {'decimal_price':'price'}, inplace = True)
+        # Build the final history without fraction_price and with decimal_price renamed to price
+        self.returns_df = pd.DataFrame({
+            'timestamp': self.timestamps,
+            'price': self.price_df['decimal_price'].to_numpy(dtype=float),
+            '# of USD': self.usd_history,
+            '# of ETH': self.eth_history,
+            'Total Value': self.total_value_history,
+            '% Return': self.return_history
+        }, index=self.price_df.index.rename('index'))
 
         # Calculate values
         # Make this a dictionary that we can add where needed
         value_dict = {
             # - Price delta (start to end)
-            'Price Delta': unfrac(
-                frac(self.price_df['fraction_price'].iloc[-1])-frac(self.price_df['fraction_price'].iloc[0])
-            ),
+            'Price Delta': unfrac(self.price_at(-1)-self.price_at(0)),
             # - % Price delta
-            '% Price Delta': unfrac(
-                (frac(self.price_df['fraction_price'].iloc[-1])/frac(self.price_df['fraction_price'].iloc[0]))*frac(100)
-            ),
+            '% Price Delta': unfrac((self.price_at(-1)/self.price_at(0))*frac(100)),
             # Starting USD
             'Starting USD': unfrac(self.starting_usd),
             # Starting ETH
@@ -368,6 +620,8 @@ class Strategy:
             'Median Annual % Return': round(self.returns_df['% Return'].median(), 4),
             # - % Total Returns (in USD)
             'Final Annual % Return': unfrac(self.get_returns()),
+            # - Money weighted % return (XIRR), only counts USD once it has been put into ETH
+            'Money Weighted Annual % Return': self.money_weighted_return(),
             # Median-Mean % Return (aka different is the positional average from the numerical average)
             'Median-Mean % Return': round(self.returns_df['% Return'].median()-self.returns_df['% Return'].mean(), 4),
             # - Total trades made (Helps show how intensive a strategy might be, also can be used for gas fee estimation later)
@@ -385,6 +639,11 @@ class Strategy:
             # - Volatility of price for time period (standard deviation)
             'Std of Price': round(self.price_df['decimal_price'].std(), 2)
         }
+        # - Max drawdown, drawdown length, time underwater and Calmar ratio
+        value_dict.update(self.drawdown_metrics())
+        # - Confidence intervals of the headline metrics
+        if self.bootstrap_replicas:
+            value_dict.update(self.bootstrap_intervals())
 
         # Return the values above if we are testing
         if testing:
@@ -408,36 +667,49 @@ class Strategy:
 
             # Check if csv file with price period name exists in results/price_periods
             path_to_results = results_path('Overall_Results')
-            try:
-                # If it exists, read it in
-                price_period_df = pd.read_csv(path_to_results)
-            except FileNotFoundError:
-                # If not, create it. Name = time period name
-                price_period_df = pd.DataFrame(columns=price_period_columns)
-
-            # Check if the strategy-Price_Period combo already has a row
-            if not price_period_df.empty:
-                # Look for if there is a row with the Strategy and Price_period already
-                existing_row = price_period_df.loc[
-                    (price_period_df['Strategy']==self.name) & 
-                    (price_period_df['Price_Period']==self.price_period_name)
-                ]
-                if not existing_row.empty:
-                    drop_index = existing_row.index[0]
-                    price_period_df = price_period_df.drop([drop_index])
-
-            # No matter what we will want to add the row
-            price_period_df = price_period_df.append(name_and_price_period_row)
-            # Rename index so we can call it easily
-            price_period_df.index.names = ['index']
-
-            # Sort rows first by 'Strategy' and then by 'Price_Period'
-            price_period_df.sort_values(by=['Strategy', 'Price_Period'])
-            # save df as csv
-            price_period_df.to_csv(path_to_results, index=False)
+            # Don't let another process change the file between reading and saving it
+            results_lock = RESULTS_LOCK if RESULTS_LOCK is not None else nullcontext()
+            with results_lock:
+                self.update_overall_results(path_to_results, name_and_price_period_row, price_period_columns)
 
             if self.save_balance_history:
                 # Save the returns history for use later
                 returns_history_file_name = f'{self.name}_{self.price_period_name}_returns_history.csv'
                 # save df as csv
                 self.returns_df.to_csv(returns_history_path(returns_history_file_name), index=False)
+
+            # Save every trade made
+            self.trade_log.save(trade_log_path(f'{self.name}_{self.price_period_name}_trades'))
+
+    def update_overall_results(self, path_to_results, name_and_price_period_row, price_period_columns):
+        """Add this run's row to Overall_Results.csv, replacing any old row for the same strategy and price period."""
+        try:
+            # If it exists, read it in
+            price_period_df = pd.read_csv(path_to_results)
+        except FileNotFoundError:
+            # If not, create it. Name = time period name
+            price_period_df = pd.DataFrame(columns=price_period_columns)
+
+        # Check if the strategy-Price_Period combo already has a row
+        if not price_period_df.empty:
+            # Look for if there is a row with the Strategy and Price_period already
+            existing_row = price_period_df.loc[
+                (price_period_df['Strategy']==self.name) & 
+                (price_period_df['Price_Period']==self.price_period_name)
+            ]
+            if not existing_row.empty:
+                drop_index = existing_row.index[0]
+                price_period_df = price_period_df.drop([drop_index])
+
+        # No matter what we will want to add the row
+        price_period_df = price_period_df.append(name_and_price_period_row)
+        # Keep the columns in this row's order, older files may be missing newer columns or have them at the end
+        extra_columns = [column for column in price_period_df.columns if column not in price_period_columns]
+        price_period_df = price_period_df[price_period_columns+extra_columns]
+        # Rename index so we can call it easily
+        price_period_df.index.names = ['index']
+
+        # Sort rows first by 'Strategy' and then by 'Price_Period'
+        price_period_df.sort_values(by=['Strategy', 'Price_Period'])
+        # save df as csv
+        price_period_df.to_csv(path_to_results, index=False)
@@ -0,0 +1,117 @@
+"""
+Block bootstrap confidence intervals for a strategy's results.
+The Total Value history is turned into row over row growth, which is resampled in blocks of rows (so runs of
+volatility stay together) to make replica histories. The headline metrics of every replica give a range for each
+metric, eg whether DCA every 1 day beating DCA every 28 days is more than noise.
+Replicas are worked out as (replicas, rows) arrays in batches so memory use stays under max_batch_bytes.
+"""
+import numpy as np
+import pandas as pd
+import lib.monte_carlo as mc
+
+# Metrics worked out for every replica
+METRICS = ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns', 'Max Drawdown %']
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+
+def block_indices(rng, row_count, block_size):
+    """Rows for one replica, made of blocks of block_size rows in a row starting at random rows."""
+    block_count = -(-row_count//block_size)
+    starts = rng.integers(0, row_count-block_size+1, block_count)
+    return (starts[:, np.newaxis]+np.arange(block_size)).ravel()[:row_count]
+
+def period_ratios(values, times, risk_frequency):
+    """
+    Sharpe and Sortino of every replica (row of values) from its returns over each risk_frequency period,
+    the same way Strategy does when risk_frequency is set. NaN where a ratio is undefined.
+    times is the seconds since the start at every row of every replica, replicas can cover different amounts of time
+    so each one gets its own periods.
+    """
+    periods_in_year = SECONDS_IN_YEAR/risk_frequency
+    annual_risk_free_return = .03
+    sharpe = np.full(len(values), np.nan)
+    sortino = np.full(len(values), np.nan)
+    for replica, (replica_values, replica_times) in enumerate(zip(values, times)):
+        # Total value as of the last row at or before the start of each period
+        period_starts = np.arange(0, replica_times[-1]+1, risk_frequency)
+        rows = np.searchsorted(replica_times, period_starts, side='right')-1
+        period_values = replica_values[rows]
+        excess_returns = period_values[1:]/period_values[:-1]-1-annual_risk_free_return/periods_in_year
+        if len(excess_returns) < 2:
+            continue
+        sigma = excess_returns.std(ddof=1)
+        # Downside deviation, only returns below the risk free return count
+        downside_sigma = np.sqrt(np.mean(np.minimum(excess_returns, 0)**2))
+        if sigma > 0:
+            sharpe[replica] = excess_returns.mean()/sigma*np.sqrt(periods_in_year)
+        if downside_sigma > 0:
+            sortino[replica] = excess_returns.mean()/downside_sigma*np.sqrt(periods_in_year)
+    return np.round(sharpe, 4), np.round(sortino, 4)
+
+def bootstrap_metrics(total_value, starting_value, n_replicas=1000, block_size=60*24, seed=None, step_seconds=60,
+                      max_batch_bytes=512*1024**2, risk_frequency=None, timestamps=None, start_time=None):
+    """
+    Final Annual % Return, Sharpe, Sortino and Max Drawdown % of n_replicas block bootstrapped Total Value histories.
+    Every replica starts at total_value[0], its returns are measured against starting_value like Strategy does.
+    Rows are taken to be step_seconds apart, unless timestamps are given. Then the time between rows is resampled
+    along with the growth, so gaps in the history stay gaps in the replicas and returns are annualized over the
+    time each replica covers. Times are measured from start_time (defaults to the first timestamp).
+    If risk_frequency (seconds) is set, Sharpe and Sortino use the returns over each period like Strategy does.
+    Every replica gets its own seed from seed, so the same seed always gives the same results no matter the batch size.
+    Returns a dataframe with a row per replica.
+    """
+    total_value = np.asarray(total_value, dtype=float)
+    growth = total_value[1:]/total_value[:-1]
+    row_count = len(growth)
+    # A single row has nothing to resample
+    if row_count == 0:
+        return pd.DataFrame(columns=METRICS, dtype=float).rename_axis('replica')
+    if timestamps is None:
+        row_seconds = np.full(row_count, float(step_seconds))
+        first_time = 0.0
+    else:
+        timestamps = np.asarray(timestamps, dtype=float)
+        row_seconds = np.diff(timestamps)
+        first_time = timestamps[0]-(timestamps[0] if start_time is None else start_time)
+    block_size = max(1, min(block_size, row_count))
+    # Each replica needs about 7 float arrays of its history while it is evaluated (see mc.returns_metrics)
+    bytes_per_replica = 7*8*(row_count+1)
+    batch_size = max(1, max_batch_bytes//bytes_per_replica)
+    seeds = np.random.SeedSequence(seed).spawn(n_replicas)
+    results = []
+    for batch_start in range(0, n_replicas, batch_size):
+        rngs = [np.random.default_rng(replica_seed) for replica_seed in seeds[batch_start:batch_start+batch_size]]
+        values = np.empty((len(rngs), row_count+1))
+        values[:, 0] = total_value[0]
+        times = np.empty((len(rngs), row_count+1))
+        times[:, 0] = first_time
+        for replica, rng in enumerate(rngs):
+            rows = block_indices(rng, row_count, block_size)
+            values[replica, 1:] = growth[rows]
+            times[replica, 1:] = row_seconds[rows]
+        np.cumprod(values, axis=1, out=values)
+        np.cumsum(times, axis=1, out=times)
+        metrics = mc.returns_metrics(values, starting_value, times=times)
+        if risk_frequency is not None:
+            metrics['Sharpe of Returns'], metrics['Sortino of Returns'] = period_ratios(values, times, risk_frequency)
+        # Largest % drop from a previous high
+        peaks = np.maximum.accumulate(values, axis=1)
+        metrics['Max Drawdown %'] = np.round(((peaks-values)/peaks).max(axis=1)*100, 4)
+        results.append(metrics)
+    results = pd.concat(results, ignore_index=True)
+    results.index.names = ['replica']
+    return results
+
+def confidence_intervals(replicas, confidence=.95):
+    """
+    Percentile confidence interval of each metric (column) of the replicas.
+    Returns {'<metric> CI Low': value, '<metric> CI High': value, ...}, replicas where a metric is undefined are left out.
+    """
+    tail = (1-confidence)/2
+    intervals = {}
+    for metric in replicas.columns:
+        values = replicas[metric].dropna()
+        low, high = (values.quantile([tail, 1-tail]) if len(values) else (np.nan, np.nan))
+        intervals[f'{metric} CI Low'] = round(float(low), 4)
+        intervals[f'{metric} CI High'] = round(float(high), 4)
+    return intervals
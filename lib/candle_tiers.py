@@ -0,0 +1,144 @@
+"""
+Hourly and daily candle tiers built from minute price data.
+Strategies that only act every hour/day can run on a tier instead of every minute of price data,
+which means a daily strategy only has to look at 1/1440th of the rows.
+"""
+import numpy as np
+import pandas as pd
+
+# Seconds covered by each row of a tier
+TIER_SECONDS = {
+    '1m': 60,
+    '1h': 60*60,
+    '1d': 60*60*24
+}
+
+CANDLE_COLUMNS = [
+    'timestamp',
+    'first_timestamp',
+    'last_timestamp',
+    'first_fraction_price',
+    'last_fraction_price',
+    'first_price',
+    'last_price',
+    'min_price',
+    'max_price',
+    'mean_price',
+    'rows'
+]
+
+def tier_name(name, resolution):
+    """
+    Name of the csv holding a tier of a price period or data file.
+    Minute data is the original file, eg: 'bull_run' -> 'bull_run', 'bull_run_1d'
+    """
+    check_resolution(resolution)
+    # Remove the file ending so the tier goes before it
+    if name[-4:] == '.csv':
+        name = name[:-4]
+    if resolution == '1m':
+        return name
+    return f'{name}_{resolution}'
+
+def check_resolution(resolution):
+    """Raise a ValueError if we don't have a tier for the resolution."""
+    if resolution not in TIER_SECONDS:
+        raise ValueError(f'Resolution must be one of {list(TIER_SECONDS.keys())}, got: {resolution}')
+
+def build_candles(df, resolution):
+    """
+    Group minute price data into candles, one row per hour or day (UTC).
+    df needs timestamp, fraction_price and decimal_price columns and must be sorted by timestamp.
+    timestamp is the start of the hour/day, first_ and last_ columns are the first and last minute in it.
+    Fraction prices are kept as they are so first/last prices stay exact.
+    """
+    check_resolution(resolution)
+    seconds = TIER_SECONDS[resolution]
+    timestamps = df['timestamp'].to_numpy(dtype=np.int64)
+    if len(timestamps) == 0:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+    if np.any(np.diff(timestamps) < 0):
+        raise ValueError('Price data is not sorted by timestamp')
+    fractions = df['fraction_price'].to_numpy()
+    prices = df['decimal_price'].to_numpy(dtype=float)
+
+    # Every row in the same hour/day gets the same bucket
+    buckets = timestamps//seconds*seconds
+    group_starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    group_ends = np.r_[group_starts[1:], len(timestamps)]-1
+    rows = group_ends-group_starts+1
+
+    candles = pd.DataFrame({
+        'timestamp': buckets[group_starts],
+        'first_timestamp': timestamps[group_starts],
+        'last_timestamp': timestamps[group_ends],
+        'first_fraction_price': fractions[group_starts],
+        'last_fraction_price': fractions[group_ends],
+        'first_price': prices[group_starts],
+        'last_price': prices[group_ends],
+        'min_price': np.minimum.reduceat(prices, group_starts),
+        'max_price': np.maximum.reduceat(prices, group_starts),
+        'mean_price': np.round(np.add.reduceat(prices, group_starts)/rows, 4),
+        'rows': rows
+    })
+    candles.index.names = ['index']
+    return candles
+
+def build_candles_chunks(chunks, resolution):
+    """
+    Same as build_candles but for data that is too big to fit in memory.
+    Takes any iterable of dataframes, eg pd.read_csv(path, chunksize=1000000).
+    The last hour/day of each chunk may carry on in the next chunk, so it is held back until the next chunk is read.
+    """
+    check_resolution(resolution)
+    seconds = TIER_SECONDS[resolution]
+    all_candles = []
+    carry = None
+    for chunk in chunks:
+        chunk = chunk[['timestamp', 'fraction_price', 'decimal_price']]
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+        # Hold back every row in the same bucket as the last row
+        last_bucket = int(chunk['timestamp'].iloc[-1])//seconds*seconds
+        is_complete = chunk['timestamp'] < last_bucket
+        if is_complete.any():
+            all_candles.append(build_candles(chunk.loc[is_complete], resolution))
+        carry = chunk.loc[~is_complete]
+    if carry is not None and not carry.empty:
+        all_candles.append(build_candles(carry, resolution))
+    if not all_candles:
+        return pd.DataFrame(columns=CANDLE_COLUMNS)
+    candles = pd.concat(all_candles, ignore_index=True)
+    candles.index.names = ['index']
+    return candles
+
+def read_candles(path):
+    """Read a saved tier, keeping fraction prices as 'a/b' strings."""
+    return pd.read_csv(
+        path,
+        index_col='index',
+        dtype={'first_fraction_price': str, 'last_fraction_price': str}
+    )
+
+def decision_frame(candles):
+    """
+    Turn candles into price data that a Strategy can run on.
+    There is one row for the first minute of every hour/day, using that minute's time and price.
+    If the last candle has more than one minute, its last minute is added as a final row
+    so the run still ends at the same time and price as the minute data.
+    """
+    frame = pd.DataFrame({
+        'timestamp': candles['first_timestamp'].to_numpy(dtype=np.int64),
+        'fraction_price': candles['first_fraction_price'].to_numpy(),
+        'decimal_price': candles['first_price'].to_numpy(dtype=float)
+    })
+    if not candles.empty and candles['last_timestamp'].iloc[-1] != candles['first_timestamp'].iloc[-1]:
+        frame = pd.concat([frame, pd.DataFrame({
+            'timestamp': [int(candles['last_timestamp'].iloc[-1])],
+            'fraction_price': [candles['last_fraction_price'].iloc[-1]],
+            'decimal_price': [float(candles['last_price'].iloc[-1])]
+        })], ignore_index=True)
+    frame.index.names = ['index']
+    return frame
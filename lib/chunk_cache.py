@@ -0,0 +1,134 @@
+"""
+On disk cache for price data downloaded from exchange APIs.
+Every downloaded window of data is saved as its own chunk file and then written to a journal.
+If a download errors out part of the way through, re-running it will skip every window in the journal.
+"""
+import os
+import json
+import time
+
+def chunk_cache_path(file_name=''):
+    """Path to the downloaded chunk files and their journal."""
+    return f'csv_files\\chunk_cache\\{file_name}'
+
+def split_windows(start, end, window_size, align=False):
+    """
+    Split the time between start and end into (window_start, window_end) pairs.
+    Every window is window_size long except for the last one, which stops at end.
+    If align is True the first window starts at the multiple of window_size at or before start (eg the UTC day),
+    so the windows are the same no matter where in a window we start.
+    """
+    windows = []
+    window_start = start-start % window_size if align else start
+    while window_start < end:
+        window_end = min(window_start+window_size, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+class ChunkCache:
+    """
+    Chunk cache for one exchange, trading pair and granularity.
+    Chunks are keyed by (exchange, pair, granularity, window start) and window times are in seconds.
+    A chunk is only reused for a window that ends at or before the window end it was downloaded for.
+    """
+    def __init__(self, exchange, pair, granularity, cache_dir=''):
+        self.exchange = exchange
+        self.pair = pair
+        self.granularity = granularity
+        # Use the default folder unless we are given one (used by tests)
+        if cache_dir == '':
+            cache_dir = chunk_cache_path()
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # All exchanges share a single journal
+        self.journal_path = os.path.join(self.cache_dir, 'journal.csv')
+        # Number of times we had to go to the API, aka windows that were not cached
+        self.network_calls = 0
+        # Window start: furthest window end downloaded for it
+        self.completed_windows = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding='utf-8') as journal:
+                for line in journal:
+                    values = line.strip().split(',')
+                    # Skip the header and any line cut off by a crash while it was being written
+                    if len(values) != 6 or values[0] == 'exchange':
+                        continue
+                    exchange, pair, granularity, window_start, window_end = values[:5]
+                    if (exchange, pair, granularity) == (self.exchange, self.pair, str(self.granularity)):
+                        self.add_window(int(window_start), int(window_end))
+
+    def add_window(self, window_start, window_end):
+        """Record a downloaded window, keeping the furthest end if a window start was downloaded more than once."""
+        self.completed_windows[window_start] = max(window_end, self.completed_windows.get(window_start, window_end))
+
+    def chunk_path(self, window_start):
+        """Path to the chunk file for a given window start."""
+        file_name = f'{self.exchange}_{self.pair}_{self.granularity}_{int(window_start)}.json'
+        return os.path.join(self.cache_dir, file_name)
+
+    def has(self, window_start, window_end=None):
+        """
+        Returns True if the window has already been downloaded.
+        If window_end is given, the downloaded chunk also has to reach it (eg not a cut short last window).
+        """
+        if int(window_start) not in self.completed_windows:
+            return False
+        return window_end is None or self.completed_windows[int(window_start)] >= int(window_end)
+
+    def load(self, window_start):
+        """Returns the rows saved for a downloaded window."""
+        with open(self.chunk_path(window_start), encoding='utf-8') as chunk:
+            return json.load(chunk)
+
+    def save(self, window_start, window_end, rows):
+        """
+        Save the rows for a window and then record the window in the journal.
+        The chunk file is fully written before the journal is updated,
+        so a window in the journal always has a complete chunk file.
+        """
+        path = self.chunk_path(window_start)
+        # Write to a temporary file first so a crash can't leave a half written chunk
+        with open(path+'.tmp', 'w', encoding='utf-8') as chunk:
+            json.dump(rows, chunk)
+        os.replace(path+'.tmp', path)
+
+        new_journal = not os.path.exists(self.journal_path)
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            if new_journal:
+                journal.write('exchange,pair,granularity,window_start,window_end,rows\n')
+            journal.write(
+                f'{self.exchange},{self.pair},{self.granularity},{int(window_start)},{int(window_end)},{len(rows)}\n'
+            )
+            journal.flush()
+            os.fsync(journal.fileno())
+        self.add_window(int(window_start), int(window_end))
+
+    def fetch(self, window_start, window_end, fetch_window):
+        """
+        Returns the rows for a window, only calling fetch_window(window_start, window_end) if it isn't cached.
+        Windows that end in the future are still getting new data so they are never cached.
+        """
+        if self.has(window_start, window_end):
+            return self.load(window_start)
+        rows = fetch_window(window_start, window_end)
+        self.network_calls += 1
+        if window_end <= time.time():
+            self.save(window_start, window_end, rows)
+        return rows
+
+    def fetch_value(self, name, fetch):
+        """
+        Returns a value that never changes (eg the earliest timestamp with data), only calling fetch() the first time.
+        The value is saved as json next to the chunks.
+        """
+        path = os.path.join(self.cache_dir, f'{self.exchange}_{self.pair}_{self.granularity}_{name}.json')
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as value_file:
+                return json.load(value_file)
+        value = fetch()
+        self.network_calls += 1
+        with open(path+'.tmp', 'w', encoding='utf-8') as value_file:
+            json.dump(value, value_file)
+        os.replace(path+'.tmp', path)
+        return value
@@ -0,0 +1,179 @@
+"""
+Data quality checks for price data.
+Finds timestamp gaps, duplicate timestamps, timestamps that go backwards
+and big price jumps over several time horizons in one vectorized pass.
+Large files can be checked a chunk at a time with check_data_quality_chunks.
+"""
+import numpy as np
+import pandas as pd
+
+class DataQualityReport:
+    """
+    Compact summary of the data quality checks.
+    gaps: first missing timestamp and how many timestamps are missing for each gap
+    duplicate_timestamps: timestamps that show up more than once in a row
+    non_monotonic: rows where the timestamp is smaller than the one before it
+    jumps: for each horizon (in seconds), rows where the price moved by jump_threshold or more
+    """
+    def __init__(self, rows, interval, jump_threshold, gaps, duplicate_timestamps, non_monotonic, jumps):
+        self.rows = rows
+        self.interval = interval
+        self.jump_threshold = jump_threshold
+        self.gaps = gaps
+        self.duplicate_timestamps = duplicate_timestamps
+        self.non_monotonic = non_monotonic
+        self.jumps = jumps
+
+    def missing_timestamps(self):
+        """Total number of missing timestamps across all gaps."""
+        return int(self.gaps['length'].sum())
+
+    def summary(self):
+        """Returns the counts for each check as a dictionary."""
+        summary = {
+            'Rows': self.rows,
+            'Gaps': len(self.gaps.index),
+            'Missing Timestamps': self.missing_timestamps(),
+            'Duplicate Timestamps': len(self.duplicate_timestamps),
+            'Non-monotonic Rows': len(self.non_monotonic.index)
+        }
+        for horizon, jumps in self.jumps.items():
+            summary[f'Jumps over {horizon} seconds'] = len(jumps.index)
+        return summary
+
+    def to_string(self, max_rows=10):
+        """Summary counts followed by up to max_rows of the worst issues for each check."""
+        lines = [f'{key}: {value}' for key, value in self.summary().items()]
+        if not self.gaps.empty:
+            lines.append(f'Largest gaps:\n{self.gaps.nlargest(max_rows, "length").to_string(index=False)}')
+        if len(self.duplicate_timestamps) > 0:
+            lines.append(f'Duplicate timestamps:\n{self.duplicate_timestamps[:max_rows]}')
+        if not self.non_monotonic.empty:
+            lines.append(f'Non-monotonic rows:\n{self.non_monotonic.head(max_rows).to_string(index=False)}')
+        for horizon, jumps in self.jumps.items():
+            if not jumps.empty:
+                lines.append(
+                    f'Biggest {self.jump_threshold*100}% jumps over {horizon} seconds:\n'
+                    f'{jumps.loc[(jumps["multiplier"]-1).abs().nlargest(max_rows).index].to_string(index=False)}'
+                )
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.to_string()
+
+def find_issues(timestamps, prices, interval, jump_threshold, horizons, first_new_row=0, row_offset=0):
+    """
+    Find every issue in a block of rows using np.diff and np.searchsorted.
+    Rows before first_new_row were already checked (they are carried over from the last chunk),
+    so only issues that end on a new row are returned.
+    Price jumps assume timestamps are increasing, check non_monotonic first.
+    """
+    steps = np.diff(timestamps)
+    # Step k goes from row k to row k+1, only keep steps that end on a new row
+    new_steps = np.arange(len(steps))+1 >= first_new_row
+    gap_rows = np.flatnonzero((steps > interval) & new_steps)
+    gaps = pd.DataFrame({
+        'start': timestamps[gap_rows]+interval,
+        # ceil so that off grid timestamps (eg 56 seconds after the last one) still count as missing
+        'length': -(-steps[gap_rows]//interval)-1
+    })
+    duplicate_timestamps = timestamps[np.flatnonzero((steps == 0) & new_steps)+1]
+    backwards_rows = np.flatnonzero((steps < 0) & new_steps)
+    non_monotonic = pd.DataFrame({
+        'index': backwards_rows+1+row_offset,
+        'timestamp': timestamps[backwards_rows+1],
+        'previous_timestamp': timestamps[backwards_rows]
+    })
+
+    jumps = {}
+    for horizon in horizons:
+        # Find the row exactly horizon seconds later, if there is one
+        future_rows = np.searchsorted(timestamps, timestamps+horizon)
+        has_future = future_rows < len(timestamps)
+        has_future[has_future] = timestamps[future_rows[has_future]] == timestamps[has_future]+horizon
+        # Only keep jumps that end on a new row
+        has_future &= future_rows >= first_new_row
+        start_rows = np.flatnonzero(has_future)
+        future_prices = prices[future_rows[start_rows]]
+        start_prices = prices[start_rows]
+        is_jump = (
+            (future_prices >= start_prices*(1+jump_threshold)) |
+            (future_prices <= start_prices*(1-jump_threshold))
+        )
+        start_rows = start_rows[is_jump]
+        jumps[horizon] = pd.DataFrame({
+            'index': start_rows+row_offset,
+            'timestamp': timestamps[start_rows],
+            'price': start_prices[is_jump],
+            'future_price': future_prices[is_jump],
+            # Show how big the jump is (aka price*multiplier=future_price)
+            'multiplier': np.round(future_prices[is_jump]/start_prices[is_jump], 2)
+        })
+    return gaps, duplicate_timestamps, non_monotonic, jumps
+
+def get_prices(df, price_column):
+    """Returns the price column as floats, or NaNs if the dataframe has no price column."""
+    if price_column in df:
+        return df[price_column].to_numpy(dtype=float)
+    return np.full(len(df.index), np.nan)
+
+def check_data_quality(df, interval=60, jump_threshold=.1, horizons=(60, 300, 3600), price_column='decimal_price'):
+    """
+    Check a price dataframe for gaps, duplicate timestamps, timestamps that go backwards and price jumps.
+    A jump is a move of jump_threshold or more (.1 = 10%) between a row and the row horizon seconds later.
+    Returns a DataQualityReport.
+    """
+    timestamps = df['timestamp'].to_numpy(dtype=np.int64)
+    gaps, duplicate_timestamps, non_monotonic, jumps = find_issues(
+        timestamps, get_prices(df, price_column), interval, jump_threshold, horizons
+    )
+    return DataQualityReport(
+        len(timestamps), interval, jump_threshold, gaps, duplicate_timestamps, non_monotonic, jumps
+    )
+
+def check_data_quality_chunks(chunks, interval=60, jump_threshold=.1, horizons=(60, 300, 3600),
+                              price_column='decimal_price'):
+    """
+    Same as check_data_quality but for data that is too big to fit in memory.
+    Takes any iterable of dataframes, eg pd.read_csv(path, chunksize=1000000).
+    The last max(horizons) seconds of each chunk are carried over so nothing at the edges is missed.
+    """
+    all_gaps, all_duplicates, all_non_monotonic = [], [], []
+    all_jumps = {horizon: [] for horizon in horizons}
+    carry_timestamps = np.array([], dtype=np.int64)
+    carry_prices = np.array([], dtype=float)
+    rows = 0
+    for chunk in chunks:
+        timestamps = np.concatenate([carry_timestamps, chunk['timestamp'].to_numpy(dtype=np.int64)])
+        prices = np.concatenate([carry_prices, get_prices(chunk, price_column)])
+        # Row numbers are relative to the start of the carried over rows
+        row_offset = rows-len(carry_timestamps)
+        gaps, duplicate_timestamps, non_monotonic, jumps = find_issues(
+            timestamps, prices, interval, jump_threshold, horizons,
+            first_new_row=len(carry_timestamps), row_offset=row_offset
+        )
+        all_gaps.append(gaps)
+        all_duplicates.append(duplicate_timestamps)
+        all_non_monotonic.append(non_monotonic)
+        for horizon in horizons:
+            all_jumps[horizon].append(jumps[horizon])
+        rows += len(chunk.index)
+
+        # Keep enough rows to check jumps and gaps that end in the next chunk
+        keep_from = np.searchsorted(timestamps, timestamps[-1]-max(horizons))
+        # Always keep at least the last row so the step into the next chunk is checked
+        keep_from = min(keep_from, len(timestamps)-1)
+        carry_timestamps = timestamps[keep_from:]
+        carry_prices = prices[keep_from:]
+
+    if rows == 0:
+        return check_data_quality(pd.DataFrame({'timestamp': []}), interval, jump_threshold, horizons, price_column)
+    return DataQualityReport(
+        rows,
+        interval,
+        jump_threshold,
+        pd.concat(all_gaps, ignore_index=True),
+        np.concatenate(all_duplicates),
+        pd.concat(all_non_monotonic, ignore_index=True),
+        {horizon: pd.concat(jumps, ignore_index=True) for horizon, jumps in all_jumps.items()}
+    )
@@ -0,0 +1,126 @@
+"""
+Execution timing study for DCA.
+base_dca buys at exact multiples of time_between_action from the start of the price period, so comparing intervals
+(eg every 1 day vs every 28 days) might only show which one happened to land on good prices.
+Here each interval is run thousands of times with a random phase (when the first buy happens) and optional random
+jitter on every buy, all over the same price array, to get the distribution of outcomes for each interval.
+Samples are worked out in batches so memory use stays under max_batch_bytes.
+"""
+import numpy as np
+import pandas as pd
+import lib.rolling_analysis as ra
+
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+
+def buy_price_sums(inverse_buy_prices, phases, time_between_action, number_of_buys, jitters, step_seconds=60):
+    """
+    Sum of 1/price over every buy for each sample.
+    Buy k of a sample happens phase+k*time_between_action (+ its jitter) seconds after the start, at the first grid
+    price at or after that time. jitters is (samples, number_of_buys) seconds, or None for no jitter.
+    """
+    last_row = len(inverse_buy_prices)-1
+    if jitters is None and time_between_action % step_seconds == 0:
+        # Without jitter every buy is a fixed number of rows apart, so strided prefix sums give each sum at once
+        buy_steps = time_between_action//step_seconds
+        first_rows = np.minimum(np.ceil(phases/step_seconds).astype(np.int64), last_row)
+        last_rows = first_rows+(number_of_buys-1)*buy_steps
+        if np.all(last_rows <= last_row):
+            sums = ra.strided_prefix_sums(inverse_buy_prices, buy_steps)
+            before_first = first_rows-buy_steps
+            return sums[last_rows]-np.where(before_first >= 0, sums[np.maximum(before_first, 0)], 0)
+    buy_times = phases[:, np.newaxis]+time_between_action*np.arange(number_of_buys)
+    if jitters is not None:
+        buy_times = buy_times+jitters
+    # Buys can't happen before the start or after the end of the price period
+    buy_rows = np.clip(np.ceil(buy_times/step_seconds), 0, last_row).astype(np.int64)
+    return inverse_buy_prices[buy_rows].sum(axis=1)
+
+def timing_outcomes(price_df, time_between_action, n_samples=1000, max_jitter=0, seed=None, starting_usd=10000,
+                    initial_buy_percent=.3, trading_fee=.997, step_seconds=60, max_batch_bytes=256*1024**2,
+                    phases=None):
+    """
+    Outcome of base_dca for n_samples random timings.
+    Each sample picks a phase between 0 and time_between_action for its DCA buys (time_between_action is the phase
+    base_dca uses) and moves every buy by up to max_jitter seconds either way.
+    Give phases (seconds) to use them instead of random ones, one sample each.
+    The initial buy always happens at the start and the number of buys is the same as base_dca.
+    Every sample gets its own seed from seed, so the same seed always gives the same results no matter the batch size.
+    Returns a dataframe with a row per sample.
+    """
+    grid, buy_prices, value_prices = ra.grid_prices(price_df, step_seconds)
+    total_time = grid[-1]-grid[0]
+    # Same number of buys as base_dca, rounded down
+    number_of_buys = int(total_time/time_between_action)
+    if number_of_buys == 0:
+        raise ValueError(f'Price_period not long enough for dca period of {time_between_action} seconds')
+    inverse_buy_prices = 1/buy_prices
+    initial_usd = starting_usd*initial_buy_percent
+    dca_buy_amount = (starting_usd-initial_usd)/number_of_buys
+
+    # Each sample needs its buy times and rows while it is worked out
+    bytes_per_sample = 3*8*number_of_buys if max_jitter else 8
+    batch_size = max(1, max_batch_bytes//bytes_per_sample)
+    random_phases = phases is None
+    if not random_phases:
+        phases = np.asarray(phases, dtype=float)
+        n_samples = len(phases)
+    else:
+        phases = np.empty(n_samples)
+    seeds = np.random.SeedSequence(seed).spawn(n_samples)
+    price_sums = np.empty(n_samples)
+    for batch_start in range(0, n_samples, batch_size):
+        rngs = [np.random.default_rng(sample_seed) for sample_seed in seeds[batch_start:batch_start+batch_size]]
+        batch = slice(batch_start, batch_start+len(rngs))
+        # Phases from just after the start up to time_between_action
+        if random_phases:
+            phases[batch] = [time_between_action*(1-rng.random()) for rng in rngs]
+        jitters = None
+        if max_jitter:
+            jitters = np.stack([rng.uniform(-max_jitter, max_jitter, number_of_buys) for rng in rngs])
+        price_sums[batch] = buy_price_sums(
+            inverse_buy_prices, phases[batch], time_between_action, number_of_buys, jitters, step_seconds
+        )
+
+    # The fee is taken out of the ETH we get
+    eth = trading_fee*(initial_usd/buy_prices[0]+dca_buy_amount*price_sums)
+    total_value = eth*value_prices[-1]
+    years = total_time/SECONDS_IN_YEAR
+    outcomes = pd.DataFrame({
+        'phase': phases,
+        'ETH': eth,
+        'Total Value': total_value,
+        'Final Annual % Return': ((total_value*100/starting_usd)-100)/years
+    })
+    outcomes.index.names = ['sample']
+    return outcomes
+
+def timing_summary(price_df, times_between_action, n_samples=1000, jitter_fraction=0, seed=None, **options):
+    """
+    Distribution of Final Annual % Return over random timings for each time between action.
+    Buys are moved by up to jitter_fraction*time_between_action seconds either way.
+    'Exact' is base_dca's timing. options are passed to timing_outcomes.
+    Returns a dataframe with a row per time between action.
+    """
+    rows = []
+    for time_between_action in times_between_action:
+        outcomes = timing_outcomes(
+            price_df, time_between_action, n_samples, jitter_fraction*time_between_action, seed, **options
+        )['Final Annual % Return']
+        # base_dca's timing, the phase set to time_between_action without jitter
+        exact = timing_outcomes(price_df, time_between_action, phases=[time_between_action], **options)
+        exact = exact['Final Annual % Return'].iloc[0]
+        rows.append({
+            'Time Between Action': time_between_action,
+            'Exact': exact,
+            'Mean': outcomes.mean(),
+            'Std': outcomes.std(),
+            'Min': outcomes.min(),
+            '5%': outcomes.quantile(.05),
+            'Median': outcomes.median(),
+            '95%': outcomes.quantile(.95),
+            'Max': outcomes.max(),
+            # Where base_dca's timing falls in the distribution
+            'Exact Percentile': (outcomes < exact).mean()*100
+        })
+    return pd.DataFrame(rows).set_index('Time Between Action')
@@ -0,0 +1,114 @@
+"""
+Exact prices stored as numerator and denominator arrays.
+The fraction_price column is read in as 'a/b' strings, parsing them once here means
+strategies can get an exact price with an array lookup instead of parsing a string every step.
+"""
+from fractions import Fraction as frac
+import numpy as np
+import pandas as pd
+
+# Numbers with up to 18 digits always fit in an int64
+MAX_DIGITS = 18
+# Largest int that a float64 can hold exactly
+MAX_EXACT_FLOAT = 2**53
+
+def parse_fraction_strings(fractions):
+    """
+    Vectorized parser for 'a/b' (or 'a') strings.
+    Returns numerator and denominator int64 arrays and a mask of the rows that parsed.
+    Rows that aren't plain 'a/b' text, or have more than 18 digits in a part, are left for parse_fractions to handle.
+    """
+    # Turn the strings into a 2d array of characters (as ascii codes), padded on the right with 0s
+    text = np.array(fractions, dtype=bytes)
+    chars = text.view(np.uint8).reshape(len(text), text.dtype.itemsize)
+    lengths = np.count_nonzero(chars, axis=1)
+
+    is_slash = chars == ord('/')
+    has_slash = is_slash.any(axis=1)
+    # Strings without a slash are whole numbers, so the numerator is the whole string
+    slash_at = np.where(has_slash, is_slash.argmax(axis=1), lengths)
+    is_negative = chars[:, 0] == ord('-')
+    numerator_start = is_negative.astype(np.int64)
+
+    # Read the digits left to right, one column of characters at a time
+    numerators = np.zeros(len(text), dtype=np.int64)
+    denominators = np.zeros(len(text), dtype=np.int64)
+    bad_character = np.zeros(len(text), dtype=bool)
+    for column in range(chars.shape[1]):
+        digits = chars[:, column].astype(np.int64)-ord('0')
+        in_numerator = (column >= numerator_start) & (column < slash_at)
+        in_denominator = (column > slash_at) & (column < lengths)
+        bad_character |= (in_numerator | in_denominator) & ((digits < 0) | (digits > 9))
+        numerators = np.where(in_numerator, numerators*10+digits, numerators)
+        denominators = np.where(in_denominator, denominators*10+digits, denominators)
+    numerators = np.where(is_negative, -numerators, numerators)
+    denominators = np.where(has_slash, denominators, 1)
+
+    numerator_digits = slash_at-numerator_start
+    denominator_digits = np.where(has_slash, lengths-slash_at-1, 1)
+    parsed = (
+        ~bad_character &
+        (numerator_digits >= 1) & (numerator_digits <= MAX_DIGITS) &
+        (denominator_digits >= 1) & (denominator_digits <= MAX_DIGITS) &
+        # Only one slash is allowed
+        (np.count_nonzero(is_slash, axis=1) <= 1) &
+        # Dividing by zero isn't a price, let Fraction raise the error
+        (denominators != 0)
+    )
+    return numerators, denominators, parsed
+
+def parse_fractions(fractions, block_size=100000):
+    """
+    Parse a column of exact prices into numerator and denominator arrays.
+    Takes 'a/b' strings (as read from a csv) or Fraction objects.
+    Arrays are int64, unless a value is too big for an int64, then they hold python ints.
+    Fractions are not reduced, so '25/10' stays 25 and 10. Use fraction_at to get the Fraction back.
+    """
+    values = np.asarray(fractions, dtype=object)
+    numerators = np.zeros(len(values), dtype=np.int64)
+    denominators = np.ones(len(values), dtype=np.int64)
+    parsed = np.zeros(len(values), dtype=bool)
+    if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        # Go a block at a time so the character arrays stay small
+        for start in range(0, len(values), block_size):
+            block = values[start:start+block_size]
+            try:
+                block_numerators, block_denominators, block_parsed = parse_fraction_strings(block)
+            except UnicodeEncodeError:
+                # Not plain text, leave the whole block for the slow path
+                continue
+            numerators[start:start+block_size] = block_numerators
+            denominators[start:start+block_size] = block_denominators
+            parsed[start:start+block_size] = block_parsed
+
+    # Anything the vectorized parser couldn't handle (Fraction objects, big numbers, odd formats) goes through Fraction
+    slow_rows = np.flatnonzero(~parsed)
+    if len(slow_rows) > 0:
+        slow_fractions = [frac(value) for value in values[slow_rows]]
+        slow_numerators = [value.numerator for value in slow_fractions]
+        slow_denominators = [value.denominator for value in slow_fractions]
+        int64_limit = np.iinfo(np.int64).max
+        if max(max(abs(value) for value in slow_numerators), max(slow_denominators)) > int64_limit:
+            # Too big for int64, fall back to python ints so nothing overflows
+            numerators = numerators.astype(object)
+            denominators = denominators.astype(object)
+        numerators[slow_rows] = slow_numerators
+        denominators[slow_rows] = slow_denominators
+    return numerators, denominators
+
+def fraction_at(numerators, denominators, index):
+    """Exact price at a row as a Fraction."""
+    return frac(int(numerators[index]), int(denominators[index]))
+
+def to_floats(numerators, denominators):
+    """
+    Prices as floats, the same as float(Fraction) would give.
+    Numbers too big to be exact floats are divided as python ints so they are still rounded correctly.
+    """
+    if numerators.dtype == object:
+        return np.array([int(numerator)/int(denominator) for numerator, denominator in zip(numerators, denominators)])
+    floats = numerators/denominators
+    inexact_rows = np.flatnonzero((np.abs(numerators) > MAX_EXACT_FLOAT) | (denominators > MAX_EXACT_FLOAT))
+    for row in inexact_rows:
+        floats[row] = int(numerators[row])/int(denominators[row])
+    return floats
@@ -6,8 +6,13 @@ import pandas as pd
 from binance import AsyncClient, Client
 import lib.api_data as api # for Binance data
 from fractions import Fraction as frac
+from lib.chunk_cache import ChunkCache, split_windows
 
-def get_binance_data(TRADING_PAIR='ETHUSDT', start_date='', end_date=''):
+def get_binance_data(TRADING_PAIR='ETHUSDT', start_date='', end_date='', use_cache=True):
+    """
+    Get 1 minute klines from the Binance API.
+    Downloaded days are saved to the chunk cache so a failed or repeated query can skip them.
+    """
     # If we get a date, turn it to a timestamp, otherwise just continue
     if start_date != '' and not isinstance(start_date, int):
         start_date = int(time.mktime(datetime.datetime.strptime(start_date, "%Y-%m-%d-%H-%M-%S").timetuple()))
@@ -18,33 +23,55 @@ def get_binance_data(TRADING_PAIR='ETHUSDT', start_date='', end_date=''):
         # Then multiply by 1000 to match the format binance expects
         end_date = end_date*1000
 
-    # Initialise the client
-    # NOTE: You will have to supply your OWN api keys to use this
-    client = Client(api.get_api_key(), api.get_secret())
+    # The client is only created when we have to go to the API as creating it pings Binance
+    client = None
+    cache = ChunkCache('binance', TRADING_PAIR, 60) if use_cache else None
+
+    def get_client():
+        """Create the client the first time we need it."""
+        nonlocal client
+        if client is None:
+            # Initialise the client
+            # NOTE: You will have to supply your OWN api keys to use this
+            client = Client(api.get_api_key(), api.get_secret())
+        return client
 
     if start_date == '':
-        # get timestamp of earliest date data is available
-        start_date = client._get_earliest_valid_timestamp(TRADING_PAIR, AsyncClient.KLINE_INTERVAL_1MINUTE)
+        def fetch_earliest():
+            """Get timestamp of earliest date data is available"""
+            return int(get_client()._get_earliest_valid_timestamp(TRADING_PAIR, AsyncClient.KLINE_INTERVAL_1MINUTE))
+        # The earliest timestamp never changes, so it is cached with the chunks
+        start_date = cache.fetch_value('earliest_timestamp', fetch_earliest) if use_cache else fetch_earliest()
         print(f'Earliest timestamp found: {int(start_date)/1000}')
         print(f'Human readable format: {time.ctime(int(start_date)/1000)}')
 
     # if we don't have an end_date, go until current time
     if end_date == '':
-        # Get data from the beginning of the Binance data to now
-        klines = client.get_historical_klines(
-            TRADING_PAIR,
-            AsyncClient.KLINE_INTERVAL_1MINUTE,
-            start_date
-        )
-    else:
-        # Get data between two specific times
-        klines = client.get_historical_klines(
+        end_date = int(time.time())*1000
+
+    def fetch_window(window_start, window_end):
+        """Get the klines for one window, window times are in seconds."""
+        # Binance expects milliseconds and includes the end time, so stop right before the next window
+        return get_client().get_historical_klines(
             TRADING_PAIR,
             AsyncClient.KLINE_INTERVAL_1MINUTE,
-            start_str=start_date,
-            end_str=end_date
+            start_str=window_start*1000,
+            end_str=window_end*1000-1
         )
 
+    # Get the data one UTC day at a time so a failed query can pick up where it left off.
+    # Days are aligned so the same day is the same chunk whatever start_date is,
+    # the last day is cut short at end_date and only reused by queries that end at or before it.
+    klines = []
+    windows = split_windows(int(start_date)//1000, int(end_date)//1000+1, 60*60*24, align=True)
+    for window_start, window_end in windows:
+        if use_cache:
+            klines += cache.fetch(window_start, window_end, fetch_window)
+        else:
+            klines += fetch_window(window_start, window_end)
+    # The first day starts before start_date, only keep the klines we asked for
+    klines = [kline for kline in klines if int(start_date) <= kline[0] <= int(end_date)]
+
     # Turn the list of lists into a dataframe
     df_klines = pd.DataFrame(klines)
     # Make fraction_price column
@@ -2,6 +2,7 @@
 # imports
 from fractions import Fraction as frac
 from lib.HistoricalData import HistoricalData # for CoinBase Pro
+from lib.chunk_cache import ChunkCache
 
 # HistoricalData() info:
 # ticker | supply the ticker information which you want to return (str). 
@@ -9,11 +10,17 @@ from lib.HistoricalData import HistoricalData # for CoinBase Pro
 # start_date | a string in the format YYYY-MM-DD-HH-MM (str).
 # end_date | a string in the format YYYY-MM-DD-HH-MM (str). Optional, Default: Now
 # verbose | printing during extraction. Default: True
+# cache | ChunkCache used to skip chunks that were already downloaded. Default: None
 
-def get_coinbase_data(start_date, end_date=''):
-    """Get data from CoinBase Pro API"""
+def get_coinbase_data(start_date, end_date='', use_cache=True):
+    """
+    Get data from CoinBase Pro API
+    Downloaded chunks are saved to the chunk cache so a failed or repeated query can skip them.
+    """
     # how many seconds between data points
     trade_interval = 60
+    # Resume from (or reuse) any chunks we already downloaded
+    cache = ChunkCache('coinbase', 'ETH-USD', trade_interval) if use_cache else None
     if end_date == '':
         # Returns data as a dataframe
         coinbase_data = HistoricalData(
@@ -21,7 +28,8 @@ def get_coinbase_data(start_date, end_date=''):
             trade_interval,
             start_date=start_date,
             # end_date='2019-01-6-00-00', # Comment out to use current time as end
-            verbose=False
+            verbose=False,
+            cache=cache
         ).retrieve_data()
     else:
         # Returns data as a dataframe
@@ -30,7 +38,8 @@ def get_coinbase_data(start_date, end_date=''):
             trade_interval,
             start_date=start_date,
             end_date=end_date, # Comment out to use current time as end
-            verbose=False
+            verbose=False,
+            cache=cache
         ).retrieve_data()
 
     # make time no longer the index and rename it
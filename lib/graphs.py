@@ -0,0 +1,148 @@
+"""
+Batch rendering of the result graphs made in create_plots.ipynb.
+Each figure is described by a spec (a dictionary, see history_spec and bar_spec), rendered in a process pool with
+matplotlib's non-interactive Agg backend and saved to the graphs folder (see bs.graph_path).
+Figures whose inputs haven't changed since they were last rendered are skipped.
+"""
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import lib.base_strategy as bs
+import lib.plot_data as pdata
+
+GRAPH_FOLDER = bs.graph_path()
+# Saved input signatures of the rendered figures, used to skip figures that haven't changed
+SIGNATURES_FILE = 'render_signatures.json'
+# Used to differentiate columns of data
+COLOR_LIST = ['tab:red', 'tab:green', 'tab:blue', 'tab:orange', 'tab:purple', 'tab:brown', 'tab:pink', 'tab:olive', 'tab:cyan']
+
+def history_spec(strategy, price_period, points=2000, returns_history_folder=None, plot_cache_dir=''):
+    """
+    Figure of ETH price and total value vs time for a strategy and price period.
+    Lines are cut down to points points (see lib/plot_data.py).
+    The returns history is read from bs.returns_history_path unless returns_history_folder is given.
+    """
+    file_name = f'{strategy}_{price_period}_returns_history.csv'
+    if returns_history_folder is None:
+        history_file = bs.returns_history_path(file_name)
+    else:
+        history_file = os.path.join(returns_history_folder, file_name)
+    return {
+        'kind': 'history',
+        'title': f'Price and Total Value vs Time for {strategy} and {price_period}',
+        'file': history_file,
+        'points': points,
+        'plot_cache_dir': plot_cache_dir
+    }
+
+def bar_spec(strategies, price_period, variable, results_file=None):
+    """
+    Bar graph of a variable from Overall_Results for each strategy in a price period.
+    Overall_Results is read from bs.results_path unless results_file is given.
+    """
+    if results_file is None:
+        results_file = bs.results_path('Overall_Results')
+    return {
+        'kind': 'bar',
+        'title': f'{variable} for Strategies for {price_period}',
+        'file': results_file,
+        'strategies': list(strategies),
+        'price_period': price_period,
+        'variable': variable
+    }
+
+def figure_path(spec, graph_folder=GRAPH_FOLDER):
+    """Where a figure is saved."""
+    # Get rid of troublesome title characters
+    title = spec['title'].replace(',', '').replace('"', '')
+    return os.path.join(graph_folder, f'{title}.png')
+
+def bar_data(spec, results_df=None):
+    """Values of the bar graph, in the order of the strategies."""
+    if results_df is None:
+        results_df = pd.read_csv(spec['file'])
+    period_df = results_df.loc[results_df['Price_Period'] == spec['price_period']].set_index('Strategy')
+    # Use astype float due to Sortino values being strings (because of NA values)
+    return pd.to_numeric(period_df[spec['variable']], errors='coerce').reindex(spec['strategies']).astype(float)
+
+def figure_signature(spec, results_df=None):
+    """
+    Hash of everything a figure depends on.
+    Bar graphs only depend on their rows of Overall_Results, which changes whenever any strategy is run.
+    History graphs depend on the whole returns history file, so use its size and modified time.
+    """
+    if spec['kind'] == 'bar':
+        inputs = bar_data(spec, results_df).to_json()
+    else:
+        file_stats = os.stat(spec['file'])
+        inputs = (file_stats.st_size, file_stats.st_mtime_ns)
+    return hashlib.sha1(repr((sorted(spec.items()), inputs)).encode()).hexdigest()
+
+def render(spec, graph_folder=GRAPH_FOLDER):
+    """Draw a figure and save it, runs in a worker process."""
+    # Agg doesn't need a display, and has to be picked before pyplot is imported
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    if spec['kind'] == 'history':
+        price_data = pdata.plot_series(spec['file'], 'price', spec['points'], cache_dir=spec['plot_cache_dir'])
+        value_data = pdata.plot_series(spec['file'], 'Total Value', spec['points'], cache_dir=spec['plot_cache_dir'])
+        fig, ax = plt.subplots(figsize=(20, 6))
+        plot1, = ax.plot(pd.to_datetime(price_data['timestamp'], unit='s'), price_data['price'], color='steelblue')
+        ax2 = ax.twinx()
+        plot2, = ax2.plot(pd.to_datetime(value_data['timestamp'], unit='s'), value_data['Total Value'], color='red')
+        plt.legend([plot1, plot2], ['Price (left)', 'Total_value (right)'])
+        plt.title(spec['title'])
+    else:
+        values = bar_data(spec)
+        fig = plt.figure(figsize=(20, 6))
+        bars = plt.bar(x=spec['strategies'], height=values, width=0.4, edgecolor='black',
+                       color=[COLOR_LIST[position % len(COLOR_LIST)] for position in range(len(values))])
+        plt.bar_label(bars, fmt='%.3g', size=16)
+        # Move title upwards by 1.05
+        plt.title(spec['title'], y=1.05)
+        plt.ylabel(spec['variable'])
+    plt.grid(axis='y')
+    fig.savefig(figure_path(spec, graph_folder), format='png', transparent=False, facecolor='white',
+                edgecolor='white', bbox_inches='tight')
+    plt.close(fig)
+    return spec['title']
+
+def render_figures(specs, jobs=None, graph_folder=GRAPH_FOLDER, force=False):
+    """
+    Render every figure that has changed (or every figure if force), using jobs processes (defaults to every core).
+    Figures without an input file (eg a strategy that wasn't run for a price period) are skipped.
+    Returns the titles of the figures that were rendered.
+    """
+    os.makedirs(graph_folder, exist_ok=True)
+    signatures_path = os.path.join(graph_folder, SIGNATURES_FILE)
+    try:
+        with open(signatures_path) as signatures_file:
+            signatures = json.load(signatures_file)
+    except FileNotFoundError:
+        signatures = {}
+    missing = [spec for spec in specs if not os.path.exists(spec['file'])]
+    for spec in missing:
+        print(f"Skipping '{spec['title']}', no file: {spec['file']}")
+    specs = [spec for spec in specs if os.path.exists(spec['file'])]
+    # Read Overall_Results once for all of the bar graphs
+    results_dfs = {spec['file']: pd.read_csv(spec['file']) for spec in specs if spec['kind'] == 'bar'}
+    to_render = []
+    for spec in specs:
+        signature = figure_signature(spec, results_dfs.get(spec['file']))
+        path = figure_path(spec, graph_folder)
+        if force or signatures.get(path) != signature or not os.path.exists(path):
+            to_render.append((spec, path, signature))
+    if not to_render:
+        return []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(render, spec, graph_folder) for spec, _, _ in to_render]
+        rendered = [future.result() for future in futures]
+    # Only save signatures once every figure has rendered
+    for _, path, signature in to_render:
+        signatures[path] = signature
+    with open(signatures_path, 'w') as signatures_file:
+        json.dump(signatures, signatures_file, indent=1)
+    return rendered
@@ -0,0 +1,227 @@
+"""
+Indicators for signal based strategies (moving averages, RSI, momentum...).
+Each indicator is calculated once, vectorized over the whole price period, and saved to disk so
+parameter sweeps over the same data can reuse it.
+Every indicator only uses past data, the value at a row only depends on that row and the rows before it.
+Strategies list the indicators they need in their `indicators` attribute (see Strategy.indicator).
+"""
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+def indicator_cache_path(file_name=''):
+    """Path to the saved indicator files."""
+    return f'csv_files\\indicator_cache\\{file_name}'
+
+def moving_average(prices, timestamps, window):
+    """Simple moving average of the last `window` rows, NaN until there are enough rows."""
+    sums = np.cumsum(np.r_[0, prices])
+    averages = np.full(len(prices), np.nan)
+    averages[window-1:] = (sums[window:]-sums[:-window])/window
+    return averages
+
+def exponential_moving_average(prices, timestamps, span):
+    """Exponential moving average, each row has a weight of 2/(span+1)."""
+    return pd.Series(prices).ewm(span=span, adjust=False).mean().to_numpy()
+
+def momentum(prices, timestamps, window):
+    """% change in price over the last `window` rows, NaN until there are enough rows."""
+    changes = np.full(len(prices), np.nan)
+    changes[window:] = (prices[window:]/prices[:-window]-1)*100
+    return changes
+
+def rsi(prices, timestamps, window=14):
+    """
+    Relative strength index (0 to 100) using Wilder's smoothing.
+    Over 70 is usually seen as overbought and under 30 as oversold.
+    """
+    changes = np.diff(prices, prepend=prices[0])
+    gains = pd.Series(np.maximum(changes, 0)).ewm(alpha=1/window, adjust=False).mean().to_numpy()
+    losses = pd.Series(np.maximum(-changes, 0)).ewm(alpha=1/window, adjust=False).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100-100/(1+gains/losses)
+    # No losses means the price has only gone up
+    values[losses == 0] = 100
+    # The first window rows don't have enough history yet
+    values[:window] = np.nan
+    return values
+
+# Time the first ETH block was mined, log fits measure time from here
+ETH_GENESIS_TIMESTAMP = 1438269973
+SECONDS_IN_A_DAY = 60*60*24
+
+def log_days(timestamps, origin=ETH_GENESIS_TIMESTAMP):
+    """log(days since origin), the x value of the log fits."""
+    days = (np.asarray(timestamps, dtype=float)-origin)/SECONDS_IN_A_DAY
+    if np.any(days <= 0):
+        raise ValueError('Every timestamp must be after the origin of the log fit')
+    return np.log(days)
+
+class OnlineLogFit:
+    """
+    Least squares fit of log(price) against log(days since origin), updated one row at a time.
+    Keeps running means and (co)variances (Welford's method) so each update is O(1) and stays accurate over millions of rows.
+    """
+    def __init__(self, origin=ETH_GENESIS_TIMESTAMP):
+        self.origin = origin
+        self.rows = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        # Sums of squared differences from the means
+        self.x_variance_sum = 0.0
+        self.covariance_sum = 0.0
+        self.y_variance_sum = 0.0
+
+    def update(self, timestamp, price):
+        """Add a row to the fit."""
+        x = float(log_days([timestamp], self.origin)[0])
+        y = np.log(float(price))
+        self.rows += 1
+        x_change = x-self.mean_x
+        y_change = y-self.mean_y
+        self.mean_x += x_change/self.rows
+        self.mean_y += y_change/self.rows
+        self.x_variance_sum += x_change*(x-self.mean_x)
+        self.covariance_sum += x_change*(y-self.mean_y)
+        self.y_variance_sum += y_change*(y-self.mean_y)
+        return self
+
+    @property
+    def slope(self):
+        """Slope of the fit, NaN until there are 2 different times."""
+        if self.x_variance_sum == 0:
+            return np.nan
+        return self.covariance_sum/self.x_variance_sum
+
+    @property
+    def intercept(self):
+        """log(price) of the fit when log(days) is 0."""
+        return self.mean_y-self.slope*self.mean_x
+
+    @property
+    def residual_std(self):
+        """Standard deviation of log(price) around the fit, NaN until there are 3 rows."""
+        if self.rows < 3 or self.x_variance_sum == 0:
+            return np.nan
+        squared_errors = self.y_variance_sum-self.covariance_sum**2/self.x_variance_sum
+        return np.sqrt(max(squared_errors, 0)/(self.rows-2))
+
+    def fitted_price(self, timestamp):
+        """Price the fit gives at a time."""
+        return np.exp(self.intercept+self.slope*log_days([timestamp], self.origin)[0])
+
+    def band(self, timestamp, width=2):
+        """Lower and upper price of the band width residual standard deviations around the fit."""
+        fitted_log_price = self.intercept+self.slope*log_days([timestamp], self.origin)[0]
+        return (np.exp(fitted_log_price-width*self.residual_std), np.exp(fitted_log_price+width*self.residual_std))
+
+def log_fit_series(prices, timestamps, origin=ETH_GENESIS_TIMESTAMP):
+    """
+    OnlineLogFit at every row in one vectorized pass, using running sums.
+    Returns a dictionary of arrays: slope, intercept, residual_std, fitted_price and deviation
+    (how many residual standard deviations the price is above the fit).
+    """
+    x = log_days(timestamps, origin)
+    y = np.log(np.asarray(prices, dtype=float))
+    # Shift by the first row so the running sums stay small and accurate
+    x_shift = x-x[0]
+    y_shift = y-y[0]
+    rows = np.arange(1, len(x)+1)
+    sum_x = np.cumsum(x_shift)
+    sum_y = np.cumsum(y_shift)
+    x_variance_sum = np.cumsum(x_shift*x_shift)-sum_x*sum_x/rows
+    covariance_sum = np.cumsum(x_shift*y_shift)-sum_x*sum_y/rows
+    y_variance_sum = np.cumsum(y_shift*y_shift)-sum_y*sum_y/rows
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(x_variance_sum > 0, covariance_sum/x_variance_sum, np.nan)
+        intercept = (sum_y/rows+y[0])-slope*(sum_x/rows+x[0])
+        squared_errors = np.maximum(y_variance_sum-slope*covariance_sum, 0)
+        residual_std = np.where(rows >= 3, np.sqrt(squared_errors/(rows-2)), np.nan)
+        fitted_log_price = intercept+slope*x
+        deviation = (y-fitted_log_price)/residual_std
+    return {
+        'slope': slope,
+        'intercept': intercept,
+        'residual_std': residual_std,
+        'fitted_price': np.exp(fitted_log_price),
+        'deviation': deviation
+    }
+
+def log_fit_price(prices, timestamps, origin=ETH_GENESIS_TIMESTAMP):
+    """Price given by the log fit of all of the data up to each row."""
+    return log_fit_series(prices, timestamps, origin)['fitted_price']
+
+def log_fit_deviation(prices, timestamps, origin=ETH_GENESIS_TIMESTAMP):
+    """How many residual standard deviations the price is above (+) or below (-) the log fit up to each row."""
+    return log_fit_series(prices, timestamps, origin)['deviation']
+
+# Indicator names that strategies can ask for
+INDICATORS = {
+    'sma': moving_average,
+    'ema': exponential_moving_average,
+    'momentum': momentum,
+    'rsi': rsi,
+    'log_fit_price': log_fit_price,
+    'log_fit_deviation': log_fit_deviation
+}
+
+def dataset_digest(timestamps, prices):
+    """Short hash of the price data, so cached indicators are only used for the exact same data."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(timestamps, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(prices, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+class IndicatorCache:
+    """
+    On disk cache of calculated indicators.
+    Indicators are keyed by (indicator, params, dataset digest) and saved as .npy files.
+    """
+    def __init__(self, cache_dir=''):
+        # Use the default folder unless we are given one (used by tests)
+        if cache_dir == '':
+            cache_dir = indicator_cache_path()
+        self.cache_dir = cache_dir
+        # Number of indicators we had to calculate, aka were not cached
+        self.calculated = 0
+
+    def path(self, indicator, params, digest):
+        """Path to the saved file for an indicator."""
+        key = hashlib.sha1(repr((indicator, sorted(params.items()), digest)).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'{indicator}_{key}.npy')
+
+    def get(self, indicator, params, timestamps, prices, digest=None):
+        """Returns the indicator values for every row, only calculating them if they aren't saved."""
+        if indicator not in INDICATORS:
+            raise ValueError(f'Unknown indicator: {indicator}, must be one of {list(INDICATORS.keys())}')
+        if digest is None:
+            digest = dataset_digest(timestamps, prices)
+        path = self.path(indicator, params, digest)
+        if os.path.exists(path):
+            return np.load(path)
+        values = INDICATORS[indicator](prices, timestamps, **params)
+        self.calculated += 1
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so a crash can't leave a half written file
+        with open(path+'.tmp', 'wb') as indicator_file:
+            np.save(indicator_file, values)
+        os.replace(path+'.tmp', path)
+        return values
+
+def load_indicators(indicators, timestamps, prices, cache_dir=''):
+    """
+    Calculate (or load) every indicator a strategy needs.
+    indicators maps the name the strategy uses to (indicator, params), eg:
+        {'fast_average': ('sma', {'window': 60}), 'slow_average': ('sma', {'window': 60*24})}
+    Returns a dictionary of name: array of values for every row.
+    """
+    if not indicators:
+        return {}
+    cache = IndicatorCache(cache_dir)
+    prices = np.asarray(prices, dtype=float)
+    digest = dataset_digest(timestamps, prices)
+    return {
+        name: cache.get(indicator, params, timestamps, prices, digest)
+        for name, (indicator, params) in indicators.items()
+    }
@@ -1,10 +1,18 @@
 """Helper functions for initializing data"""
 from fractions import Fraction as frac
+from concurrent.futures import ProcessPoolExecutor
+import os
+import tempfile
 import time
 import datetime
 import numpy as np
 import pandas as pd
 import lib.base_strategy as bs
+import lib.candle_tiers as ct
+import lib.exact_prices as ep
+
+# Largest value an int64 can hold
+INT64_MAX = np.iinfo(np.int64).max
 
 def compare_dataset_timestamps(df1, df2, debug=False):
     """
@@ -83,23 +91,310 @@ def make_average(df_row, new_row_name):
         raise ValueError('new_row_name misspelt!')
     return df_row
 
+def split_fractions(fractions):
+    """
+    Split fractions (Fraction objects or 'a/b' strings) into numerator and denominator arrays.
+    The arrays are int64, unless a value is too big for an int64, then they hold python ints (see ep.parse_fractions).
+    """
+    return ep.parse_fractions(fractions)
+
+def fraction_strings(numerators, denominators):
+    """
+    'a/b' strings (just 'a' for whole numbers) from numerator and denominator arrays.
+    Going through python ints is faster than numpy's string functions for turning ints into text.
+    """
+    return np.array([
+        f'{numerator}/{denominator}' if denominator != 1 else str(numerator)
+        for numerator, denominator in zip(numerators.tolist(), denominators.tolist())
+    ], dtype=object)
+
+def fraction_means(numerators, denominators, present, as_fractions=False):
+    """
+    Exact average of the present fractions in each row of (rows, sources) numerator and denominator arrays.
+    The fractions are put over their lowest common denominator, added up, divided by how many there are
+    and reduced with np.gcd, all with int64 arrays.
+    Rows that would overflow an int64 are worked out with Fraction instead.
+    Returns the averages as 'a/b' strings (just 'a' for whole numbers), or as Fraction objects if as_fractions is set.
+    """
+    present = np.asarray(present, dtype=bool)
+    original_numerators = numerators
+    original_denominators = denominators
+    counts = present.sum(axis=1)
+    overflow = np.zeros(len(present), dtype=bool)
+    if numerators.dtype == object or denominators.dtype == object:
+        # Values that don't fit in an int64 are python ints
+        too_big = ((np.abs(numerators) > INT64_MAX) | (np.abs(denominators) > INT64_MAX)).astype(bool)
+        overflow |= (too_big & present).any(axis=1)
+        numerators = np.where(too_big, 0, numerators).astype(np.int64)
+        denominators = np.where(too_big, 1, denominators).astype(np.int64)
+    # Missing fractions are 0/1 so they don't change the sum
+    numerators = np.where(present & ~overflow[:, np.newaxis], numerators, 0)
+    denominators = np.where(present & ~overflow[:, np.newaxis], denominators, 1)
+
+    # Lowest common denominator, one source at a time
+    common = np.ones(len(present), dtype=np.int64)
+    for source in range(present.shape[1]):
+        step = denominators[:, source]//np.gcd(common, denominators[:, source])
+        overflow |= common > INT64_MAX//step
+        common = np.where(overflow, 1, common*step)
+    # Add up the fractions over the common denominator
+    totals = np.zeros(len(present), dtype=np.int64)
+    for source in range(present.shape[1]):
+        # Rows that already overflowed have a common denominator of 1, their scale isn't used
+        scale = np.where(overflow, 1, common//denominators[:, source])
+        overflow |= np.abs(numerators[:, source]) > INT64_MAX//scale
+        terms = np.where(overflow, 0, numerators[:, source]*scale)
+        overflow |= np.abs(totals) > INT64_MAX-np.abs(terms)
+        totals = np.where(overflow, 0, totals+terms)
+    # Divide by the count and reduce
+    counts = np.maximum(counts, 1)
+    overflow |= common > INT64_MAX//counts
+    common = np.where(overflow, 1, common*counts)
+    divisors = np.gcd(totals, common)
+    totals //= divisors
+    common //= divisors
+
+    if as_fractions:
+        averages = np.array([
+            frac(numerator, denominator) for numerator, denominator in zip(totals.tolist(), common.tolist())
+        ], dtype=object)
+    else:
+        averages = fraction_strings(totals, common)
+    # Python ints can't overflow, so the few rows that don't fit are done with Fraction
+    for row in np.flatnonzero(overflow):
+        row_fractions = [
+            frac(int(numerator), int(denominator)) for numerator, denominator, is_present in
+            zip(original_numerators[row], original_denominators[row], present[row]) if is_present
+        ]
+        average = sum(row_fractions)/len(row_fractions)
+        averages[row] = average if as_fractions else str(average)
+    return averages
+
+def round_prices(values, digits=4):
+    """
+    Vectorized version of python's round for an array of floats.
+    np.round can be off by one in the last digit when a value is right next to a half way point,
+    so those few values are rounded with python's round instead.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    scaled = values*10**digits
+    close_to_half = np.abs(scaled-np.floor(scaled)-.5) < 1e-6
+    rounded[close_to_half] = [round(float(value), digits) for value in values[close_to_half]]
+    return rounded
+
+def quarter_fractions(values):
+    """
+    Vectorized str(frac(value)/4) for an array of floats.
+    A float is exactly mantissa*2**exponent, so the fraction only needs the mantissa's odd part and a power of 2.
+    """
+    values = np.asarray(values, dtype=float)
+    mantissas, exponents = np.frexp(values)
+    # 53 bit whole number mantissa, the /4 takes 2 more off the exponent
+    numerators = (mantissas*2**53).astype(np.int64)
+    exponents = exponents.astype(np.int64)-53-2
+    # Take every factor of 2 out of the numerator so the fraction is reduced
+    twos = np.zeros(len(values), dtype=np.int64)
+    nonzero = numerators != 0
+    twos[nonzero] = np.log2(numerators[nonzero] & -numerators[nonzero]).astype(np.int64)
+    numerators >>= twos
+    exponents += twos
+    # Zero and whole numbers have no denominator
+    exponents[~nonzero] = 0
+    whole = exponents >= 0
+    # A 53 bit numerator can be shifted 9 bits and still fit in an int64
+    small_whole = whole & (exponents <= 9)
+    numerators[small_whole] <<= exponents[small_whole]
+    # Denominators can be bigger than an int64, but there are only a few powers of 2 to write out
+    powers = np.array([f'/{2**power}' for power in range(int(-exponents.min(initial=0))+1)])
+    powers[0] = ''
+    denominators = powers[np.where(whole, 0, -exponents)]
+    fractions = np.char.add(numerators.astype(str), denominators).astype(object)
+    # Bigger whole numbers are written out with python ints
+    big_whole = whole & ~small_whole
+    fractions[big_whole] = [
+        str(int(numerator) << int(exponent))
+        for numerator, exponent in zip(numerators[big_whole], exponents[big_whole])
+    ]
+    return fractions
+
+# Rows of a Kaggle file while it is sorted, the sum of Open, High, Low and Close rounded to 4 decimals
+KAGGLE_ROW = np.dtype([('index', np.int64), ('timestamp', np.int64), ('price_sum', float)])
+
+def kaggle_rows(chunk, first_row=0):
+    """
+    KAGGLE_ROW array for rows of a Kaggle file, index is the row number in the file starting at first_row.
+    """
+    if chunk[['Open', 'High', 'Low', 'Close']].isnull().values.any():
+        raise ValueError('Null prices found')
+    rows = np.empty(len(chunk.index), dtype=KAGGLE_ROW)
+    rows['index'] = np.arange(first_row, first_row+len(rows))
+    rows['timestamp'] = chunk['timestamp'].to_numpy()
+    rows['price_sum'] = np.round(
+        chunk['Open'].to_numpy()+chunk['Close'].to_numpy()+chunk['High'].to_numpy()+chunk['Low'].to_numpy(), 4
+    )
+    return rows
+
+def kaggle_prices(rows):
+    """
+    Price columns for KAGGLE_ROW rows, fraction_price is made from the rounded sum
+    to minimize floating point rounding errors, same as applying frac(x)/4 to every row.
+    """
+    return pd.DataFrame({
+        'index': rows['index'],
+        'timestamp': rows['timestamp'],
+        'fraction_price': quarter_fractions(rows['price_sum']),
+        'decimal_price': rows['price_sum']/4
+    })
+
+# Most runs merged at once, more than this are merged in a few passes so we don't run out of open files
+MAX_MERGE_RUNS = 64
+
+def prepare_kaggle_file(csv_path, save_path, chunk_size=1000000):
+    """
+    Make the sorted price csv (index, timestamp, fraction_price, decimal_price) for one Kaggle yearly file.
+    The file is read chunk_size rows at a time with only the columns we need.
+    Each chunk is sorted and added to a temporary binary file (a run) as long as it follows on from it,
+    then the runs are merged (external merge sort). A sorted file is a single run so it is saved in one pass.
+    index is the row's place in the Kaggle file, same as sort_values keeps.
+    Returns the number of rows saved.
+    """
+    reader = pd.read_csv(
+        csv_path,
+        usecols=['timestamp', 'Open', 'High', 'Low', 'Close'],
+        dtype={'timestamp': np.int64, 'Open': float, 'High': float, 'Low': float, 'Close': float},
+        chunksize=chunk_size
+    )
+    with tempfile.TemporaryDirectory() as temp_dir:
+        run_paths = []
+        last_timestamp = None
+        rows_read = 0
+        for chunk in reader:
+            try:
+                rows = kaggle_rows(chunk, rows_read)
+            except ValueError as error:
+                raise ValueError(f'{csv_path}: {error}') from error
+            if len(rows) == 0:
+                continue
+            rows_read += len(rows)
+            rows = rows[np.argsort(rows['timestamp'], kind='stable')]
+            # Start a new run if this chunk goes back in time
+            if last_timestamp is None or rows['timestamp'][0] < last_timestamp:
+                run_paths.append(os.path.join(temp_dir, f'run_{len(run_paths)}.bin'))
+            with open(run_paths[-1], 'ab') as run_file:
+                run_file.write(rows.tobytes())
+            last_timestamp = rows['timestamp'][-1]
+
+        # Merge groups of runs into bigger runs until they can all be merged at once
+        while len(run_paths) > MAX_MERGE_RUNS:
+            merged_paths = []
+            for group_start in range(0, len(run_paths), MAX_MERGE_RUNS):
+                merged_paths.append(os.path.join(temp_dir, f'merged_{len(run_paths)}_{group_start}.bin'))
+                group = run_paths[group_start:group_start+MAX_MERGE_RUNS]
+                runs = [np.memmap(path, dtype=KAGGLE_ROW, mode='r') for path in group]
+                with open(merged_paths[-1], 'wb') as run_file:
+                    for batch in merge_runs(runs, chunk_size):
+                        run_file.write(batch.tobytes())
+                # Let go of the memory maps before the files are removed
+                del runs
+            for path in run_paths:
+                os.remove(path)
+            run_paths = merged_paths
+
+        # Start a new file with just the header
+        pd.DataFrame(columns=['index', 'timestamp', 'fraction_price', 'decimal_price']).to_csv(save_path, index=False)
+        runs = [np.memmap(path, dtype=KAGGLE_ROW, mode='r') for path in run_paths]
+        for batch in merge_runs(runs, chunk_size):
+            kaggle_prices(batch).to_csv(save_path, mode='a', header=False, index=False)
+        del runs
+    print(f'{csv_path} rows saved: {rows_read} | sorted runs: {len(run_paths)}')
+    return rows_read
+
+def merge_runs(runs, chunk_size=1000000):
+    """
+    Merge KAGGLE_ROW arrays that are each sorted by timestamp, yielding sorted batches of about chunk_size rows.
+    Rows with the same timestamp are kept in index order.
+    """
+    window = max(1, chunk_size//max(1, len(runs)))
+    positions = [0 for _ in runs]
+    while True:
+        remaining = [i for i, run in enumerate(runs) if positions[i] < len(run)]
+        if not remaining:
+            return
+        # Rows up to the smallest last timestamp in each window can be merged,
+        # as no run can have more rows before that time. Runs that fit in their window don't limit it.
+        limited = [runs[i]['timestamp'][positions[i]+window-1] for i in remaining if positions[i]+window < len(runs[i])]
+        boundary = min(limited) if limited else None
+        ready = []
+        for i in remaining:
+            timestamps = runs[i]['timestamp'][positions[i]:positions[i]+window]
+            cut = len(timestamps) if boundary is None else int(np.searchsorted(timestamps, boundary, side='right'))
+            ready.append(np.array(runs[i][positions[i]:positions[i]+cut]))
+            positions[i] += cut
+        batch = np.concatenate(ready)
+        if len(ready) > 1:
+            batch = batch[np.lexsort((batch['index'], batch['timestamp']))]
+        yield batch
+
+def prepare_kaggle_files(csv_paths, save_paths, chunk_size=1000000, jobs=None):
+    """
+    Run prepare_kaggle_file for every Kaggle file at once in a process pool,
+    so preparing every year takes about as long as the biggest file.
+    jobs is the number of processes, None for one per cpu.
+    Returns the number of rows saved for each file.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(prepare_kaggle_file, csv_path, save_path, chunk_size)
+            for csv_path, save_path in zip(csv_paths, save_paths)
+        ]
+        return [future.result() for future in futures]
+
 def combine_datasets(df1, df2):
     """
     Combine dataframes into one massive one, return output.
     Average fraction_price and decimal_price for all duplicates.
     Keep average price, drop the rest of the duplicates
+    Vectorized version of applying make_average to every row, fraction_price is given as Fraction objects.
     """
     # Combine the dataframes
     combined_dataframes = df1.set_index('timestamp').join(
         df2.set_index('timestamp'), how='outer', lsuffix='_1', rsuffix='_2'
     )
+    row_count = len(combined_dataframes.index)
+
     # Set average fraction_price
-    combined_dataframes['fraction_price'] = np.nan
-    combined_dataframes = combined_dataframes.apply(lambda x: make_average(x, 'fraction_price'), axis=1)
+    # Find which rows have a price from each dataframe
+    present = np.column_stack([
+        combined_dataframes['fraction_price_1'].notna().to_numpy(),
+        combined_dataframes['fraction_price_2'].notna().to_numpy()
+    ])
+    # Missing values are set to 0/1 so they don't break the math, they are never used
+    numerators = [np.zeros(row_count, dtype=np.int64), np.zeros(row_count, dtype=np.int64)]
+    denominators = [np.ones(row_count, dtype=np.int64), np.ones(row_count, dtype=np.int64)]
+    for source, column in enumerate(['fraction_price_1', 'fraction_price_2']):
+        source_numerators, source_denominators = split_fractions(
+            combined_dataframes[column].loc[present[:, source]].to_numpy())
+        if source_numerators.dtype == object:
+            numerators[source] = numerators[source].astype(object)
+            denominators[source] = denominators[source].astype(object)
+        numerators[source][present[:, source]] = source_numerators
+        denominators[source][present[:, source]] = source_denominators
+    combined_dataframes['fraction_price'] = fraction_means(
+        np.column_stack(numerators), np.column_stack(denominators), present, as_fractions=True
+    )
 
     # Set average decimal_price
-    combined_dataframes['decimal_price'] = np.nan
-    combined_dataframes = combined_dataframes.apply(lambda x: make_average(x, 'decimal_price'), axis=1)
+    decimal_price_1 = combined_dataframes['decimal_price_1'].to_numpy(dtype=float)
+    decimal_price_2 = combined_dataframes['decimal_price_2'].to_numpy(dtype=float)
+    has_decimal_1 = ~np.isnan(decimal_price_1)
+    has_decimal_2 = ~np.isnan(decimal_price_2)
+    # If we need decimals, round to the fourth digit
+    combined_dataframes['decimal_price'] = np.where(
+        has_decimal_1 & has_decimal_2,
+        round_prices((decimal_price_1 + decimal_price_2)/2, 4),
+        np.where(has_decimal_1, decimal_price_1, decimal_price_2)
+    )
 
     # Reset the index so we can get regular numbers instead of timestamps
     # and make timestamp a column instead of the index
@@ -110,11 +405,127 @@ def combine_datasets(df1, df2):
     combined_dataframes = combined_dataframes.filter(['index', 'timestamp', 'fraction_price', 'decimal_price'])
     return combined_dataframes
 
-def create_price_period(start, end, name, csv='Combined_ETH_all_price_data.csv'):
+def merge_datasets(csv_paths, save_path, chunk_size=100000):
+    """
+    Combine any number of timestamp sorted price csv files into one csv in a single pass.
+    Each file is read in chunks so memory use depends on chunk_size, not on the size of the files.
+    For every timestamp we save the average fraction_price and decimal_price of all files that have it,
+    along with how many files had it (source_count).
+    Returns the number of rows saved.
+    """
+    columns = ['timestamp', 'fraction_price', 'decimal_price']
+    readers = [
+        pd.read_csv(path, usecols=columns, dtype={'fraction_price': str}, chunksize=chunk_size)
+        for path in csv_paths
+    ]
+    # Rows that have been read in but not merged yet
+    buffers = [pd.DataFrame(columns=columns) for _ in csv_paths]
+    exhausted = [False for _ in csv_paths]
+    # Last timestamp read from each file, used to make sure the files are sorted
+    last_timestamps = [None for _ in csv_paths]
+    rows_saved = 0
+
+    # Start a new file with just the header
+    pd.DataFrame(columns=['index', 'timestamp', 'fraction_price', 'decimal_price', 'source_count']).to_csv(
+        save_path, index=False
+    )
+    while True:
+        # Make sure every file that still has data has more than one timestamp in its buffer,
+        # otherwise we can't tell if the next chunk has more rows for its last timestamp
+        for i, reader in enumerate(readers):
+            while not exhausted[i] and (
+                buffers[i].empty or buffers[i]['timestamp'].iloc[0] == buffers[i]['timestamp'].iloc[-1]
+            ):
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    exhausted[i] = True
+                    continue
+                timestamps = chunk['timestamp'].to_numpy()
+                if np.any(np.diff(timestamps) < 0) or (
+                    last_timestamps[i] is not None and timestamps[0] < last_timestamps[i]
+                ):
+                    raise ValueError(f'{csv_paths[i]} is not sorted by timestamp')
+                last_timestamps[i] = timestamps[-1]
+                buffers[i] = pd.concat([buffers[i], chunk]) if not buffers[i].empty else chunk
+
+        if all(exhausted) and all(buffer.empty for buffer in buffers):
+            break
+
+        # Rows before the smallest last buffered timestamp can be merged,
+        # as no file can have more rows before that time.
+        # Rows at that time wait for the next batch, a file might have more of them in its next chunk
+        still_reading = [buffers[i]['timestamp'].iloc[-1] for i in range(len(readers)) if not exhausted[i]]
+        ready = []
+        for i, buffer in enumerate(buffers):
+            if still_reading:
+                cut = int(np.searchsorted(buffer['timestamp'].to_numpy(), min(still_reading), side='left'))
+            else:
+                cut = len(buffer.index)
+            ready.append(buffer.iloc[:cut])
+            buffers[i] = buffer.iloc[cut:]
+        batch = pd.concat(ready).sort_values('timestamp', kind='mergesort')
+
+        # Find where each timestamp starts and how many files have it
+        timestamps = batch['timestamp'].to_numpy()
+        group_starts = np.flatnonzero(np.r_[True, timestamps[1:] != timestamps[:-1]])
+        source_count = np.diff(np.r_[group_starts, len(timestamps)])
+
+        # Exact average of fraction_price
+        # Put each timestamp's fractions on a row, one column per file that has it
+        numerators, denominators = split_fractions(batch['fraction_price'].to_numpy())
+        group_rows = np.repeat(np.arange(len(group_starts)), source_count)
+        group_columns = np.arange(len(timestamps))-np.repeat(group_starts, source_count)
+        shape = (len(group_starts), source_count.max())
+        present = np.zeros(shape, dtype=bool)
+        present[group_rows, group_columns] = True
+        group_numerators = np.zeros(shape, dtype=numerators.dtype)
+        group_denominators = np.ones(shape, dtype=denominators.dtype)
+        group_numerators[group_rows, group_columns] = numerators
+        group_denominators[group_rows, group_columns] = denominators
+        fraction_price = fraction_means(group_numerators, group_denominators, present)
+
+        # Average of decimal_price, only rounded if more than one file had the timestamp
+        decimal_price = np.add.reduceat(batch['decimal_price'].to_numpy(dtype=float), group_starts)
+        decimal_price = np.where(
+            source_count > 1,
+            round_prices(decimal_price/source_count, 4),
+            decimal_price
+        )
+
+        merged = pd.DataFrame({
+            'index': np.arange(rows_saved, rows_saved+len(group_starts)),
+            'timestamp': timestamps[group_starts],
+            'fraction_price': fraction_price,
+            'decimal_price': decimal_price,
+            'source_count': source_count
+        })
+        merged.to_csv(save_path, mode='a', header=False, index=False)
+        rows_saved += len(merged.index)
+
+    print(f'Rows saved: {rows_saved}')
+    return rows_saved
+
+def create_candle_tiers(csv='Combined_ETH_all_price_data.csv', tiers=('1h', '1d'), chunk_size=1000000):
+    """
+    Build hourly/daily candles from a minute price data csv and save each tier next to it,
+    eg: Combined_ETH_all_price_data_1d.csv
+    The csv is read chunk_size rows at a time so it doesn't have to fit in memory.
+    """
+    for tier in tiers:
+        candles = ct.build_candles_chunks(
+            pd.read_csv(bs.full_path(csv), dtype={'fraction_price': str}, chunksize=chunk_size),
+            tier
+        )
+        candles.to_csv(bs.full_path(ct.tier_name(csv, tier)))
+        print(f'{tier} candles saved: {len(candles.index)}')
+
+def create_price_period(start, end, name, csv='Combined_ETH_all_price_data.csv', tiers=('1h', '1d')):
     """
     Loops through csv until time > start and continue until end < time.
     If the end of a file is reached, open the next one.
     Save the resulting data as a new csv called 'name.csv'
+    Hourly/daily candles for the price period are also saved as 'name_1h.csv' and 'name_1d.csv'
     """
     # If we get a date, turn it to a timestamp, otherwise just continue
     if not isinstance(start, int):
@@ -145,6 +556,9 @@ def create_price_period(start, end, name, csv='Combined_ETH_all_price_data.csv')
     # Save df as csv
     if not new_df.empty:
         new_df.to_csv(bs.period_path(name+'.csv'))
+        # Save the candle tiers so strategies that act hourly/daily don't have to read the minute data
+        for tier in tiers:
+            ct.build_candles(new_df, tier).to_csv(bs.period_path(ct.tier_name(name, tier)))
 
     # Pretty spacing
     print('\n')
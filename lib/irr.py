@@ -0,0 +1,93 @@
+"""
+Money weighted returns (XIRR).
+Final Annual % Return compares the end value to everything we started with, even USD that sat unused until a DCA buy.
+XIRR is the annual rate that makes the value of every cash flow (USD put in as negative, USD taken out as positive)
+add up to zero, so only money that was actually put into ETH counts, for as long as it was in.
+Many cash flow series (eg one per parameter in a sweep) are solved at once with Newton's method,
+falling back to bisection whenever a Newton step leaves the range the rate is known to be in.
+"""
+import numpy as np
+import lib.trade_log as tl
+
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+# Solve for the continuously compounded rate, ln(1+rate), between -LOG_RATE_LIMIT and LOG_RATE_LIMIT
+# e**50 times a year is far past any real return, and still doesn't overflow over decades of flows
+LOG_RATE_LIMIT = 50
+
+def npv(amounts, years, log_rates):
+    """
+    Present value of each series' cash flows and its derivative, at a continuously compounded rate for each series.
+    amounts and years are (series, flows), log_rates is (series,).
+    """
+    discounted = amounts*np.exp(-log_rates[:, np.newaxis]*years)
+    return discounted.sum(axis=1), -(discounted*years).sum(axis=1)
+
+def xirr(amounts, times, tolerance=1e-12, max_iterations=200):
+    """
+    Annual rate of return (decimal, eg .1 for 10%) of each cash flow series.
+    amounts are the cash flows and times their timestamps (seconds), either one series (1D) or one series per row (2D).
+    Each series must start with its earliest flow, shorter series can be padded with 0 amounts.
+    Series without both a negative and positive flow, or with no rate that makes them add up to zero, give NaN.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    one_series = amounts.ndim == 1
+    amounts = np.atleast_2d(amounts)
+    times = np.broadcast_to(np.atleast_2d(np.asarray(times, dtype=float)), amounts.shape)
+    years = (times-times[:, :1])/SECONDS_IN_YEAR
+    # Size of the flows, to tell when a present value is as good as 0
+    scale = np.abs(amounts).sum(axis=1)
+
+    # Keep a range that the rate is in for every series, the present value changes sign across it
+    low = np.full(len(amounts), -float(LOG_RATE_LIMIT))
+    high = np.full(len(amounts), float(LOG_RATE_LIMIT))
+    low_value, _ = npv(amounts, years, low)
+    high_value, _ = npv(amounts, years, high)
+    solvable = np.sign(low_value)*np.sign(high_value) < 0
+    # Start from the rate that grows the money put in to the money taken out, over the time between their
+    # average dates, this is usually close enough that Newton's method only needs a few steps
+    put_in = np.clip(-amounts, 0, None)
+    taken_out = np.clip(amounts, 0, None)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        average_years = (
+            (taken_out*years).sum(axis=1)/taken_out.sum(axis=1) - (put_in*years).sum(axis=1)/put_in.sum(axis=1)
+        )
+        log_rates = np.log(taken_out.sum(axis=1)/put_in.sum(axis=1))/average_years
+    log_rates = np.clip(np.nan_to_num(log_rates, nan=0, posinf=0, neginf=0), low/2, high/2)
+    # Only keep working on the series that haven't been solved yet
+    active = np.flatnonzero(solvable)
+    for _ in range(max_iterations):
+        if len(active) == 0:
+            break
+        rates = log_rates[active]
+        value, slope = npv(amounts[active], years[active], rates)
+        # Shrink the range to the side that still changes sign
+        low_side = np.sign(value) == np.sign(low_value[active])
+        low[active] = np.where(low_side, rates, low[active])
+        low_value[active] = np.where(low_side, value, low_value[active])
+        high[active] = np.where(low_side, high[active], rates)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = rates-value/slope
+        next_rates = np.where((newton > low[active]) & (newton < high[active]), newton, (low[active]+high[active])/2)
+        # Stop once the present value or the step is lost in rounding
+        solved = np.abs(value) <= tolerance*scale[active]
+        log_rates[active] = np.where(solved, rates, next_rates)
+        done = solved | (np.abs(next_rates-rates) <= tolerance*(1+np.abs(rates)))
+        active = active[~done]
+    rates = np.where(solvable, np.expm1(log_rates), np.nan)
+    return float(rates[0]) if one_series else rates
+
+def trade_cash_flows(trade_log, start_value, start_time, end_value, end_time):
+    """
+    Cash flows of a strategy's trades, from the point of view of the money put into ETH.
+    start_value is the USD value of any ETH held at the start (put in at start_time),
+    end_value is the USD value of the ETH still held at end_time (taken out at the end).
+    Buys put in the USD spent and sells take out the USD received after fees.
+    Returns (amounts, times).
+    """
+    sides = trade_log.column('side')
+    usd = trade_log.column('usd')
+    flows = np.where(sides == tl.BUY, -usd, usd-trade_log.column('fee'))
+    amounts = np.r_[-start_value, flows, end_value]
+    times = np.r_[start_time, trade_log.column('timestamp'), end_time]
+    return amounts, times
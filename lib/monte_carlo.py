@@ -0,0 +1,199 @@
+"""
+Monte Carlo simulation of ETH prices.
+Generates thousands of synthetic minute price paths and runs a strategy over all of them at once,
+giving a distribution of results instead of a single number for each historical price period.
+Paths are made and evaluated in batches so memory use stays under max_batch_bytes.
+"""
+import warnings
+import numpy as np
+import pandas as pd
+
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+
+class GBM:
+    """
+    Geometric Brownian motion.
+    mu and sigma are the annual drift and volatility, eg: mu=.5, sigma=.9 for +50%/year with 90% volatility.
+    """
+    def __init__(self, mu, sigma):
+        self.mu = mu
+        self.sigma = sigma
+
+    def log_returns(self, rng, n_steps, step_seconds=60):
+        """Log return for every step of one path."""
+        dt = step_seconds/SECONDS_IN_YEAR
+        return rng.normal((self.mu-self.sigma**2/2)*dt, self.sigma*np.sqrt(dt), n_steps)
+
+class Bootstrap:
+    """
+    Resamples historical price moves.
+    Moves are drawn in blocks of block_size steps so short term patterns (like volatility clustering) are kept.
+    prices should be evenly spaced by step_seconds, eg the decimal_price column of a price period.
+    """
+    def __init__(self, prices, block_size=1):
+        prices = np.asarray(prices, dtype=float)
+        self.historical_log_returns = np.diff(np.log(prices))
+        if block_size < 1 or block_size > len(self.historical_log_returns):
+            raise ValueError('block_size must be between 1 and the number of historical price moves')
+        self.block_size = block_size
+
+    def log_returns(self, rng, n_steps, step_seconds=60):
+        """Log return for every step of one path."""
+        n_blocks = -(-n_steps//self.block_size)
+        block_starts = rng.integers(0, len(self.historical_log_returns)-self.block_size+1, n_blocks)
+        rows = (block_starts[:, None]+np.arange(self.block_size)).ravel()[:n_steps]
+        return self.historical_log_returns[rows]
+
+class RegimeSwitching:
+    """
+    GBM where the drift and volatility switch between regimes (eg bull and bear markets).
+    mus and sigmas are the annual drift and volatility of each regime.
+    transition_matrix[i][j] is the chance of going from regime i to regime j each step.
+    """
+    def __init__(self, mus, sigmas, transition_matrix, start_regime=0):
+        self.mus = np.asarray(mus, dtype=float)
+        self.sigmas = np.asarray(sigmas, dtype=float)
+        self.transition_matrix = np.asarray(transition_matrix, dtype=float)
+        regimes = len(self.mus)
+        if len(self.sigmas) != regimes or self.transition_matrix.shape != (regimes, regimes):
+            raise ValueError('mus, sigmas and transition_matrix must all have one entry per regime')
+        if not np.allclose(self.transition_matrix.sum(axis=1), 1):
+            raise ValueError('Each row of transition_matrix must add up to 1')
+        self.start_regime = start_regime
+
+    def regimes(self, rng, n_steps):
+        """
+        Regime for every step of one path.
+        Instead of checking for a switch every step, draw how long we stay in each regime (a geometric distribution)
+        and which regime comes next, so there is one loop per regime change.
+        """
+        regimes = np.zeros(n_steps, dtype=np.int64)
+        regime = self.start_regime
+        step = 0
+        while step < n_steps:
+            stay_chance = self.transition_matrix[regime, regime]
+            if stay_chance >= 1:
+                # Never leaves this regime
+                regimes[step:] = regime
+                break
+            length = rng.geometric(1-stay_chance)
+            regimes[step:step+length] = regime
+            step += length
+            # Pick the next regime, not counting staying in this one
+            switch_chances = self.transition_matrix[regime].copy()
+            switch_chances[regime] = 0
+            regime = rng.choice(len(self.mus), p=switch_chances/switch_chances.sum())
+        return regimes
+
+    def log_returns(self, rng, n_steps, step_seconds=60):
+        """Log return for every step of one path."""
+        dt = step_seconds/SECONDS_IN_YEAR
+        regimes = self.regimes(rng, n_steps)
+        mus = self.mus[regimes]
+        sigmas = self.sigmas[regimes]
+        return rng.normal(0, 1, n_steps)*sigmas*np.sqrt(dt)+(mus-sigmas**2/2)*dt
+
+def generate_paths(model, start_price, rngs, n_steps, step_seconds=60):
+    """
+    One price path per random generator as a 2d array, (paths, n_steps+1).
+    The first column is start_price.
+    """
+    paths = np.empty((len(rngs), n_steps+1))
+    paths[:, 0] = 0
+    for row, rng in enumerate(rngs):
+        paths[row, 1:] = model.log_returns(rng, n_steps, step_seconds)
+    np.cumsum(paths, axis=1, out=paths)
+    np.exp(paths, out=paths)
+    paths *= start_price
+    return paths
+
+def returns_metrics(values, starting_value, step_seconds=60, times=None):
+    """
+    Final Annual % Return, Sharpe and Sortino for every path, calculated the same way as Strategy does.
+    values is the total value in USD of every path at every step (paths, steps).
+    Steps are step_seconds apart, unless times (seconds since the start at every step, same shape as values) is given.
+    """
+    if times is None:
+        times = np.arange(values.shape[1])*step_seconds
+    years = times/SECONDS_IN_YEAR
+    returns = np.zeros(values.shape)
+    # Leave the first return as 0 so we don't divide by zero
+    returns[:, 1:] = ((values[:, 1:]*100/starting_value)-100)/years[..., 1:]
+    # Divide by 100 to turn % return into decimal version
+    decimal_returns = returns/100
+    annual_risk_free_return = .03
+    average_annual_expected_return = decimal_returns.mean(axis=1)
+    sigma = decimal_returns.std(axis=1, ddof=1)
+    # Sortino only uses negative returns, NaN is left out of the std
+    with warnings.catch_warnings():
+        # Paths with less than 2 negative returns have no std (NaN), the same as Strategy
+        warnings.simplefilter('ignore', RuntimeWarning)
+        downside_sigma = np.nanstd(np.where(decimal_returns < 0, decimal_returns, np.nan), axis=1, ddof=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = (average_annual_expected_return-annual_risk_free_return)/np.where(sigma == 0, np.nan, sigma)
+        sortino = (average_annual_expected_return-annual_risk_free_return)/np.where(
+            downside_sigma == 0, np.nan, downside_sigma
+        )
+    return pd.DataFrame({
+        'Final Annual % Return': np.round(returns[:, -1], 4),
+        'Sharpe of Returns': np.round(sharpe, 4),
+        'Sortino of Returns': np.round(sortino, 4)
+    })
+
+def evaluate_dca(prices, time_between_action, step_seconds=60, starting_usd=10000, initial_buy_percent=.3,
+                 trading_fee=.997):
+    """
+    Run base_dca over every path (row) of prices at once.
+    Buys initial_buy_percent of starting_usd at the start, then splits the rest evenly over a buy every time_between_action.
+    Set initial_buy_percent to 1 to go all in at the start (base_all_in).
+    Returns a dataframe with a row of metrics for each path.
+    """
+    if time_between_action % step_seconds != 0:
+        raise ValueError('time_between_action must be a multiple of step_seconds')
+    n_rows = prices.shape[1]
+    initial_usd = starting_usd*initial_buy_percent
+    usd_left = starting_usd-initial_usd
+    # Same rows Strategy.go_to_next_action would stop at for evenly spaced prices
+    buy_rows = np.arange(time_between_action//step_seconds, n_rows, time_between_action//step_seconds)
+    if usd_left == 0:
+        buy_rows = buy_rows[:0]
+    elif len(buy_rows) == 0:
+        raise ValueError('Price paths not long enough for the DCA period')
+    dca_buy_amount = usd_left/max(len(buy_rows), 1)
+
+    # ETH held at every step, the fee is taken out of the ETH we get
+    eth_held = np.zeros(prices.shape)
+    eth_held[:, 0] = initial_usd/prices[:, 0]*trading_fee
+    eth_held[:, buy_rows] = dca_buy_amount/prices[:, buy_rows]*trading_fee
+    np.cumsum(eth_held, axis=1, out=eth_held)
+    # USD held is the same for every path
+    buys_made = np.searchsorted(buy_rows, np.arange(n_rows), side='right')
+    usd_held = usd_left-dca_buy_amount*buys_made
+
+    values = eth_held
+    values *= prices
+    values += usd_held
+    return returns_metrics(values, starting_usd, step_seconds)
+
+def simulate(model, evaluate, n_paths, n_steps, start_price, seed=None, step_seconds=60,
+             max_batch_bytes=256*1024**2):
+    """
+    Generate n_paths price paths of n_steps each and run evaluate(prices, step_seconds) over them.
+    evaluate takes a 2d array of prices and returns a dataframe of metrics, eg:
+        functools.partial(evaluate_dca, time_between_action=60*60*24*7)
+    Every path gets its own seed from seed, so the same seed always gives the same results no matter the batch size.
+    Returns a dataframe with a row of metrics for each path.
+    """
+    # Each path needs about 4 float arrays of n_steps+1 while it is evaluated
+    bytes_per_path = 4*8*(n_steps+1)
+    batch_size = max(1, max_batch_bytes//bytes_per_path)
+    seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    results = []
+    for batch_start in range(0, n_paths, batch_size):
+        rngs = [np.random.default_rng(path_seed) for path_seed in seeds[batch_start:batch_start+batch_size]]
+        prices = generate_paths(model, start_price, rngs, n_steps, step_seconds)
+        results.append(evaluate(prices, step_seconds=step_seconds))
+    results = pd.concat(results, ignore_index=True)
+    results.index.names = ['path']
+    return results
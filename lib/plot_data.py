@@ -0,0 +1,81 @@
+"""
+Plotting data for create_plots.ipynb.
+Returns history files have a row for every minute, which is far more points than a graph can show.
+Each line is cut down to a set number of points with Largest-Triangle-Three-Buckets (LTTB),
+which keeps the peaks and troughs, and the cut down lines are saved so graphs can be remade in seconds.
+"""
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+
+def plot_cache_path(file_name=''):
+    """Path to the saved plotting data."""
+    return f'results\\plot_cache\\{file_name}'
+
+def lttb_indices(x, y, points):
+    """
+    Indices of the points to keep when cutting x, y down to `points` points with Largest-Triangle-Three-Buckets.
+    The first and last points are always kept. The rest are split into buckets and each bucket keeps the point
+    that makes the largest triangle with the last kept point and the average of the next bucket.
+    """
+    if points < 3:
+        raise ValueError('points must be 3 or more')
+    row_count = len(x)
+    if points >= row_count:
+        return np.arange(row_count)
+    # Shift x so the sums below stay small (timestamps are large numbers)
+    x = np.asarray(x, dtype=float)-float(x[0])
+    y = np.asarray(y, dtype=float)
+    # Bucket edges for every point between the first and last
+    edges = np.linspace(1, row_count-1, points-1).astype(np.int64)
+    # Average of each bucket, from prefix sums
+    bucket_sizes = np.diff(edges)
+    average_x = np.diff(np.r_[0, np.cumsum(x)][edges])/bucket_sizes
+    average_y = np.diff(np.r_[0, np.cumsum(y)][edges])/bucket_sizes
+    # The bucket after the last one is just the last point
+    average_x = np.r_[average_x[1:], x[-1]]
+    average_y = np.r_[average_y[1:], y[-1]]
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = row_count-1
+    last_kept = 0
+    for bucket in range(points-2):
+        start, end = edges[bucket], edges[bucket+1]
+        # Twice the area of the triangle each point in the bucket makes, only the largest matters
+        areas = np.abs(
+            (x[last_kept]-average_x[bucket])*(y[start:end]-y[last_kept]) -
+            (x[last_kept]-x[start:end])*(average_y[bucket]-y[last_kept])
+        )
+        last_kept = start+int(np.argmax(areas))
+        kept[bucket+1] = last_kept
+    return kept
+
+def downsample(df, column, points=2000, x_column='timestamp'):
+    """Cut a column of df down to `points` points with LTTB. Returns a dataframe with x_column and column."""
+    df = df.dropna(subset=[x_column, column])
+    indices = lttb_indices(df[x_column].to_numpy(), df[column].to_numpy(), points)
+    return df[[x_column, column]].iloc[indices].reset_index(drop=True)
+
+def plot_series(returns_history_file, column, points=2000, x_column='timestamp', cache_dir=''):
+    """
+    LTTB cut down column of a returns history file, loaded from the cache if the file hasn't changed.
+    Cached per (file, column, points), so changing any of them or rerunning the strategy makes a new one.
+    """
+    if cache_dir == '':
+        cache_dir = plot_cache_path()
+    file_stats = os.stat(returns_history_file)
+    key = hashlib.sha1(repr((
+        os.path.abspath(returns_history_file), file_stats.st_size, file_stats.st_mtime_ns, column, points, x_column
+    )).encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f'{key}.csv')
+    if os.path.exists(path):
+        return pd.read_csv(path)
+    # Only read the columns we need
+    series = downsample(pd.read_csv(returns_history_file, usecols=[x_column, column]), column, points, x_column)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write to a temporary file first so a crash can't leave a half written file
+    series.to_csv(path+'.tmp', index=False)
+    os.replace(path+'.tmp', path)
+    return series
@@ -0,0 +1,118 @@
+"""
+Query layer for Overall_Results.csv, used by the analysis notebooks.
+Results are loaded once and indexed by strategy family (DCA, FOMO, All in top...), strategy and price period,
+with the time between actions parsed out of names like 'DCA every 7 days'.
+Filters use the indexes instead of rescanning the results, and pairwise differences between every pair of strategies
+are worked out in one array operation.
+"""
+import re
+import numpy as np
+import pandas as pd
+import lib.base_strategy as bs
+
+# Seconds in each unit used by display_time in the strategy names
+NAME_UNITS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 60*60,
+    'day': 60*60*24,
+    'week': 60*60*24*7
+}
+# Columns that are labels, every other column is a metric
+LABEL_COLUMNS = ['Strategy', 'Price_Period', 'Family', 'Time Between Action', 'Resolution']
+
+def parse_strategy_name(name):
+    """
+    Split a strategy name into (family, time between action in seconds, resolution), eg:
+        'DCA every 7 days' -> ('DCA', 604800, '1m')
+        'DCA every 1 day (1h candles)' -> ('DCA', 86400, '1h')
+        'All in top' -> ('All in top', nan, '1m')
+    """
+    name = name.strip()
+    resolution = '1m'
+    candles = re.search(r' \((\w+) candles\)$', name)
+    if candles:
+        resolution = candles.group(1)
+        name = name[:candles.start()]
+    time_between_action = np.nan
+    every = re.search(r' every ([\d.]+) (second|minute|hour|day|week)s?$', name)
+    if every:
+        time_between_action = float(every.group(1))*NAME_UNITS[every.group(2)]
+    # The family is everything before the schedule (every x, daily at, monthly on...)
+    family = re.split(r' (?:every|daily|monthly) ', name, maxsplit=1)[0]
+    return family, time_between_action, resolution
+
+class ResultsQuery:
+    """Overall_Results loaded once with indexes on family, strategy and price period."""
+    def __init__(self, results_df=None):
+        if results_df is None:
+            results_df = pd.read_csv(bs.results_path('Overall_Results'))
+        results_df = results_df.copy()
+        results_df['Strategy'] = results_df['Strategy'].str.strip()
+        # Sharpe and Sortino can be saved as 'None', make every metric a number
+        for column in results_df.columns:
+            if column not in LABEL_COLUMNS:
+                results_df[column] = pd.to_numeric(results_df[column], errors='coerce')
+        parsed = [parse_strategy_name(name) for name in results_df['Strategy']]
+        results_df['Family'] = [family for family, _, _ in parsed]
+        results_df['Time Between Action'] = [seconds for _, seconds, _ in parsed]
+        results_df['Resolution'] = [resolution for _, _, resolution in parsed]
+        # Order strategies by family and then how often they act, so tables read hour, day, week...
+        self.results_df = results_df.sort_values(
+            ['Family', 'Resolution', 'Time Between Action', 'Strategy', 'Price_Period']
+        ).reset_index(drop=True)
+        # Rows of each family, strategy and price period
+        self.indexes = {
+            column: self.results_df.groupby(column).indices
+            for column in ['Family', 'Strategy', 'Price_Period', 'Resolution']
+        }
+
+    def strategies(self):
+        """Every strategy, in family and time between action order."""
+        return list(self.results_df['Strategy'].unique())
+
+    def price_periods(self):
+        """Every price period."""
+        return sorted(self.indexes['Price_Period'].keys())
+
+    def row_positions(self, strategies=None, families=None, price_periods=None, resolutions=None):
+        """Positions of the rows that match every filter given (each filter is a list of values)."""
+        positions = np.arange(len(self.results_df.index))
+        for column, values in [('Strategy', strategies), ('Family', families),
+                               ('Price_Period', price_periods), ('Resolution', resolutions)]:
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            index = self.indexes[column]
+            matches = [index[value] for value in values if value in index]
+            positions = np.intersect1d(positions, np.concatenate(matches) if matches else [])
+        return positions
+
+    def rows(self, **filters):
+        """Results rows that match the filters (see row_positions)."""
+        return self.results_df.iloc[self.row_positions(**filters)]
+
+    def pivot(self, metric, **filters):
+        """Table of a metric with a row per price period and a column per strategy."""
+        rows = self.rows(**filters)
+        table = rows.pivot(index='Price_Period', columns='Strategy', values=metric)
+        # Keep the family/time order instead of alphabetical
+        return table[list(rows['Strategy'].unique())]
+
+    def differences(self, metric, **filters):
+        """
+        Difference in a metric between every pair of strategies for each price period.
+        Returns a table with a row per price period and a column per (strategy 1, strategy 2) pair,
+        holding strategy 1's value minus strategy 2's.
+        """
+        table = self.pivot(metric, **filters)
+        values = table.to_numpy(dtype=float)
+        # periods x strategy 1 x strategy 2, all pairs in one operation
+        pair_values = values[:, :, np.newaxis]-values[:, np.newaxis, :]
+        strategy_count = len(table.columns)
+        first, second = np.triu_indices(strategy_count, k=1)
+        columns = pd.MultiIndex.from_arrays(
+            [table.columns[first], table.columns[second]], names=['Strategy 1', 'Strategy 2']
+        )
+        return pd.DataFrame(pair_values[:, first, second], index=table.index, columns=columns)
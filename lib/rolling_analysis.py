@@ -0,0 +1,88 @@
+"""
+Rolling start date analysis.
+Instead of hand picking price periods, find how DCA and going all in would have done for a fixed horizon
+(eg 1 year) starting on every minute or day in the price data.
+Uses prefix sums of 1/price so every start date is calculated at once in O(n), instead of running a Strategy for each one.
+"""
+import numpy as np
+import pandas as pd
+
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+
+def grid_prices(price_df, step_seconds=60):
+    """
+    Put prices on an evenly spaced grid of timestamps, step_seconds apart, so missing rows don't shift the math.
+    Returns the grid timestamps, buy prices and value prices.
+    Buy prices are the first price at or after each grid time, the same price Strategy.go_to_next_action would buy at.
+    Value prices are the last price at or before each grid time.
+    """
+    timestamps = price_df['timestamp'].to_numpy(dtype=np.int64)
+    prices = price_df['decimal_price'].to_numpy(dtype=float)
+    grid = np.arange(timestamps[0], timestamps[-1]+1, step_seconds)
+    buy_prices = prices[np.searchsorted(timestamps, grid, side='left')]
+    value_prices = prices[np.searchsorted(timestamps, grid, side='right')-1]
+    return grid, buy_prices, value_prices
+
+def strided_prefix_sums(values, stride):
+    """
+    Prefix sums that skip stride rows at a time, aka sums[m] = values[m]+values[m-stride]+values[m-2*stride]+...
+    The sum of values[i+stride], values[i+2*stride] ... values[i+n*stride] is then sums[i+n*stride]-sums[i].
+    """
+    rows = -(-len(values)//stride)
+    padded = np.zeros(rows*stride)
+    padded[:len(values)] = values
+    # Each column of the reshaped array holds every value with the same remainder (index % stride)
+    return padded.reshape(rows, stride).cumsum(axis=0).ravel()[:len(values)]
+
+def rolling_outcomes(price_df, horizon, time_between_action, start_every=60*60*24, starting_usd=10000,
+                     initial_buy_percent=.3, trading_fee=.997, step_seconds=60):
+    """
+    Outcome of base_dca and base_all_in for every start date that has a full horizon of data after it.
+    horizon, time_between_action and start_every are in seconds and must be multiples of step_seconds.
+    DCA does an initial buy of initial_buy_percent, then splits the rest evenly over a buy every time_between_action.
+    Returns a dataframe with a row per start date.
+    """
+    for name, seconds in [('horizon', horizon), ('time_between_action', time_between_action),
+                          ('start_every', start_every)]:
+        if seconds % step_seconds != 0:
+            raise ValueError(f'{name} must be a multiple of step_seconds')
+    number_of_buys = horizon//time_between_action
+    if number_of_buys == 0:
+        raise ValueError('horizon not long enough for the DCA period')
+    grid, buy_prices, value_prices = grid_prices(price_df, step_seconds)
+    horizon_steps = horizon//step_seconds
+    buy_steps = time_between_action//step_seconds
+    starts = np.arange(0, len(grid)-horizon_steps, start_every//step_seconds)
+    if len(starts) == 0:
+        raise ValueError('Price data is shorter than the horizon')
+    ends = starts+horizon_steps
+
+    # ETH from the DCA buys after the initial buy = (dca_buy_amount*fee) * sum of 1/price at each buy
+    inverse_price_sums = strided_prefix_sums(1/buy_prices, buy_steps)
+    last_buys = starts+number_of_buys*buy_steps
+    dca_buy_amount = starting_usd*(1-initial_buy_percent)/number_of_buys
+    dca_eth = trading_fee*(
+        starting_usd*initial_buy_percent/buy_prices[starts] +
+        dca_buy_amount*(inverse_price_sums[last_buys]-inverse_price_sums[starts])
+    )
+    all_in_eth = trading_fee*starting_usd/buy_prices[starts]
+
+    end_prices = value_prices[ends]
+    years = horizon/SECONDS_IN_YEAR
+    dca_value = dca_eth*end_prices
+    all_in_value = all_in_eth*end_prices
+    outcomes = pd.DataFrame({
+        'start_timestamp': grid[starts],
+        'end_timestamp': grid[ends],
+        'start_price': buy_prices[starts],
+        'end_price': end_prices,
+        'DCA ETH': dca_eth,
+        'DCA Total Value': dca_value,
+        'DCA Final Annual % Return': ((dca_value*100/starting_usd)-100)/years,
+        'All in ETH': all_in_eth,
+        'All in Total Value': all_in_value,
+        'All in Final Annual % Return': ((all_in_value*100/starting_usd)-100)/years
+    })
+    outcomes.index.names = ['index']
+    return outcomes
@@ -0,0 +1,127 @@
+"""
+Action schedules for strategies.
+A schedule turns a rule (every x seconds, every Monday, the start of each month...) into the rows of price_df
+that a strategy should act on, in one vectorized pass over the timestamps.
+Strategy.run_schedule then just steps through those rows, no searching is done while the strategy runs.
+All calendar times are in UTC.
+"""
+import numpy as np
+
+SECONDS_IN_A_DAY = 60*60*24
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def first_rows_at_or_after(timestamps, targets):
+    """
+    Row of the first timestamp at or after each target time, skipping targets after the last timestamp.
+    If missing data makes two targets land on the same row, the row is only returned once.
+    """
+    rows = np.searchsorted(timestamps, targets, side='left')
+    return np.unique(rows[rows < len(timestamps)])
+
+class Schedule:
+    """Base schedule class, specific schedules should inherent this."""
+    name = ''
+
+    def compile(self, timestamps, start_index=0):
+        """
+        Override this.
+        Returns an int array of the rows to act on after start_index, in order.
+        """
+        raise NotImplementedError('Override this.')
+
+class Every(Schedule):
+    """
+    Act every `seconds` seconds, the same rows Strategy.go_to_next_action stops at.
+    Each action is timed from the row of the last action, so missing data pushes the later actions back.
+    """
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError('seconds must be more than 0')
+        self.seconds = seconds
+        self.name = f'every {seconds} seconds'
+
+    def compile(self, timestamps, start_index=0):
+        rows = []
+        if len(timestamps) == 0:
+            return np.array(rows, dtype=np.int64)
+        # With few actions (eg buying weekly on minute data) search for each one instead of every row
+        expected_actions = (timestamps[-1]-timestamps[start_index])/self.seconds
+        if expected_actions*64 < len(timestamps)-start_index:
+            row = int(np.searchsorted(timestamps, timestamps[start_index]+self.seconds, side='left'))
+            while row < len(timestamps):
+                rows.append(row)
+                row = int(np.searchsorted(timestamps, timestamps[row]+self.seconds, side='left'))
+            return np.array(rows, dtype=np.int64)
+        # Row we would move to next from every row, in one pass
+        next_rows = np.searchsorted(timestamps, timestamps+self.seconds, side='left')
+        row = next_rows[start_index]
+        # Follow the next rows until we go past the end, this is just an array lookup per action
+        while row < len(timestamps):
+            rows.append(row)
+            row = next_rows[row]
+        return np.array(rows, dtype=np.int64)
+
+class CalendarSchedule(Schedule):
+    """
+    Base class for schedules that act at set calendar times.
+    Acts on the first row at or after each time, aka the first trading minute if there is missing data.
+    """
+    def target_days(self, days):
+        """
+        Override this.
+        Takes every day (as days since 1970-01-01) in the price data and returns the days to act on.
+        """
+        raise NotImplementedError('Override this.')
+
+    def __init__(self, hour=0, minute=0):
+        if not 0 <= hour < 24 or not 0 <= minute < 60:
+            raise ValueError('hour must be 0-23 and minute must be 0-59')
+        self.hour = hour
+        self.minute = minute
+
+    def compile(self, timestamps, start_index=0):
+        if len(timestamps) == 0:
+            return np.array([], dtype=np.int64)
+        days = np.arange(timestamps[0]//SECONDS_IN_A_DAY, timestamps[-1]//SECONDS_IN_A_DAY+1)
+        targets = self.target_days(days)*SECONDS_IN_A_DAY+self.hour*60*60+self.minute*60
+        rows = first_rows_at_or_after(timestamps, targets)
+        return rows[rows > start_index]
+
+class Daily(CalendarSchedule):
+    """Act once a day at hour:minute UTC."""
+    def __init__(self, hour=0, minute=0):
+        super().__init__(hour, minute)
+        self.name = f'daily at {hour:02}:{minute:02} UTC'
+
+    def target_days(self, days):
+        return days
+
+class Weekly(CalendarSchedule):
+    """Act once a week on weekday (0 = Monday) at hour:minute UTC."""
+    def __init__(self, weekday=0, hour=0, minute=0):
+        if not 0 <= weekday < 7:
+            raise ValueError('weekday must be 0 (Monday) to 6 (Sunday)')
+        super().__init__(hour, minute)
+        self.weekday = weekday
+        self.name = f'every {WEEKDAYS[weekday]} at {hour:02}:{minute:02} UTC'
+
+    def target_days(self, days):
+        # 1970-01-01 was a Thursday (weekday 3)
+        return days[(days+3) % 7 == self.weekday]
+
+class Monthly(CalendarSchedule):
+    """
+    Act once a month on day (1-28) at hour:minute UTC.
+    Monthly(1) is the first trading minute of each month.
+    """
+    def __init__(self, day=1, hour=0, minute=0):
+        # Every month has at least 28 days
+        if not 1 <= day <= 28:
+            raise ValueError('day must be 1-28')
+        super().__init__(hour, minute)
+        self.day = day
+        self.name = f'monthly on day {day} at {hour:02}:{minute:02} UTC'
+
+    def target_days(self, days):
+        months = np.unique(days.astype('datetime64[D]').astype('datetime64[M]'))
+        return (months.astype('datetime64[D]')+(self.day-1)).astype(np.int64)
@@ -0,0 +1,142 @@
+"""
+Sensitivity of base_dca to its two parameters, the initial buy % and the time between buys.
+Every (initial buy %, time between action) pair of a grid is worked out at once instead of running a Strategy for each.
+For a fixed time between action, the total value at every row is a weighted mix of two paths:
+going all in at the start and DCA'ing everything, weighted by the initial buy %.
+So the % Return of every row is linear in the initial buy %, and the mean, std and downside std that Sharpe
+and Sortino need come from a few sums per time between action, for every initial buy % at once.
+"""
+import numpy as np
+import pandas as pd
+import lib.schedules as sc
+
+# Convert seconds to year (account for a fourth of a leap year day)
+SECONDS_IN_YEAR = 60*60*24*365.25
+METRICS = ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns']
+
+def inverse_years(timestamps):
+    """1/years since the start for every row, 0 for the first row so its return is 0 (the same as Strategy)."""
+    years = (timestamps[1:]-timestamps[0])/SECONDS_IN_YEAR
+    return np.r_[0, 1/years]
+
+def all_in_returns(prices, inverse_years, trading_fee=.997):
+    """Decimal annualized returns of every row for going all in at the start, the fee is taken out of the ETH we get."""
+    return (trading_fee*prices/prices[0]-1)*inverse_years
+
+def dca_returns(timestamps, prices, inverse_years, time_between_action, trading_fee=.997):
+    """
+    Decimal annualized returns of every row for DCA'ing everything, buying on the same rows base_dca buys on.
+    The returns of base_dca with an initial buy fraction of p are then p*all_in_returns+(1-p)*dca_returns.
+    """
+    # Same number of buys as base_dca, rounded down
+    number_of_buys = int((timestamps[-1]-timestamps[0])/time_between_action)
+    if number_of_buys == 0:
+        raise ValueError(f'Price_period not long enough for dca period of {time_between_action} seconds')
+    buy_rows = sc.Every(time_between_action).compile(timestamps)
+    # Rows between buys all hold the same ETH and USD, so repeat the balance after each buy over its rows
+    rows_held = np.diff(np.r_[0, buy_rows, len(prices)])
+    # ETH and USD spent for each USD put in
+    eth_held = np.repeat(np.r_[0, np.cumsum(trading_fee/prices[buy_rows])], rows_held)
+    buys_made = np.repeat(np.arange(len(buy_rows)+1), rows_held)
+    # Total value-1 = USD left+ETH*price-1 = ETH*price-USD spent
+    return (eth_held*prices-buys_made)*(inverse_years/number_of_buys)
+
+def ratios(mean_return, sigma):
+    """Sharpe or Sortino from the mean return and sigma, NaN where sigma is 0 or undefined (None in Strategy)."""
+    annual_risk_free_return = .03
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (mean_return-annual_risk_free_return)/np.where(sigma > 0, sigma, np.nan)
+
+def surface_column(all_in, dca, fractions):
+    """
+    Final Annual % Return, Sharpe and Sortino for every initial buy fraction (sorted, 0 to 1) for one time between action.
+    Each row's return is r = dca+fraction*(all_in-dca), so sums of r and r**2 are quadratics in the fraction.
+    """
+    row_count = len(dca)
+    difference = all_in-dca
+    # Shift by the means so the sums of squares don't lose precision, std doesn't change with a shift
+    dca_shift = dca.mean()
+    difference_shift = difference.mean()
+    shifted_dca = dca-dca_shift
+    shifted_difference = difference-difference_shift
+    mean_return = dca_shift+fractions*difference_shift
+    sum_of_squares = (
+        np.dot(shifted_dca, shifted_dca) +
+        2*fractions*np.dot(shifted_dca, shifted_difference) +
+        fractions**2*np.dot(shifted_difference, shifted_difference)
+    )
+    sigma = np.sqrt(np.maximum(sum_of_squares, 0)/(row_count-1))
+
+    # Sortino only uses negative returns. A row is negative for every fraction on one side of where its return
+    # crosses 0, so find that point in the sorted fractions and add the row's sums to every fraction it's negative for.
+    # Rows that are negative for neither end of the grid can't be negative in between (r is linear), skip those.
+    negative = ((dca+fractions[0]*difference) < 0) | ((dca+fractions[-1]*difference) < 0)
+    dca_part, difference_part = dca[negative], difference[negative]
+    shifted_dca_part, shifted_difference_part = shifted_dca[negative], shifted_difference[negative]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = -dca_part/difference_part
+    rising = difference_part > 0
+    # Rising rows are negative below the crossing (fractions[:first]), falling rows above it (fractions[first:])
+    first = np.where(
+        rising,
+        np.searchsorted(fractions, crossing, side='left'),
+        np.searchsorted(fractions, crossing, side='right')
+    )
+    # Flat rows are negative for every fraction
+    first[difference_part == 0] = 0
+    starts = np.where(rising, 0, first)
+    ends = np.where(rising, first, len(fractions))
+    # Count, sum and sum of squares terms, each added to a range of fractions with a difference array
+    terms = [
+        np.ones(len(dca_part)),
+        shifted_dca_part,
+        shifted_difference_part,
+        shifted_dca_part**2,
+        shifted_dca_part*shifted_difference_part,
+        shifted_difference_part**2
+    ]
+    sums = []
+    for term in terms:
+        ranges = (np.bincount(starts, term, len(fractions)+1) - np.bincount(ends, term, len(fractions)+1))
+        sums.append(ranges.cumsum()[:-1])
+    count, dca_sum, difference_sum, dca_squares, cross_sum, difference_squares = sums
+    negative_sum = dca_sum+fractions*difference_sum
+    negative_squares = dca_squares+2*fractions*cross_sum+fractions**2*difference_squares
+    with np.errstate(divide='ignore', invalid='ignore'):
+        downside_variance = (negative_squares-negative_sum**2/count)/(count-1)
+    # Less than 2 negative returns has no std (NaN), the same as Strategy
+    downside_sigma = np.where(count > 1, np.sqrt(np.maximum(downside_variance, 0)), np.nan)
+
+    final_returns = dca[-1]+fractions*difference[-1]
+    return {
+        'Final Annual % Return': np.round(final_returns*100, 4),
+        'Sharpe of Returns': np.round(ratios(mean_return, sigma), 4),
+        'Sortino of Returns': np.round(ratios(mean_return, downside_sigma), 4)
+    }
+
+def dca_surface(price_df, initial_buy_percents, times_between_action, trading_fee=.997):
+    """
+    Final Annual % Return, Sharpe and Sortino of base_dca for every initial buy % (0 to 100) and
+    time between action (seconds) pair.
+    Returns a table with a row per initial buy % and a column per (metric, time between action),
+    so surface['Sharpe of Returns'] is a heatmap of initial buy % vs time between action.
+    Sharpe and Sortino are calculated from unrounded returns, Strategy rounds % Return first so they can differ slightly.
+    """
+    initial_buy_percents = np.unique(np.asarray(initial_buy_percents, dtype=float))
+    if initial_buy_percents[0] < 0 or initial_buy_percents[-1] > 100:
+        raise ValueError('initial_buy_percents must be between 0 and 100')
+    fractions = initial_buy_percents/100
+    timestamps = price_df['timestamp'].to_numpy(dtype=np.int64)
+    prices = price_df['decimal_price'].to_numpy(dtype=float)
+    # Only the DCA path changes with the time between action
+    inverse_year_weights = inverse_years(timestamps)
+    all_in = all_in_returns(prices, inverse_year_weights, trading_fee)
+    columns = {}
+    for time_between_action in times_between_action:
+        dca = dca_returns(timestamps, prices, inverse_year_weights, time_between_action, trading_fee)
+        for metric, values in surface_column(all_in, dca, fractions).items():
+            columns[(metric, time_between_action)] = values
+    surface = pd.DataFrame(columns, index=pd.Index(initial_buy_percents, name='Initial Buy %'))
+    surface.columns.names = ['Metric', 'Time Between Action']
+    # Group the columns by metric
+    return surface[METRICS]
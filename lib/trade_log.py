@@ -0,0 +1,76 @@
+"""
+Trade log (blotter) of every buy and sell a strategy makes.
+Trades are stored in numpy arrays that double in size when they fill up, so adding a trade is O(1) on average
+and millions of trades don't need a Python object each.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+BUY = 1
+SELL = -1
+# Column name: dtype of each trade record
+TRADE_COLUMNS = {
+    'index': np.int64,
+    'timestamp': np.int64,
+    # BUY (1) or SELL (-1)
+    'side': np.int8,
+    # ETH received for buys, ETH sold for sells
+    'eth': np.float64,
+    # USD spent for buys, USD value of the ETH sold (before fees) for sells
+    'usd': np.float64,
+    'price': np.float64,
+    # Fee paid in USD
+    'fee': np.float64
+}
+
+class TradeLog:
+    """Append only log of trades."""
+    def __init__(self, capacity=64):
+        self.trade_count = 0
+        self.arrays = {column: np.zeros(capacity, dtype=dtype) for column, dtype in TRADE_COLUMNS.items()}
+
+    def __len__(self):
+        return self.trade_count
+
+    def append(self, index, timestamp, side, eth, usd, price, fee):
+        """Add a trade to the end of the log."""
+        if self.trade_count == len(self.arrays['index']):
+            # Double the size so we only have to copy log(n) times
+            for column, values in self.arrays.items():
+                self.arrays[column] = np.concatenate([values, np.zeros(max(len(values), 1), dtype=values.dtype)])
+        row = self.trade_count
+        self.arrays['index'][row] = index
+        self.arrays['timestamp'][row] = timestamp
+        self.arrays['side'][row] = side
+        self.arrays['eth'][row] = eth
+        self.arrays['usd'][row] = usd
+        self.arrays['price'][row] = price
+        self.arrays['fee'][row] = fee
+        self.trade_count += 1
+
+    def column(self, column):
+        """Array of a column for every trade made so far (a view, not a copy)."""
+        return self.arrays[column][:self.trade_count]
+
+    def to_df(self):
+        """Trades as a DataFrame."""
+        return pd.DataFrame({column: self.column(column) for column in TRADE_COLUMNS})
+
+    def save(self, path):
+        """Save the trades as a .npz file."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, 'wb') as trade_file:
+            np.savez(trade_file, **{column: self.column(column) for column in TRADE_COLUMNS})
+
+    @classmethod
+    def load(cls, path):
+        """Load trades saved with save."""
+        with np.load(path) as saved:
+            trade_log = cls(capacity=max(len(saved['index']), 1))
+            for column, dtype in TRADE_COLUMNS.items():
+                trade_log.arrays[column][:len(saved[column])] = saved[column].astype(dtype)
+            trade_log.trade_count = len(saved['index'])
+        return trade_log
@@ -5,7 +5,6 @@ Inherits base_strategy.
 Takes in how often you want to trade (in days) as an input. 
 Fear and Greed data is daily so this should be 1 day or greater.
 """
-from datetime import datetime, timezone, timedelta
 import time
 import pandas as pd
 import lib.base_strategy as bs
@@ -40,8 +39,14 @@ class base_FOMO(bs.Strategy):
     Base FOMO strategy class. Specific strategies should just change the time_between_action variable.
     Fear and Greed data is daily so this should be 1 day or greater and starts 02-01-2018
     """
-    def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True, fear_and_greed_path='default'):
+    default_times_between_action = [60*60*24]
+    auxiliary = ['fear_and_greed']
+
+    def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True, fear_and_greed_path='default', resolution='1m'):
         self.buy_sell_period = display_time(time_between_action)
+        # Test if we should use the default fear and greed csv path or use a new one for testing
+        if fear_and_greed_path != 'default':
+            self.auxiliary_paths = {'fear_and_greed': fear_and_greed_path}
         super().__init__(
             name=f'FOMO every {self.buy_sell_period}',
             starting_usd=starting_usd,
@@ -49,15 +54,11 @@ class base_FOMO(bs.Strategy):
             price_period_name=price_period_name,
             price_df=price_df,
             starting_eth=starting_eth,
-            save_results=save_results
+            save_results=save_results,
+            resolution=resolution
         )
         self.number_of_buys = None
         self.done_buying = False
-        # Test if we should use the default fear and greed csv path or use a new one for testing
-        if fear_and_greed_path == 'default':
-            self.fng_df = pd.read_csv(bs.full_path('fear_and_greed.csv'), index_col='index')
-        else:
-            self.fng_df = pd.read_csv(fear_and_greed_path, index_col='index')
 
     def buy_sell_logic(self):
         """
@@ -69,19 +70,10 @@ class base_FOMO(bs.Strategy):
         This buy and sell logic was made up to simulate high volume swing trading.
         """
         # find FnG for current day
-        current_date = (datetime.fromtimestamp(self.current_time, tz=timezone.utc)-timedelta(days=1)).strftime('%m-%d-%Y')
-
-        # NOTE: Subtract 1 day as we cannot use the current date's FnG data due to it using future data from that same day.
+        # NOTE: The fear_and_greed series is lagged 1 day as we cannot use the current date's FnG data due to it using
+        # future data from that same day.
         # EG, if the market dumps late in the day, the FnG may turn fearful which could impact our buy in the morning.
-        current_fng = self.fng_df['value'].loc[self.fng_df['date'] == current_date]
-
-        if current_fng.empty:
-            print(f'Current date: {current_date}, Current timestamp: {self.current_time}')
-            raise LookupError('No Fear and Greed data for date found. Fear and greed data starts 02-01-2018')
-        elif len(current_fng.index) > 1:
-            raise ValueError('Somehow found more than one Fear and Greed value for a single day')
-        else:
-            current_fng = current_fng.values[0]
+        current_fng = self.auxiliary_value('fear_and_greed')
 
         # buy if > 60, aka greedy
         if current_fng >= 60:
@@ -133,13 +125,11 @@ class base_FOMO(bs.Strategy):
         # Give a rough measure of how long this took
         real_start_time = time.time()
         
-        # loop until we hit the LoopComplete exception
-        while not self.done_buying:
-            try:
-                self.buy_sell_logic()
-                self.go_to_next_action()
-            except bs.LoopComplete:
-                self.done_buying = True
+        # Trade at the start and then at every action row of the schedule
+        self.buy_sell_logic()
+        for _ in self.run_schedule():
+            self.buy_sell_logic()
+        self.done_buying = True
 
         # Now add data to the results csv files
         self.add_data_to_results()
@@ -11,6 +11,8 @@ class base_all_in(bs.Strategy):
     """
     All in strategy class. Doesn't take any modifiers.
     """
+    # We don't really need this but we just have to pick a number that won't be larger than our price_period
+    default_times_between_action = [60*60*24*28]
     def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True):
         super().__init__(
             name='All in start',
@@ -35,12 +37,9 @@ class base_all_in(bs.Strategy):
         usd_eth_to_buy = self.starting_usd
         self.buy_eth(usd_eth_to_buy=usd_eth_to_buy)
 
-        # loop until we hit the LoopComplete exception
-        while not self.done_buying:
-            try:
-                self.go_to_next_action()
-            except bs.LoopComplete:
-                self.done_buying = True
+        # Nothing else to do, move to the end so returns_df is filled in
+        self.move_to_end()
+        self.done_buying = True
 
         # Now add data to the results csv files
         self.add_data_to_results()
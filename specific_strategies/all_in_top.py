@@ -13,6 +13,8 @@ class base_all_in_top(bs.Strategy):
     """
     All in top strategy class. Doesn't take any modifiers.
     """
+    # The shorter the time, the better the accuracy for this
+    default_times_between_action = [60*60*24*.1]
     def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True):
         super().__init__(
             name='All in top',
@@ -38,9 +40,11 @@ class base_all_in_top(bs.Strategy):
         # Find the index with the max price for this price_period
         index_at_max = self.price_df['decimal_price'].idxmax()
         # Find the max price for this price_period
-        max_fraction_price = bs.frac(self.price_df['fraction_price'].iloc[index_at_max])
+        max_fraction_price = self.price_at(index_at_max)
 
-        # loop until we hit the LoopComplete exception
+        # Steps through every action row of the schedule
+        actions = self.run_schedule()
+        # loop until the schedule is done
         while not self.done_looping:
             # Using this implementation, we aren't guaranteed to get a 100% accurate returns_df.
             # The time we buy is going to be some time AFTER the max price was achieved.
@@ -55,9 +59,8 @@ class base_all_in_top(bs.Strategy):
                 self.buy_eth(usd_eth_to_buy=self.starting_usd)
                 self.done_buying = True
                 print(f'Price bought at: {bs.unfrac(self.current_price)}')
-            try:
-                self.go_to_next_action()
-            except bs.LoopComplete:
+            # Move to the next action row, the schedule returns None once we reach the end
+            if next(actions, None) is None:
                 self.done_looping = True
 
         # In case the index_at_max is in the final time loop, check if we still need to buy
@@ -37,16 +37,26 @@ class base_dca(bs.Strategy):
     """
     Base dca strategy class. Specific strategies should just change the time_between_action variable.
     """
-    def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True):
+    # Hour, day, week, 2 weeks and 4 weeks between buys
+    default_times_between_action = [60*60, 60*60*24, 60*60*24*7, 60*60*24*14, 60*60*24*28]
+    def __init__(self, starting_usd, time_between_action, price_period_name, price_df=pd.DataFrame(), starting_eth = 0, save_results = True, resolution='1m', schedule=None):
         self.dca_period = display_time(time_between_action)
+        name = f'DCA every {self.dca_period}'
+        # Schedules (see lib/schedules.py) replace buying every time_between_action, eg: the start of every month
+        self.custom_schedule = schedule is not None
+        if self.custom_schedule:
+            self.dca_period = schedule.name
+            name = f'DCA {schedule.name}'
         super().__init__(
-            name=f'DCA every {self.dca_period}',
+            name=name,
             starting_usd=starting_usd,
             time_between_action=time_between_action,
             price_period_name=price_period_name,
             price_df=price_df,
             starting_eth=starting_eth,
-            save_results=save_results
+            save_results=save_results,
+            resolution=resolution,
+            schedule=schedule
         )
         self.number_of_buys = None
         self.dca_buy_amount = None
@@ -67,11 +77,15 @@ class base_dca(bs.Strategy):
 
         # Then do x% of remaining total per time_between_action
         total_time_in_period = self.price_df['timestamp'].iloc[-1] - self.price_df['timestamp'].iloc[0]
-        # Find out how many buy periods are in our price_period
-        self.number_of_buys = total_time_in_period/self.time_between_action
-        # Round the number of buy periods down to an int to find how many buy actions
-        # we will actually do
-        self.number_of_buys = int(self.number_of_buys)
+        if self.custom_schedule:
+            # Buy once for every row in the schedule
+            self.number_of_buys = len(self.schedule.compile(self.timestamps, self.current_index))
+        else:
+            # Find out how many buy periods are in our price_period
+            self.number_of_buys = total_time_in_period/self.time_between_action
+            # Round the number of buy periods down to an int to find how many buy actions
+            # we will actually do
+            self.number_of_buys = int(self.number_of_buys)
         if self.number_of_buys == 0:
             print('\nERROR info:')
             print(f'Time in price_period: {display_time(total_time_in_period)}')
@@ -80,13 +94,10 @@ class base_dca(bs.Strategy):
         # We want to have zero USD by the end of the DCA period so buy enough to make that happen
         self.dca_buy_amount = self.current_usd/self.number_of_buys
 
-        # loop until we hit the LoopComplete exception
-        while not self.done_buying:
-            try:
-                self.go_to_next_action()
-                self.buy_eth(self.dca_buy_amount)
-            except bs.LoopComplete:
-                self.done_buying = True
+        # Buy at every action row of the schedule
+        for _ in self.run_schedule():
+            self.buy_eth(self.dca_buy_amount)
+        self.done_buying = True
 
         # Now add data to the results csv files
         self.add_data_to_results()
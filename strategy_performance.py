@@ -0,0 +1,236 @@
+"""
+Command line runner for strategies, the same runs as run_strategies.ipynb without a notebook. EG:
+    python -m strategy_performance run --strategies dca:1h,1d all_in_start --periods all --jobs 8
+    python -m strategy_performance list
+    python -m strategy_performance fetch binance
+Strategies are found in specific_strategies/ and only imported when they are run.
+Exchange clients (and lib/api_data.py) are only imported by fetch, so backtests start fast.
+Results are saved to the same results files the notebooks use.
+"""
+import argparse
+import calendar
+import datetime
+import importlib
+import inspect
+import os
+import pkgutil
+import sys
+import time
+
+STRATEGY_PACKAGE = 'specific_strategies'
+PERIOD_FOLDER = 'price_period_csv'
+# Seconds in each time unit that can be given on the command line
+TIME_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 60*60,
+    'd': 60*60*24,
+    'w': 60*60*24*7
+}
+# Formats --start can be given in
+START_FORMATS = ['%Y-%m-%d-%H-%M-%S', '%Y-%m-%d-%H-%M']
+
+def parse_time(text):
+    """Turn a time like '90s', '1h', '2.4h', '7d' or '1w' into seconds."""
+    text = text.strip().lower()
+    if len(text) < 2 or text[-1] not in TIME_UNITS:
+        raise ValueError(f'Time must be a number followed by one of {list(TIME_UNITS.keys())}, got: {text}')
+    seconds = float(text[:-1])*TIME_UNITS[text[-1]]
+    if seconds <= 0:
+        raise ValueError(f'Time must be more than 0, got: {text}')
+    # Keep whole numbers as ints so strategy names don't change
+    return int(seconds) if seconds.is_integer() else seconds
+
+def parse_start(text):
+    """Turn a start date like '2018-01-01-00-00' or '2018-01-01-00-00-30' (UTC) into a datetime."""
+    for start_format in START_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, start_format)
+        except ValueError:
+            pass
+    raise ValueError(f'Start must be YYYY-MM-DD-HH-MM or YYYY-MM-DD-HH-MM-SS, got: {text}')
+
+def strategy_names():
+    """Names of the strategy modules in specific_strategies, without importing them."""
+    package = importlib.import_module(STRATEGY_PACKAGE)
+    return sorted(module.name for module in pkgutil.iter_modules(package.__path__))
+
+def load_strategy(module_name):
+    """Import a strategy module and return its strategy class."""
+    import lib.base_strategy as bs
+    if module_name not in strategy_names():
+        raise ValueError(f'Unknown strategy: {module_name}, must be one of {strategy_names()}')
+    module = importlib.import_module(f'{STRATEGY_PACKAGE}.{module_name}')
+    strategy_classes = [
+        member for _, member in inspect.getmembers(module, inspect.isclass)
+        if issubclass(member, bs.Strategy) and member.__module__ == module.__name__
+    ]
+    if len(strategy_classes) != 1:
+        raise ValueError(f'Expected one strategy class in {module_name}, found {len(strategy_classes)}')
+    return strategy_classes[0]
+
+def parse_strategies(specs):
+    """
+    Turn strategy specs into (strategy module, time_between_action) pairs.
+    A spec is the module name, optionally followed by the times between actions, eg 'dca:1h,1d'.
+    Without times, the strategy's default_times_between_action are used. 'all' runs every strategy with its defaults.
+    """
+    if 'all' in specs:
+        specs = strategy_names()
+    runs = []
+    for spec in specs:
+        module_name, _, times = spec.partition(':')
+        if module_name not in strategy_names():
+            raise ValueError(f'Unknown strategy: {module_name}, must be one of {strategy_names()}')
+        if times:
+            times_between_action = [parse_time(text) for text in times.split(',')]
+        else:
+            times_between_action = load_strategy(module_name).default_times_between_action
+            if not times_between_action:
+                raise ValueError(f'{module_name} has no default times, give them like {module_name}:1d')
+        runs.extend((module_name, time_between_action) for time_between_action in times_between_action)
+    return runs
+
+def find_periods(filters, folder=PERIOD_FOLDER):
+    """
+    Names of the price periods in folder that contain any of the filters (case insensitive), 'all' matches every one.
+    """
+    import lib.candle_tiers as ct
+    # Candle tiers are saved next to each price period, these aren't price periods themselves
+    tier_suffixes = tuple(f'_{tier}' for tier in ct.TIER_SECONDS if tier != '1m')
+    periods = []
+    for file_name in sorted(os.listdir(folder)):
+        period, extension = os.path.splitext(file_name)
+        if extension != '.csv' or period.endswith(tier_suffixes):
+            continue
+        if any(text.lower() == 'all' or text.lower() in period.lower() for text in filters):
+            periods.append(period)
+    return periods
+
+def set_results_lock(lock):
+    """Share the Overall_Results.csv lock with a worker process."""
+    import lib.base_strategy as bs
+    bs.RESULTS_LOCK = lock
+
+def run_strategy(module_name, time_between_action, price_period_name, starting_usd=10000, resolution='1m',
+                 save_balance_history=True, risk_frequency=None, bootstrap_replicas=0):
+    """Run one strategy on one price period and save its results. Returns the seconds it took."""
+    real_start_time = time.time()
+    strategy_class = load_strategy(module_name)
+    options = {}
+    if resolution != '1m':
+        if 'resolution' not in inspect.signature(strategy_class.__init__).parameters:
+            raise ValueError(f'{module_name} can only run on 1m data')
+        options['resolution'] = resolution
+    strategy = strategy_class(
+        starting_usd=starting_usd,
+        time_between_action=time_between_action,
+        price_period_name=price_period_name,
+        **options
+    )
+    strategy.save_balance_history = save_balance_history
+    # Sharpe and Sortino from the returns over each period instead of every row
+    strategy.risk_frequency = risk_frequency
+    # Confidence intervals for the results
+    strategy.bootstrap_replicas = bootstrap_replicas
+    strategy.run_logic()
+    return time.time()-real_start_time
+
+def run(args):
+    """Run every strategy/time on every price period, across args.jobs processes."""
+    runs = parse_strategies(args.strategies)
+    periods = find_periods(args.periods)
+    if not periods:
+        raise ValueError(f'No price periods in {PERIOD_FOLDER} match {args.periods}')
+    jobs = [
+        (module_name, time_between_action, period, args.starting_usd, args.resolution, not args.no_history,
+         parse_time(args.risk_frequency) if args.risk_frequency else None, args.bootstrap)
+        for period in periods
+        for module_name, time_between_action in runs
+    ]
+    print(f'Running {len(jobs)} strategies over {len(periods)} price periods')
+    if args.jobs == 1:
+        for job in jobs:
+            run_strategy(*job)
+        return
+    # Only use processes when we need them, spawning them takes longer than starting a single run
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    lock = multiprocessing.Lock()
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=set_results_lock, initargs=(lock,)) as executor:
+        futures = [executor.submit(run_strategy, *job) for job in jobs]
+        for future in futures:
+            # Raise any errors from the workers
+            future.result()
+
+def list_runs(args):
+    """Print the strategies and price periods that can be run."""
+    print('Strategies:')
+    for module_name in strategy_names():
+        print(f'    {module_name}')
+    print('Price periods:')
+    for period in find_periods(['all']):
+        print(f'    {period}')
+
+def fetch(args):
+    """Download all of the price data from an exchange and save it to csv_files, like init_data.ipynb."""
+    import lib.base_strategy as bs
+    # Each exchange parses dates differently, so parse --start once and give each what it expects
+    start = parse_start(args.start) if args.start else None
+    if args.exchange == 'binance':
+        from lib.get_binance_data import get_binance_data
+        # Early Binance ETH USDT data is not very good so only use 2018+ (aka 1514764800+)
+        start_date = calendar.timegm(start.timetuple())*1000 if start else 1514764800*1000
+        df_klines = get_binance_data(args.pair, start_date)
+        df_klines.to_csv(bs.full_path('Binance_ETH_all_price_data.csv'))
+    else:
+        from lib.get_coinbase_data import get_coinbase_data
+        start_date = start.strftime('%Y-%m-%d-%H-%M') if start else '2018-01-01-00-00'
+        coinbase_data = get_coinbase_data(start_date=start_date)
+        # drop index so we don't get two index columns
+        coinbase_data = coinbase_data.drop(columns=['index'])
+        coinbase_data.index.names = ['index']
+        coinbase_data.to_csv(bs.full_path('CoinBase_ETH_all_price_data'))
+    print('Done!')
+
+def make_parser():
+    """Command line arguments."""
+    parser = argparse.ArgumentParser(prog='strategy_performance', description='Run strategies on price periods.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run strategies and save their results')
+    run_parser.add_argument('--strategies', nargs='+', default=['all'],
+                            help="Strategies to run, eg 'dca:1h,1d all_in_start', defaults to all")
+    run_parser.add_argument('--periods', nargs='+', default=['all'],
+                            help='Price periods to run on (any that contain the text), defaults to all')
+    run_parser.add_argument('--jobs', type=int, default=1, help='Number of processes to use')
+    run_parser.add_argument('--starting-usd', type=float, default=10000)
+    run_parser.add_argument('--resolution', default='1m', choices=['1m', '1h', '1d'],
+                            help='Candle tier to make decisions on')
+    run_parser.add_argument('--no-history', action='store_true', help="Don't save the returns history files")
+    run_parser.add_argument('--risk-frequency', default='',
+                            help="Work out Sharpe and Sortino from returns over each period, eg '1d' for daily")
+    run_parser.add_argument('--bootstrap', type=int, default=0,
+                            help='Block bootstrap replicas to add confidence intervals to the results, eg 1000')
+    run_parser.set_defaults(function=run)
+
+    list_parser = commands.add_parser('list', help='List the strategies and price periods')
+    list_parser.set_defaults(function=list_runs)
+
+    fetch_parser = commands.add_parser('fetch', help='Download price data from an exchange')
+    fetch_parser.add_argument('exchange', choices=['binance', 'coinbase'])
+    fetch_parser.add_argument('--start', default='', help='Start date (UTC) as YYYY-MM-DD-HH-MM or YYYY-MM-DD-HH-MM-SS')
+    fetch_parser.add_argument('--pair', default='ETHUSDT', help='Binance trading pair')
+    fetch_parser.set_defaults(function=fetch)
+    return parser
+
+def main(argv=None):
+    """Run the command line arguments."""
+    args = make_parser().parse_args(argv)
+    if getattr(args, 'jobs', 1) < 1:
+        raise ValueError('jobs must be 1 or more')
+    args.function(args)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
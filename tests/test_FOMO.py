@@ -86,16 +86,17 @@ def test_out_of_FOMO_data():
     # Turns days into seconds
     days = days*seconds_in_a_day
     price_df = pd.read_csv(get_test_data_path('test'))
-    FOMO_strategy = FOMO.base_FOMO(
-        starting_usd=starting_usd,
-        time_between_action=days,
-        price_period_name='test',
-        price_df=price_df,
-        save_results=False
-    )
 
+    # Missing data is found when the strategy is made, before it runs
     failed_as_expected = False
     try:
+        FOMO_strategy = FOMO.base_FOMO(
+            starting_usd=starting_usd,
+            time_between_action=days,
+            price_period_name='test',
+            price_df=price_df,
+            save_results=False
+        )
         FOMO_strategy.run_logic()
         failed_as_expected = False
     except LookupError:
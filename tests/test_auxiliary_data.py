@@ -0,0 +1,49 @@
+"""
+Testing for the auxiliary_data.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.auxiliary_data as ax
+
+def test_as_of():
+    """
+    Each timestamp should get the last value known at timestamp-lag, or NaN if it is too old or there is none.
+    """
+    series_timestamps = [100, 200, 400]
+    series_values = [1, 2, 4]
+    timestamps = np.array([50, 100, 199, 200, 350, 450])
+    assert np.allclose(ax.as_of(series_timestamps, series_values, timestamps),
+                       [np.nan, 1, 1, 2, 2, 4], equal_nan=True)
+    assert np.allclose(ax.as_of(series_timestamps, series_values, timestamps, lag=100),
+                       [np.nan, np.nan, np.nan, 1, 2, 2], equal_nan=True)
+    # The value at 200 is too old by 350
+    assert np.allclose(ax.as_of(series_timestamps, series_values, timestamps, max_age=100),
+                       [np.nan, 1, 1, 2, np.nan, 4], equal_nan=True)
+
+def test_fear_and_greed_matches_dates():
+    """
+    The lagged fear and greed series should give the value from the day before each price row.
+    Looks at files: test_daily.csv and test_daily_fng.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test_daily'))
+    fng_df = pd.read_csv(get_test_data_path('test_daily_fng'))
+    timestamps = price_df['timestamp'].to_numpy()
+    values = ax.AUXILIARY_SERIES['fear_and_greed'].load(get_test_data_path('test_daily_fng'), timestamps)
+    previous_dates = (pd.to_datetime(timestamps, unit='s')-pd.Timedelta(days=1)).strftime('%m-%d-%Y')
+    expected = [fng_df['value'].loc[fng_df['date'] == date].values[0] for date in previous_dates]
+    assert list(values) == expected
+
+def test_check_coverage():
+    """
+    Missing data at an action row should raise a LookupError, missing data at other rows is fine.
+    """
+    timestamps = np.array([0, 60, 120, 180])
+    values = np.array([1, np.nan, 3, 4])
+    ax.check_coverage('testing', values, timestamps, np.array([0, 2, 3]))
+    with pt.raises(LookupError):
+        ax.check_coverage('testing', values, timestamps, np.array([0, 1]))
+
+if __name__ == "__main__":
+    pt.main(['tests/test_auxiliary_data.py'])
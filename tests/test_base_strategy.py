@@ -95,6 +95,10 @@ def delete_test_files():
         os.remove(bs.returns_history_path(returns_history))
     except FileNotFoundError:
         pass
+    try:
+        os.remove(bs.trade_log_path(f'{name}_{price_period_name}_trades'))
+    except FileNotFoundError:
+        pass
 
 def create_strat_class():
     """
@@ -739,6 +743,8 @@ def test_add_data_to_results():
             'Median Annual % Return': round(testing_strat.returns_df['% Return'].median(), 4),
             # - % Total Returns (in USD)
             'Final Annual % Return': bs.unfrac(testing_strat.get_returns()),
+            # - Money weighted % return, checked in test_irr.py
+            'Money Weighted Annual % Return': testing_strat.money_weighted_return(),
             # Median-Mean % Return (aka different is the positional average from the numerical average)
             'Median-Mean % Return': round(
                 testing_strat.returns_df['% Return'].median()-testing_strat.returns_df['% Return'].mean(),
@@ -757,7 +763,9 @@ def test_add_data_to_results():
             # - (Negative) Risk vs Rewards of returns (Sortino Ratio)
             'Sortino of Returns': None, # we have no negative returns for this testing price_period
             # - Volatility of price for time period (standard deviation)
-            'Std of Price': round(testing_strat.price_df['decimal_price'].std(), 2)
+            'Std of Price': round(testing_strat.price_df['decimal_price'].std(), 2),
+            # - Path risk, checked in test_drawdown_metrics
+            **testing_strat.drawdown_metrics()
     }
 
     assert compare_dicts(expected_value_dict, real_values)
@@ -819,6 +827,7 @@ def test_add_data_new_row():
         'Mean Annual % Return': [round(testing_strat.returns_df['% Return'].mean(), 4)],
         'Median Annual % Return': [round(testing_strat.returns_df['% Return'].median(), 4)],
         'Final Annual % Return': [bs.unfrac(testing_strat.get_returns())],
+        'Money Weighted Annual % Return': [testing_strat.money_weighted_return()],
         'Median-Mean % Return': [round(
             testing_strat.returns_df['% Return'].median()-testing_strat.returns_df['% Return'].mean(),
             4
@@ -830,7 +839,8 @@ def test_add_data_new_row():
         '% Return Per Trade': [bs.unfrac(testing_strat.get_returns()/testing_strat.trades_made)],
         'Sharpe of Returns': [testing_strat.sharpe_ratio_of_returns()],
         'Sortino of Returns': [testing_strat.sortino_ratio_of_returns()],
-        'Std of Price': [round(testing_strat.price_df['decimal_price'].std(), 2)]
+        'Std of Price': [round(testing_strat.price_df['decimal_price'].std(), 2)],
+        **{key: [value] for key, value in testing_strat.drawdown_metrics().items()}
     })
     # Open resulting file and see if the row was added as expected
     real_price_period_data = pd.read_csv(bs.results_path('Overall_Results'))
@@ -900,6 +910,7 @@ def test_add_data_update_row():
         'Mean Annual % Return': [round(testing_strat.returns_df['% Return'].mean(), 4)],
         'Median Annual % Return': [round(testing_strat.returns_df['% Return'].median(), 4)],
         'Final Annual % Return': [bs.unfrac(testing_strat.get_returns())],
+        'Money Weighted Annual % Return': [testing_strat.money_weighted_return()],
         'Median-Mean % Return': [round(
             testing_strat.returns_df['% Return'].median()-testing_strat.returns_df['% Return'].mean(),
             4
@@ -911,7 +922,8 @@ def test_add_data_update_row():
         '% Return Per Trade': [bs.unfrac(testing_strat.get_returns()/testing_strat.trades_made)],
         'Sharpe of Returns': [testing_strat.sharpe_ratio_of_returns()],
         'Sortino of Returns': [testing_strat.sortino_ratio_of_returns()],
-        'Std of Price': [round(testing_strat.price_df['decimal_price'].std(), 2)]
+        'Std of Price': [round(testing_strat.price_df['decimal_price'].std(), 2)],
+        **{key: [value] for key, value in testing_strat.drawdown_metrics().items()}
     })
 
     # Open resulting file and see if the row was added as expected
@@ -925,6 +937,85 @@ def test_add_data_update_row():
     assert compare_df(overall_expected_row.reset_index(drop=True), real_price_period_data.reset_index(drop=True))
 
 
+def test_drawdown_metrics():
+    """
+    Drawdown, drawdown length, time underwater and Calmar should match working them out by hand.
+    """
+    seconds_in_a_day = 60*60*24
+    price_df = pd.DataFrame({
+        'timestamp': seconds_in_a_day*numpy.arange(7),
+        'fraction_price': [frac(100)]*7,
+        'decimal_price': [100.0]*7
+    })
+    testing_strat = bs.Strategy('Testing', 100, seconds_in_a_day, 'test', price_df=price_df, save_results=False)
+    # Flat total value never goes below a previous high
+    testing_strat.total_value_history = numpy.full(7, 100.0)
+    assert testing_strat.drawdown_metrics() == {
+        'Max Drawdown %': 0, 'Max Drawdown Days': 0, '% Time Underwater': 0, 'Calmar Ratio': None
+    }
+    # Highs of 100, 110, 121 and 132, dropping to 88 after 110 and 110 after 121
+    testing_strat.total_value_history = numpy.array([100, 110, 99, 88, 121, 110, 132], dtype=float)
+    testing_strat.current_usd = frac(132)
+    testing_strat.current_time = testing_strat.end_time
+    metrics = testing_strat.drawdown_metrics()
+    assert metrics['Max Drawdown %'] == 20
+    # Below 110 for days 2 and 3
+    assert metrics['Max Drawdown Days'] == 2
+    # Days 2, 3 and 5 out of 6
+    assert metrics['% Time Underwater'] == 50
+    assert metrics['Calmar Ratio'] == round(float(testing_strat.get_returns())/20, 4)
+
+def test_risk_frequency():
+    """
+    With risk_frequency set, Sharpe and Sortino should come from the Total Value change over each period.
+    """
+    hours = 24*5
+    prices = 100*numpy.exp(numpy.cumsum(numpy.random.default_rng(0).normal(0, .02, hours+1)))
+    price_df = pd.DataFrame({
+        'timestamp': 60*60*numpy.arange(hours+1),
+        'fraction_price': [frac(price) for price in prices],
+        'decimal_price': prices
+    })
+    testing_strat = bs.Strategy('Testing', 100, 60*60, 'test', price_df=price_df, save_results=False)
+    testing_strat.buy_eth(usd_eth_to_buy=100)
+    testing_strat.move_to_end()
+    testing_strat.add_data_to_results(testing=True)
+    row_sharpe = testing_strat.sharpe_ratio_of_returns()
+
+    testing_strat.risk_frequency = 60*60*24
+    # Total value at the start of every day, the last day (row 120) is the end of the 5th day
+    daily_values = testing_strat.total_value_history[::24]
+    periods_in_year = 365.25
+    excess_returns = daily_values[1:]/daily_values[:-1]-1-.03/periods_in_year
+    expected_sharpe = excess_returns.mean()/excess_returns.std(ddof=1)*numpy.sqrt(periods_in_year)
+    downside_sigma = numpy.sqrt(numpy.mean(numpy.minimum(excess_returns, 0)**2))
+    expected_sortino = excess_returns.mean()/downside_sigma*numpy.sqrt(periods_in_year)
+    assert testing_strat.sharpe_ratio_of_returns() == round(expected_sharpe, 4)
+    assert testing_strat.sortino_ratio_of_returns() == round(expected_sortino, 4)
+    assert testing_strat.sharpe_ratio_of_returns() != row_sharpe
+    # Less than 2 full periods has no std
+    testing_strat.risk_frequency = 60*60*24*3
+    assert testing_strat.sharpe_ratio_of_returns() is None
+
+def test_returns_df_types():
+    """
+    The returns history should be typed columns, not objects.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test.csv'), index_col='index')
+    typed_strat = bs.Strategy('Testing', 100, 60*19, 'test', price_df=price_df, save_results=False)
+    typed_strat.buy_eth(usd_eth_to_buy=10)
+    typed_strat.move_to_end()
+    returns_df = typed_strat.returns_df
+    assert returns_df['timestamp'].dtype == numpy.int64
+    for column in ['decimal_price', '# of USD', '# of ETH', 'Total Value', '% Return']:
+        assert returns_df[column].dtype == numpy.float64
+    assert returns_df['# of USD'].notna().all()
+    typed_strat.add_data_to_results()
+    assert list(typed_strat.returns_df.columns) == ['timestamp', 'price', '# of USD', '# of ETH', 'Total Value', '% Return']
+    assert typed_strat.returns_df['% Return'].iloc[0] == 0
+    assert typed_strat.returns_df['Total Value'].notna().all()
+
 def test_returns_history():
     """
     Make sure returns history matches returns_df
@@ -0,0 +1,111 @@
+"""
+Testing for the bootstrap.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.bootstrap as bst
+import lib.monte_carlo as mc
+from specific_strategies import dca
+
+def test_block_indices():
+    """
+    Replica rows should be made of blocks of rows in a row, cut to the number of rows.
+    """
+    indices = bst.block_indices(np.random.default_rng(0), 95, 10)
+    assert len(indices) == 95
+    assert indices.min() >= 0 and indices.max() < 95
+    blocks = indices[:90].reshape(9, 10)
+    assert np.all(np.diff(blocks, axis=1) == 1)
+
+def test_bootstrap_metrics():
+    """
+    Steady growth looks the same however it is resampled, and the same seed should give the same replicas
+    no matter the batch size.
+    """
+    steady_value = 10000*1.0001**np.arange(2000)
+    replicas = bst.bootstrap_metrics(steady_value, 10000, n_replicas=5, block_size=100, seed=0)
+    expected = mc.returns_metrics(steady_value[np.newaxis], 10000)
+    for metric in ['Final Annual % Return', 'Sharpe of Returns']:
+        assert np.allclose(replicas[metric], expected[metric].iloc[0])
+    assert (replicas['Max Drawdown %'] == 0).all()
+
+    noisy_value = 10000*np.exp(np.cumsum(np.random.default_rng(1).normal(0, .01, 2000)))
+    replicas = bst.bootstrap_metrics(noisy_value, 10000, n_replicas=20, block_size=50, seed=2)
+    small_batches = bst.bootstrap_metrics(noisy_value, 10000, n_replicas=20, block_size=50, seed=2, max_batch_bytes=1)
+    pd.testing.assert_frame_equal(replicas, small_batches)
+    assert replicas['Final Annual % Return'].nunique() == 20
+    intervals = bst.confidence_intervals(replicas, confidence=.9)
+    assert intervals['Final Annual % Return CI Low'] < intervals['Final Annual % Return CI High']
+    assert intervals['Max Drawdown % CI Low'] == round(replicas['Max Drawdown %'].quantile(.05), 4)
+
+def test_strategy_intervals():
+    """
+    With bootstrap_replicas set, the results should have a confidence interval for each headline metric.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    dca_strategy = dca.base_dca(10000, 60*60, 'bootstrap', price_df=price_df, save_results=False)
+    dca_strategy.bootstrap_replicas = 50
+    dca_strategy.bootstrap_block_seconds = 60*60
+    dca_strategy.add_data_to_results = lambda: None
+    dca_strategy.run_logic()
+    values = dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+    for metric in ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns', 'Max Drawdown %']:
+        assert values[f'{metric} CI Low'] <= values[f'{metric} CI High']
+    # The same seed every run
+    assert values == dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+
+def test_strategy_intervals_risk_frequency():
+    """
+    With risk_frequency set the Sharpe and Sortino intervals should measure the same thing as the results row.
+    A block as long as the history can only resample the history itself, so the interval is the row's value.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    dca_strategy = dca.base_dca(10000, 60*60, 'bootstrap', price_df=price_df, save_results=False)
+    dca_strategy.risk_frequency = 60*60
+    dca_strategy.bootstrap_replicas = 5
+    dca_strategy.bootstrap_block_seconds = 60*60*24*365
+    dca_strategy.add_data_to_results = lambda: None
+    dca_strategy.run_logic()
+    values = dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+    for metric in ['Sharpe of Returns', 'Sortino of Returns']:
+        assert values[metric] is not None
+        assert values[f'{metric} CI Low'] == values[metric] == values[f'{metric} CI High']
+
+def test_strategy_intervals_with_gaps():
+    """
+    Replicas should use the real time between rows, so a history with a gap in it
+    resampled as one block gives back the results row's own values.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    price_df = price_df.drop(index=range(1000, 3001)).reset_index(drop=True)
+    dca_strategy = dca.base_dca(10000, 60*60, 'bootstrap', price_df=price_df, save_results=False)
+    dca_strategy.risk_frequency = 60*60
+    dca_strategy.bootstrap_replicas = 5
+    dca_strategy.bootstrap_block_seconds = 60*60*24*365
+    dca_strategy.add_data_to_results = lambda: None
+    dca_strategy.run_logic()
+    values = dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+    for metric in ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns', 'Max Drawdown %']:
+        assert np.isclose(values[f'{metric} CI Low'], values[metric])
+        assert np.isclose(values[f'{metric} CI High'], values[metric])
+
+def test_strategy_intervals_one_row():
+    """A history with a single row has nothing to resample, every interval should be undefined"""
+    price_df = pd.read_csv(get_test_data_path('test'))
+    dca_strategy = dca.base_dca(10000, 60*60, 'bootstrap', price_df=price_df, save_results=False)
+    dca_strategy.bootstrap_replicas = 5
+    dca_strategy.timestamps = dca_strategy.timestamps[:1]
+    dca_strategy.total_value_history = np.array([10000.0])
+    intervals = dca_strategy.bootstrap_intervals()
+    assert sorted(intervals) == sorted(
+        f'{metric} CI {side}' for metric in bst.METRICS for side in ['Low', 'High']
+    )
+    assert all(np.isnan(value) for value in intervals.values())
+
+if __name__ == "__main__":
+    pt.main(['tests/test_bootstrap.py'])
@@ -0,0 +1,126 @@
+"""
+Testing for the candle_tiers.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.base_strategy as bs
+import lib.candle_tiers as ct
+from specific_strategies import dca
+
+def test_tier_name():
+    """
+    Minute data keeps its name, coarser tiers add the resolution to the end.
+    """
+    assert ct.tier_name('test', '1m') == 'test'
+    assert ct.tier_name('test', '1d') == 'test_1d'
+    assert ct.tier_name('Combined_ETH_all_price_data.csv', '1h') == 'Combined_ETH_all_price_data_1h'
+    with pt.raises(ValueError):
+        ct.tier_name('test', '1w')
+
+def test_build_candles():
+    """
+    Compare hourly candles against a pandas groupby of the minute data.
+    Looks at file: test.csv
+    """
+    df = pd.read_csv(get_test_data_path('test'))
+    candles = ct.build_candles(df, '1h')
+    groups = df.groupby(df['timestamp']//3600*3600)
+    assert list(candles['timestamp'].values) == list(groups.groups.keys())
+    assert list(candles['first_timestamp'].values) == list(groups['timestamp'].first().values)
+    assert list(candles['last_timestamp'].values) == list(groups['timestamp'].last().values)
+    assert list(candles['first_fraction_price'].values) == list(groups['fraction_price'].first().values)
+    assert list(candles['last_fraction_price'].values) == list(groups['fraction_price'].last().values)
+    assert np.array_equal(candles['min_price'].values, groups['decimal_price'].min().values)
+    assert np.array_equal(candles['max_price'].values, groups['decimal_price'].max().values)
+    assert np.allclose(candles['mean_price'].values, groups['decimal_price'].mean().values, atol=.0001)
+    assert candles['rows'].sum() == len(df.index)
+
+def test_build_candles_unsorted():
+    """
+    Candles can only be built from data sorted by timestamp.
+    """
+    df = pd.DataFrame({'timestamp': [120, 60], 'fraction_price': ['1/1', '2/1'], 'decimal_price': [1.0, 2.0]})
+    with pt.raises(ValueError):
+        ct.build_candles(df, '1h')
+
+def test_chunks_match_full_pass():
+    """
+    Building candles a chunk at a time should give the same candles as one pass.
+    Looks at file: test.csv
+    """
+    df = pd.read_csv(get_test_data_path('test'))
+    candles = ct.build_candles(df, '1d')
+    chunk_candles = ct.build_candles_chunks(
+        pd.read_csv(get_test_data_path('test'), chunksize=500),
+        '1d'
+    )
+    pd.testing.assert_frame_equal(candles, chunk_candles)
+
+def test_decision_frame():
+    """
+    The decision frame should start and end at the same time and price as the minute data.
+    Looks at file: test.csv
+    """
+    df = pd.read_csv(get_test_data_path('test'))
+    frame = ct.decision_frame(ct.build_candles(df, '1d'))
+    # 5 days of data plus the final minute
+    assert len(frame.index) == 6
+    assert frame['timestamp'].iloc[0] == df['timestamp'].iloc[0]
+    assert frame['timestamp'].iloc[-1] == df['timestamp'].iloc[-1]
+    assert frame['fraction_price'].iloc[0] == df['fraction_price'].iloc[0]
+    assert frame['fraction_price'].iloc[-1] == df['fraction_price'].iloc[-1]
+
+def test_daily_dca():
+    """
+    A daily DCA on the daily tier should only look at daily rows and end close to the minute version.
+    Looks at file: test.csv
+    """
+    seconds_in_a_day = 60*60*24
+    price_df = pd.read_csv(get_test_data_path('test'))
+    minute_dca = dca.base_dca(
+        starting_usd=10000,
+        time_between_action=seconds_in_a_day,
+        price_period_name='test',
+        price_df=price_df,
+        save_results=False
+    )
+    minute_dca.run_logic()
+    daily_dca = dca.base_dca(
+        starting_usd=10000,
+        time_between_action=seconds_in_a_day,
+        price_period_name='test',
+        price_df=price_df,
+        save_results=False,
+        resolution='1d'
+    )
+    daily_dca.run_logic()
+    assert daily_dca.name == 'DCA every 1 day (1d candles)'
+    assert len(daily_dca.returns_df.index) == 6
+    assert daily_dca.current_time == price_df['timestamp'].values[-1]
+    assert daily_dca.current_usd == 0
+    assert daily_dca.trades_made == minute_dca.trades_made
+    # Buys happen at the start of each day instead of 24 hours after the first minute, so only expect about the same ETH
+    assert abs(bs.unfrac(daily_dca.current_eth)-bs.unfrac(minute_dca.current_eth)) < .25
+    # The original price data should not be changed
+    assert price_df.equals(pd.read_csv(get_test_data_path('test')))
+
+def test_resolution_too_fine():
+    """
+    Strategies can't act more often than their resolution.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    with pt.raises(ValueError):
+        dca.base_dca(
+            starting_usd=10000,
+            time_between_action=60*60,
+            price_period_name='test',
+            price_df=price_df,
+            save_results=False,
+            resolution='1d'
+        )
+
+if __name__ == "__main__":
+    pt.main(['tests/test_candle_tiers.py'])
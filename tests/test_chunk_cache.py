@@ -0,0 +1,122 @@
+"""
+Testing for the chunk_cache.py script
+"""
+import pytest as pt
+from lib.chunk_cache import ChunkCache, split_windows
+
+def make_fetch(calls, fail_at=None):
+    """
+    Fake API call that records which windows were requested.
+    Raises a ConnectionError when asked for the window starting at fail_at.
+    """
+    def fetch_window(window_start, window_end):
+        if window_start == fail_at:
+            raise ConnectionError('Lost connection')
+        calls.append(window_start)
+        return [[window_start, window_end]]
+    return fetch_window
+
+def test_split_windows():
+    """
+    Make sure windows cover the full time range and the last window stops at the end.
+    """
+    assert split_windows(0, 250, 100) == [(0, 100), (100, 200), (200, 250)]
+    assert split_windows(0, 200, 100) == [(0, 100), (100, 200)]
+    assert split_windows(10, 10, 100) == []
+    # Aligned windows start on a multiple of the window size so they don't move with start
+    assert split_windows(150, 350, 100, align=True) == [(100, 200), (200, 300), (300, 350)]
+
+def test_warm_cache_makes_no_calls(tmp_path):
+    """
+    Once every window is downloaded, a new cache should return the same rows without any API calls.
+    """
+    windows = split_windows(0, 1000, 100)
+    calls = []
+    cache = ChunkCache('coinbase', 'ETH-USD', 60, cache_dir=str(tmp_path))
+    first_rows = [cache.fetch(start, end, make_fetch(calls)) for start, end in windows]
+    assert calls == [start for start, _ in windows]
+    assert cache.network_calls == len(windows)
+
+    calls = []
+    warm_cache = ChunkCache('coinbase', 'ETH-USD', 60, cache_dir=str(tmp_path))
+    second_rows = [warm_cache.fetch(start, end, make_fetch(calls)) for start, end in windows]
+    assert calls == []
+    assert warm_cache.network_calls == 0
+    assert first_rows == second_rows
+
+def test_resume_after_failure(tmp_path):
+    """
+    If a download fails part of the way through, restarting should only fetch the missing windows.
+    """
+    windows = split_windows(0, 500, 100)
+    calls = []
+    cache = ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path))
+    try:
+        for start, end in windows:
+            cache.fetch(start, end, make_fetch(calls, fail_at=300))
+        failed = False
+    except ConnectionError:
+        failed = True
+    assert failed
+    assert calls == [0, 100, 200]
+
+    calls = []
+    restarted_cache = ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path))
+    for start, end in windows:
+        restarted_cache.fetch(start, end, make_fetch(calls))
+    assert calls == [300, 400]
+
+def test_cache_keys(tmp_path):
+    """
+    Windows are only shared between caches with the same exchange, pair and granularity.
+    """
+    calls = []
+    ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path)).fetch(0, 100, make_fetch(calls))
+    assert ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path)).has(0)
+    assert not ChunkCache('binance', 'ETHUSDC', 60, cache_dir=str(tmp_path)).has(0)
+    assert not ChunkCache('binance', 'ETHUSDT', 300, cache_dir=str(tmp_path)).has(0)
+    assert not ChunkCache('coinbase', 'ETHUSDT', 60, cache_dir=str(tmp_path)).has(0)
+
+def test_future_windows_not_cached(tmp_path):
+    """
+    Windows that end in the future can still get new data so they should not be saved.
+    """
+    calls = []
+    cache = ChunkCache('coinbase', 'ETH-USD', 60, cache_dir=str(tmp_path))
+    far_future = 10**12
+    cache.fetch(far_future, far_future+100, make_fetch(calls))
+    cache.fetch(far_future, far_future+100, make_fetch(calls))
+    assert calls == [far_future, far_future]
+    assert not cache.has(far_future)
+
+def test_short_window_not_reused(tmp_path):
+    """
+    A last window cut short by the end of a query should only be reused by windows that end at or before it.
+    """
+    calls = []
+    ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path)).fetch(0, 40, make_fetch(calls))
+    cache = ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path))
+    assert cache.has(0, 40) and cache.has(0, 30) and not cache.has(0, 100)
+    assert cache.fetch(0, 30, make_fetch(calls)) == [[0, 40]]
+    assert cache.fetch(0, 100, make_fetch(calls)) == [[0, 100]]
+    assert calls == [0, 0]
+    # The full window replaces the short one
+    assert ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path)).has(0, 100)
+
+def test_fetch_value(tmp_path):
+    """
+    Values that never change should only be fetched once, even by a new cache.
+    """
+    calls = []
+    def fetch():
+        calls.append(1)
+        return 1502942400000
+    cache = ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path))
+    assert cache.fetch_value('earliest_timestamp', fetch) == 1502942400000
+    warm_cache = ChunkCache('binance', 'ETHUSDT', 60, cache_dir=str(tmp_path))
+    assert warm_cache.fetch_value('earliest_timestamp', fetch) == 1502942400000
+    assert calls == [1]
+    assert warm_cache.network_calls == 0
+
+if __name__ == "__main__":
+    pt.main(['tests/test_chunk_cache.py'])
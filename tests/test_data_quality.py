@@ -0,0 +1,82 @@
+"""
+Testing for the data_quality.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.data_quality as dq
+
+def test_gaps_1():
+    """
+    Gaps should give the first missing timestamp and how many are missing.
+    Looks at file: test_timestamp_gaps_1.csv
+    """
+    df = pd.read_csv(get_test_data_path('test_timestamp_gaps_1.csv'))
+    report = dq.check_data_quality(df)
+    assert list(report.gaps['start'].values) == [180, 300]
+    assert list(report.gaps['length'].values) == [1, 1]
+    assert report.missing_timestamps() == 2
+    # There is no decimal_price column so there can't be any jumps
+    assert all(jumps.empty for jumps in report.jumps.values())
+
+def test_gaps_2():
+    """
+    Off grid timestamps (eg 56 or 64 seconds after the last one) should still be caught.
+    Looks at file: test_timestamp_gaps_2.csv
+    """
+    df = pd.read_csv(get_test_data_path('test_timestamp_gaps_2.csv'))
+    report = dq.check_data_quality(df)
+    assert list(report.gaps['start'].values) == [536]
+    assert list(report.gaps['length'].values) == [1]
+
+def test_duplicates_and_non_monotonic():
+    """
+    Find repeated timestamps and timestamps that go backwards.
+    """
+    df = pd.DataFrame({'timestamp': [0, 60, 60, 120, 90, 180], 'decimal_price': [1.0]*6})
+    report = dq.check_data_quality(df)
+    assert list(report.duplicate_timestamps) == [60]
+    assert list(report.non_monotonic['index'].values) == [4]
+    assert list(report.non_monotonic['timestamp'].values) == [90]
+    assert list(report.non_monotonic['previous_timestamp'].values) == [120]
+
+def test_big_jumps():
+    """
+    One minute jumps should match check_price_jump.
+    Looks at file: test_big_jumps.csv
+    """
+    df = pd.read_csv(get_test_data_path('test_big_jumps.csv'))
+    report = dq.check_data_quality(df, horizons=(60, 300))
+    assert list(report.jumps[60]['multiplier'].values) == [2.0, .5, .9]
+    assert list(report.jumps[60]['index'].values) == [4, 7, 8]
+    # 5 minutes later every price is at least 10% away except for index 3 (9.6 -> 10.0)
+    assert list(report.jumps[300]['index'].values) == [0, 1, 2, 4, 5, 6]
+    # The caller's dataframe should not be changed
+    assert list(df.columns) == ['index', 'timestamp', 'fraction_price', 'decimal_price']
+
+def test_chunks_match_full_pass():
+    """
+    Checking a chunk at a time should find the same issues as checking everything at once.
+    """
+    rng = np.random.default_rng(1)
+    timestamps = np.arange(2000)*60
+    # Add some gaps and duplicates
+    timestamps = np.delete(timestamps, [10, 11, 500, 1500])
+    timestamps = np.insert(timestamps, [100, 999], [timestamps[99], timestamps[998]])
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'decimal_price': np.exp(np.cumsum(rng.normal(0, .05, len(timestamps))))
+    })
+    full_report = dq.check_data_quality(df)
+    chunk_report = dq.check_data_quality_chunks(
+        (df.iloc[start:start+137] for start in range(0, len(df.index), 137))
+    )
+    assert full_report.summary() == chunk_report.summary()
+    assert full_report.gaps.equals(chunk_report.gaps)
+    assert list(full_report.duplicate_timestamps) == list(chunk_report.duplicate_timestamps)
+    for horizon in full_report.jumps:
+        assert full_report.jumps[horizon].equals(chunk_report.jumps[horizon])
+
+if __name__ == "__main__":
+    pt.main(['tests/test_data_quality.py'])
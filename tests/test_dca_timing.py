@@ -0,0 +1,69 @@
+"""
+Testing for the dca_timing.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.dca_timing as dt
+from specific_strategies import dca
+
+def test_exact_phase_matches_strategy():
+    """
+    A phase of time_between_action without jitter is base_dca's timing.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    outcome = dt.timing_outcomes(price_df, 6*60*60, phases=[6*60*60]).iloc[0]
+    dca_strategy = dca.base_dca(10000, 6*60*60, 'timing', price_df=price_df, save_results=False)
+    # Run the loop without saving results
+    dca_strategy.add_data_to_results = lambda: None
+    dca_strategy.run_logic()
+    assert np.isclose(outcome['ETH'], float(dca_strategy.current_eth), rtol=1e-12)
+    assert np.isclose(outcome['Final Annual % Return'], float(dca_strategy.get_returns()), rtol=1e-9)
+
+def test_buy_price_sums():
+    """
+    Prefix sums without jitter should match adding up every buy's price, the same as 0 jitter.
+    """
+    inverse_buy_prices = 1/np.arange(1, 101, dtype=float)
+    phases = np.array([60, 300, 600, 601])
+    sums = dt.buy_price_sums(inverse_buy_prices, phases, 600, 9, None)
+    # Rows 1, 11, 21...81 for the first phase, the last phase rounds up to the next row
+    assert np.isclose(sums[0], np.sum(1/np.arange(2, 83, 10)))
+    assert np.isclose(sums[3], np.sum(1/np.arange(12, 93, 10)))
+    assert np.allclose(sums, dt.buy_price_sums(inverse_buy_prices, phases, 600, 9, np.zeros((4, 9))))
+
+def test_timing_outcomes_random():
+    """
+    The same seed should give the same samples no matter the batch size, and phases should be up to time_between_action.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    outcomes = dt.timing_outcomes(price_df, 6*60*60, n_samples=50, max_jitter=60*60, seed=3)
+    assert len(outcomes.index) == 50
+    assert ((outcomes['phase'] > 0) & (outcomes['phase'] <= 6*60*60)).all()
+    small_batches = dt.timing_outcomes(price_df, 6*60*60, n_samples=50, max_jitter=60*60, seed=3, max_batch_bytes=1)
+    pd.testing.assert_frame_equal(outcomes, small_batches)
+    no_jitter = dt.timing_outcomes(price_df, 6*60*60, n_samples=50, seed=3)
+    assert np.array_equal(outcomes['phase'], no_jitter['phase'])
+    assert not np.allclose(outcomes['ETH'], no_jitter['ETH'])
+    with pt.raises(ValueError):
+        dt.timing_outcomes(price_df, 60*60*24*365)
+
+def test_timing_summary():
+    """
+    The summary should have a row per time between action with the distribution of returns.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    summary = dt.timing_summary(price_df, [60*60, 6*60*60], n_samples=200, jitter_fraction=.5, seed=0)
+    assert list(summary.index) == [60*60, 6*60*60]
+    assert (summary['Min'] <= summary['5%']).all()
+    assert (summary['5%'] <= summary['Median']).all()
+    assert (summary['Median'] <= summary['95%']).all()
+    assert (summary['95%'] <= summary['Max']).all()
+    assert summary['Exact Percentile'].between(0, 100).all()
+
+if __name__ == "__main__":
+    pt.main(['tests/test_dca_timing.py'])
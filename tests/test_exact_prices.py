@@ -0,0 +1,72 @@
+"""
+Testing for the exact_prices.py script
+"""
+from fractions import Fraction as frac
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.exact_prices as ep
+
+def test_parse_fractions_matches_fraction():
+    """
+    Every parsed price should be exactly the same as parsing it with Fraction.
+    Looks at file: test.csv
+    """
+    fractions = pd.read_csv(get_test_data_path('test'))['fraction_price']
+    numerators, denominators = ep.parse_fractions(fractions)
+    assert numerators.dtype == np.int64
+    assert denominators.dtype == np.int64
+    for index, fraction in enumerate(fractions):
+        assert ep.fraction_at(numerators, denominators, index) == frac(fraction)
+
+def test_parse_fractions_formats():
+    """
+    Whole numbers, negative numbers, Fraction objects and odd formats should all parse.
+    """
+    numerators, denominators = ep.parse_fractions(['25/10', '-3/4', '7', '1.5', ' 2/3'])
+    assert list(numerators) == [25, -3, 7, 3, 2]
+    assert list(denominators) == [10, 4, 1, 2, 3]
+    numerators, denominators = ep.parse_fractions([frac(1), frac(5, 2)])
+    assert list(numerators) == [1, 5]
+    assert list(denominators) == [1, 2]
+    numerators, denominators = ep.parse_fractions([])
+    assert len(numerators) == 0
+    with pt.raises(ValueError):
+        ep.parse_fractions(['1/2', 'abc'])
+    with pt.raises(ZeroDivisionError):
+        ep.parse_fractions(['1/0'])
+
+def test_parse_fractions_too_big():
+    """
+    Numbers too big for an int64 should fall back to python ints instead of overflowing.
+    """
+    big_fraction = '123456789012345678901234567890/7'
+    numerators, denominators = ep.parse_fractions(['1/2', big_fraction])
+    assert ep.fraction_at(numerators, denominators, 0) == frac(1, 2)
+    assert ep.fraction_at(numerators, denominators, 1) == frac(big_fraction)
+    assert ep.to_floats(numerators, denominators)[1] == float(frac(big_fraction))
+
+def test_parse_fractions_blocks():
+    """
+    Parsing in small blocks should give the same result as one big block.
+    Looks at file: test.csv
+    """
+    fractions = pd.read_csv(get_test_data_path('test'))['fraction_price']
+    numerators, denominators = ep.parse_fractions(fractions)
+    block_numerators, block_denominators = ep.parse_fractions(fractions, block_size=7)
+    assert np.array_equal(numerators, block_numerators)
+    assert np.array_equal(denominators, block_denominators)
+
+def test_to_floats():
+    """
+    Floats should be the same as float(Fraction), even for numbers too big to be exact floats.
+    Looks at file: test.csv
+    """
+    fractions = list(pd.read_csv(get_test_data_path('test'))['fraction_price']) + ['36028797018963971/3']
+    numerators, denominators = ep.parse_fractions(fractions)
+    floats = ep.to_floats(numerators, denominators)
+    assert list(floats) == [float(frac(fraction)) for fraction in fractions]
+
+if __name__ == "__main__":
+    pt.main(['tests/test_exact_prices.py'])
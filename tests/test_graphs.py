@@ -0,0 +1,83 @@
+"""
+Testing for the graphs.py script
+"""
+import os
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.base_strategy as bs
+import lib.graphs as gr
+
+def make_results(path, final_return=10.0):
+    """Save a small Overall_Results csv."""
+    pd.DataFrame({
+        'Strategy': ['DCA every 1 day', 'DCA every 7 days', 'DCA every 1 day'],
+        'Price_Period': ['test', 'test', 'other'],
+        'Final Annual % Return': [final_return, 20.0, 30.0],
+        'Sortino of Returns': ['None', '1.5', '2']
+    }).to_csv(path, index=False)
+
+def test_bar_data(tmp_path):
+    """
+    Bar graphs should get the values for their strategies in order, with 'None' as NaN.
+    """
+    results_file = str(tmp_path / 'Overall_Results.csv')
+    make_results(results_file)
+    spec = gr.bar_spec(['DCA every 7 days', 'DCA every 1 day'], 'test', 'Final Annual % Return', results_file)
+    assert gr.bar_data(spec).tolist() == [20.0, 10.0]
+    sortino = gr.bar_data(gr.bar_spec(['DCA every 1 day', 'DCA every 7 days'], 'test', 'Sortino of Returns', results_file))
+    assert pd.isna(sortino.iloc[0]) and sortino.iloc[1] == 1.5
+
+def test_default_paths():
+    """
+    Without folders given, specs should use the same result paths as the strategies save to.
+    """
+    spec = gr.history_spec('DCA every 1 day', 'test')
+    assert spec['file'] == bs.returns_history_path('DCA every 1 day_test_returns_history')
+    assert gr.bar_spec(['DCA every 1 day'], 'test', 'Trades Made')['file'] == bs.results_path('Overall_Results')
+    assert gr.figure_path(spec).startswith(bs.graph_path())
+
+def test_signature_changes(tmp_path):
+    """
+    Signatures should only change when a figure's own inputs change.
+    """
+    results_file = str(tmp_path / 'Overall_Results.csv')
+    make_results(results_file)
+    spec = gr.bar_spec(['DCA every 1 day'], 'test', 'Final Annual % Return', results_file)
+    other_spec = gr.bar_spec(['DCA every 1 day'], 'other', 'Final Annual % Return', results_file)
+    signature = gr.figure_signature(spec)
+    other_signature = gr.figure_signature(other_spec)
+    make_results(results_file, final_return=11.0)
+    assert gr.figure_signature(spec) != signature
+    assert gr.figure_signature(other_spec) == other_signature
+
+def test_render_figures(tmp_path):
+    """
+    Figures should be saved once and skipped until their inputs change.
+    Looks at file: test_month.csv
+    """
+    pt.importorskip('matplotlib')
+    results_file = str(tmp_path / 'Overall_Results.csv')
+    make_results(results_file)
+    history_folder = str(tmp_path / 'returns_history')
+    os.makedirs(history_folder)
+    price_df = pd.read_csv(get_test_data_path('test_month'))
+    history = pd.DataFrame({'timestamp': price_df['timestamp'], 'price': price_df['decimal_price'],
+                            'Total Value': price_df['decimal_price']*2})
+    history.to_csv(os.path.join(history_folder, 'DCA every 1 day_test_returns_history.csv'), index=False)
+    graph_folder = str(tmp_path / 'graphs')
+    specs = [
+        gr.bar_spec(['DCA every 1 day', 'DCA every 7 days'], 'test', 'Final Annual % Return', results_file),
+        gr.history_spec('DCA every 1 day', 'test', points=200, returns_history_folder=history_folder,
+                        plot_cache_dir=str(tmp_path / 'plot_cache'))
+    ]
+    # Strategies that weren't run are skipped
+    missing_spec = gr.history_spec('DCA every 7 days', 'test', returns_history_folder=history_folder)
+    assert len(gr.render_figures(specs+[missing_spec], jobs=2, graph_folder=graph_folder)) == 2
+    assert all(os.path.exists(gr.figure_path(spec, graph_folder)) for spec in specs)
+    assert gr.render_figures(specs, jobs=2, graph_folder=graph_folder) == []
+    make_results(results_file, final_return=11.0)
+    assert gr.render_figures(specs, jobs=2, graph_folder=graph_folder) == [specs[0]['title']]
+
+if __name__ == "__main__":
+    pt.main(['tests/test_graphs.py'])
@@ -0,0 +1,117 @@
+"""
+Testing for the indicators.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.base_strategy as bs
+import lib.indicators as ind
+
+def test_indicators_only_use_past_data():
+    """
+    The value at each row should be the same if we only had the data up to that row.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    prices = price_df['decimal_price'].to_numpy(dtype=float)
+    timestamps = price_df['timestamp'].to_numpy()
+    for indicator, params in [('sma', {'window': 30}), ('ema', {'span': 30}),
+                              ('momentum', {'window': 30}), ('rsi', {'window': 14}),
+                              ('log_fit_price', {}), ('log_fit_deviation', {})]:
+        values = ind.INDICATORS[indicator](prices, timestamps, **params)
+        assert len(values) == len(prices)
+        for row in [0, 13, 29, 30, 500, len(prices)-1]:
+            past_values = ind.INDICATORS[indicator](prices[:row+1], timestamps[:row+1], **params)
+            assert np.allclose(past_values[-1], values[row], equal_nan=True)
+
+def test_indicator_values():
+    """
+    Check the indicators against values worked out by hand.
+    """
+    prices = np.array([1.0, 2.0, 3.0, 4.0, 3.0])
+    timestamps = np.arange(len(prices))*60
+    assert np.allclose(ind.moving_average(prices, timestamps, 2), [np.nan, 1.5, 2.5, 3.5, 3.5], equal_nan=True)
+    assert np.allclose(ind.momentum(prices, timestamps, 1), [np.nan, 100, 50, 100/3, -25], equal_nan=True)
+    # Only gains so far, then a loss of 1 against average gains of 1
+    values = ind.rsi(prices, timestamps, window=2)
+    assert np.isnan(values[:2]).all()
+    assert values[3] == 100
+    assert 0 < values[4] < 100
+
+def test_log_fit():
+    """
+    The online and vectorized log fits should match a full least squares fit of the data up to each row.
+    Looks at file: test_month.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test_month'))
+    prices = price_df['decimal_price'].to_numpy(dtype=float)
+    timestamps = price_df['timestamp'].to_numpy()
+    fits = ind.log_fit_series(prices, timestamps)
+    online_fit = ind.OnlineLogFit()
+    checked_rows = {2, 100, 10000, len(prices)-1}
+    for row, (timestamp, price) in enumerate(zip(timestamps, prices)):
+        online_fit.update(timestamp, price)
+        if row not in checked_rows:
+            continue
+        x = ind.log_days(timestamps[:row+1])
+        y = np.log(prices[:row+1])
+        slope, intercept = np.polyfit(x, y, 1)
+        residual_std = np.sqrt(np.sum((y-(intercept+slope*x))**2)/(row-1))
+        for fit_slope, fit_intercept, fit_std in [
+            (fits['slope'][row], fits['intercept'][row], fits['residual_std'][row]),
+            (online_fit.slope, online_fit.intercept, online_fit.residual_std)
+        ]:
+            assert np.isclose(fit_slope, slope, rtol=1e-6)
+            assert np.isclose(fit_intercept, intercept, rtol=1e-6)
+            assert np.isclose(fit_std, residual_std, rtol=1e-5)
+        assert np.isclose(online_fit.fitted_price(timestamp), fits['fitted_price'][row], rtol=1e-9)
+        lower, upper = online_fit.band(timestamp, width=2)
+        assert lower < fits['fitted_price'][row] < upper
+    # One row can't be fit
+    assert np.isnan(fits['slope'][0])
+    with pt.raises(ValueError):
+        ind.log_days([ind.ETH_GENESIS_TIMESTAMP-60])
+
+def test_indicator_cache(tmp_path):
+    """
+    Indicators should only be calculated once per (indicator, params, data).
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    prices = price_df['decimal_price'].to_numpy(dtype=float)
+    timestamps = price_df['timestamp'].to_numpy()
+    cache = ind.IndicatorCache(str(tmp_path))
+    first = cache.get('sma', {'window': 60}, timestamps, prices)
+    second = cache.get('sma', {'window': 60}, timestamps, prices)
+    assert cache.calculated == 1
+    assert np.array_equal(first, second, equal_nan=True)
+    # Different params or data should be calculated again
+    cache.get('sma', {'window': 30}, timestamps, prices)
+    cache.get('sma', {'window': 60}, timestamps[:-1], prices[:-1])
+    assert cache.calculated == 3
+    with pt.raises(ValueError):
+        cache.get('not_an_indicator', {}, timestamps, prices)
+
+def test_strategy_indicators(tmp_path):
+    """
+    A strategy should get its indicators at the current index.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+
+    class average_strategy(bs.Strategy):
+        """Strategy that only needs a moving average."""
+        indicators = {'average': ('sma', {'window': 10})}
+        indicator_cache_dir = str(tmp_path)
+
+    testing_strat = average_strategy('Testing', 100, 60*60, 'test', price_df=price_df, save_results=False)
+    assert np.isnan(testing_strat.indicator('average'))
+    testing_strat.go_to_next_action()
+    expected = price_df['decimal_price'].iloc[testing_strat.current_index-9:testing_strat.current_index+1].mean()
+    assert np.isclose(testing_strat.indicator('average'), expected)
+    # Strategies without indicators don't need the cache
+    assert bs.Strategy('Testing', 100, 60, 'test', price_df=price_df, save_results=False).indicator_values == {}
+
+if __name__ == "__main__":
+    pt.main(['tests/test_indicators.py'])
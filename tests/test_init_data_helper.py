@@ -113,5 +113,211 @@ def test_combine_datasets():
         30.1, 31.1, round((20.5+32.1)/2, 4), 33.1, 34.1, 35.1, 36.1, 25.0, 30.4, 20.2
     ]
 
+def test_split_fractions():
+    """
+    Make sure fraction strings and Fraction objects are split into exact numerators and denominators.
+    """
+    numerators, denominators = idh.split_fractions(['25/10', '3', '6643518635371397/8796093022208', '-7'])
+    assert numerators.dtype == np.int64
+    assert list(numerators) == [25, 3, 6643518635371397, -7]
+    assert list(denominators) == [10, 1, 8796093022208, 1]
+    fractions = [frac('25/10'), frac(7), frac(2**70, 3)]
+    numerators, denominators = idh.split_fractions(fractions)
+    assert [frac(int(n), int(d)) for n, d in zip(numerators, denominators)] == fractions
+
+def test_fraction_means():
+    """
+    Averages should be exact and reduced, rows too big for an int64 should still be exact.
+    """
+    numerators = np.array([[25, 26], [1, 0], [6643518635371397, 6638235481999933], [2**62, 2**62]], dtype=np.int64)
+    denominators = np.array([[10, 10], [3, 1], [8796093022208, 8796093022207], [3, 1]], dtype=np.int64)
+    present = np.array([[True, True], [True, False], [True, True], [True, True]])
+    averages = idh.fraction_means(numerators, denominators, present)
+    assert list(averages) == [
+        '51/20', '1/3',
+        str((frac(6643518635371397, 8796093022208)+frac(6638235481999933, 8796093022207))/2),
+        str((frac(2**62, 3)+2**62)/2)
+    ]
+
+def test_combine_datasets_matches_make_average():
+    """
+    The vectorized combine_datasets should give the same output as applying make_average to every row.
+    """
+    df1 = pd.read_csv(get_test_data_path('test.csv'))
+    # Shift the second dataframe so some timestamps only show up in one of them
+    df2 = df1.copy()
+    df2['timestamp'] = df2['timestamp']+120
+    df2['decimal_price'] = df2['decimal_price']*2
+    df2['fraction_price'] = df2['fraction_price'].apply(lambda x: frac(x)*2)
+    results = idh.combine_datasets(df1, df2)
+
+    # Build the expected values the slow way
+    expected = df1.set_index('timestamp').join(
+        df2.set_index('timestamp'), how='outer', lsuffix='_1', rsuffix='_2'
+    )
+    expected['fraction_price'] = np.nan
+    expected = expected.apply(lambda x: idh.make_average(x, 'fraction_price'), axis=1)
+    expected['decimal_price'] = np.nan
+    expected = expected.apply(lambda x: idh.make_average(x, 'decimal_price'), axis=1)
+
+    assert list(results['timestamp'].values) == list(expected.index.values)
+    assert list(results['fraction_price'].values) == list(expected['fraction_price'].values)
+    assert list(results['decimal_price'].values) == list(expected['decimal_price'].values)
+
+def test_merge_datasets_matches_combine_datasets(tmp_path):
+    """
+    Merging two files should give the same prices as combine_datasets,
+    even when the files are read a couple of rows at a time.
+    """
+    save_path = str(tmp_path/'merged.csv')
+    df1 = pd.read_csv(get_test_data_path('test_final_csv_df1.csv'))
+    df2 = pd.read_csv(get_test_data_path('test_final_csv_df2.csv'))
+    rows_saved = idh.merge_datasets(
+        [get_test_data_path('test_final_csv_df1.csv'), get_test_data_path('test_final_csv_df2.csv')],
+        save_path,
+        chunk_size=2
+    )
+    results = pd.read_csv(save_path)
+    expected = idh.combine_datasets(df1, df2)
+    assert rows_saved == len(expected.index)
+    assert list(results.columns) == ['index', 'timestamp', 'fraction_price', 'decimal_price', 'source_count']
+    assert list(results['index'].values) == list(range(rows_saved))
+    assert list(results['timestamp'].values) == list(expected['timestamp'].values)
+    assert list(results['fraction_price'].apply(frac).values) == list(expected['fraction_price'].values)
+    assert list(results['decimal_price'].values) == list(expected['decimal_price'].values)
+    assert list(results['source_count'].values) == [2, 2, 2, 1, 1, 1, 1, 2, 1, 1]
+
+def test_merge_datasets_averages_all_sources(tmp_path):
+    """
+    With three files, each timestamp should get the average of every file that has it.
+    """
+    paths = []
+    for i, rows in enumerate([
+        {'timestamp': [60, 120, 180], 'fraction_price': ['1', '2', '3'], 'decimal_price': [1.0, 2.0, 3.0]},
+        {'timestamp': [120, 180], 'fraction_price': ['4', '6'], 'decimal_price': [4.0, 6.0]},
+        {'timestamp': [180, 240], 'fraction_price': ['1/3', '5'], 'decimal_price': [0.3333, 5.0]}
+    ]):
+        paths.append(str(tmp_path/f'source_{i}.csv'))
+        pd.DataFrame(rows).to_csv(paths[-1], index_label='index')
+    save_path = str(tmp_path/'merged.csv')
+    idh.merge_datasets(paths, save_path, chunk_size=1)
+    results = pd.read_csv(save_path)
+    assert list(results['timestamp'].values) == [60, 120, 180, 240]
+    assert list(results['fraction_price'].apply(frac).values) == [frac(1), frac(3), frac(28, 9), frac(5)]
+    assert list(results['decimal_price'].values) == [1.0, 3.0, round((3.0+6.0+0.3333)/3, 4), 5.0]
+    assert list(results['source_count'].values) == [1, 2, 3, 1]
+
+def test_merge_datasets_repeats_across_chunks(tmp_path):
+    """
+    A timestamp that a file repeats across a chunk boundary should still be saved as one row.
+    """
+    paths = []
+    for i, rows in enumerate([
+        {'timestamp': [60, 120, 120, 120, 180], 'fraction_price': ['1', '2', '3', '4', '5'],
+         'decimal_price': [1.0, 2.0, 3.0, 4.0, 5.0]},
+        {'timestamp': [120, 240], 'fraction_price': ['1/2', '6'], 'decimal_price': [0.5, 6.0]}
+    ]):
+        paths.append(str(tmp_path/f'source_{i}.csv'))
+        pd.DataFrame(rows).to_csv(paths[-1], index_label='index')
+    for chunk_size in [1, 2, 3]:
+        save_path = str(tmp_path/f'merged_{chunk_size}.csv')
+        idh.merge_datasets(paths, save_path, chunk_size=chunk_size)
+        results = pd.read_csv(save_path)
+        assert list(results['timestamp'].values) == [60, 120, 180, 240]
+        assert list(results['fraction_price'].apply(frac).values) == [frac(1), frac(19, 8), frac(5), frac(6)]
+        assert list(results['source_count'].values) == [1, 4, 1, 1]
+
+def test_merge_datasets_unsorted(tmp_path):
+    """
+    Files that are not sorted by timestamp can't be merged in one pass so they should raise a ValueError.
+    """
+    path = str(tmp_path/'unsorted.csv')
+    pd.DataFrame({
+        'timestamp': [120, 60], 'fraction_price': ['1', '2'], 'decimal_price': [1.0, 2.0]
+    }).to_csv(path, index_label='index')
+    with pt.raises(ValueError):
+        idh.merge_datasets([path], str(tmp_path/'merged.csv'))
+
+def kaggle_data(timestamps):
+    """Kaggle style rows (with columns we don't use) for the timestamps"""
+    rng = np.random.default_rng(0)
+    prices = rng.uniform(100, 5000, (len(timestamps), 4)).round(3)
+    return pd.DataFrame({
+        'timestamp': timestamps, 'Asset_ID': 6, 'Count': 10.0,
+        'Open': prices[:, 0], 'High': prices[:, 1], 'Low': prices[:, 2], 'Close': prices[:, 3], 'Volume': 1.5
+    })
+
+def notebook_prices(df):
+    """The per row way init_data.ipynb used to make the sorted price data"""
+    sorted_data = df.sort_values(by=['timestamp'], kind='mergesort')
+    sorted_data['decimal_price'] = round(
+        sorted_data['Open'] + sorted_data['Close'] + sorted_data['High'] + sorted_data['Low'], 4
+    )
+    sorted_data['fraction_price'] = sorted_data['decimal_price'].apply(lambda x: frac(x)/4)
+    sorted_data['decimal_price'] = sorted_data['decimal_price']/4
+    sorted_data.index.names = ['index']
+    return sorted_data.filter(['index', 'timestamp', 'fraction_price', 'decimal_price'])
+
+def test_quarter_fractions():
+    """Should be the same strings as str(frac(x)/4), including whole numbers and tiny or huge values"""
+    values = np.r_[0, 1, 4, 3.5, -2.75, 1e-9, 2.0**70, np.random.default_rng(1).uniform(0, 1e4, 1000).round(4)]
+    assert list(idh.quarter_fractions(values)) == [str(frac(value)/4) for value in values]
+
+def test_prepare_kaggle_file(tmp_path):
+    """
+    An unsorted file read a few rows at a time should be saved exactly like the old notebook saved it.
+    A sorted file is a single run.
+    """
+    timestamps = np.arange(40)*60
+    timestamps[10:30] = timestamps[10:30][::-1]
+    # Same timestamp twice should stay in file order
+    timestamps[35] = timestamps[36]
+    df = kaggle_data(timestamps)
+    csv_path = str(tmp_path/'full_data__6__2019.csv')
+    df.to_csv(csv_path, index=False)
+    expected_path = str(tmp_path/'expected.csv')
+    notebook_prices(df).to_csv(expected_path)
+    for chunk_size in [3, 1000]:
+        save_path = str(tmp_path/f'sorted_{chunk_size}.csv')
+        assert idh.prepare_kaggle_file(csv_path, save_path, chunk_size=chunk_size) == 40
+        with open(save_path) as saved, open(expected_path) as expected:
+            assert saved.read() == expected.read()
+
+def test_prepare_kaggle_file_merge_passes(tmp_path, monkeypatch):
+    """
+    A file in reverse order is a run per chunk, more runs than MAX_MERGE_RUNS should take a few merge passes.
+    """
+    monkeypatch.setattr(idh, 'MAX_MERGE_RUNS', 3)
+    df = kaggle_data(np.arange(50)[::-1]*60)
+    csv_path = str(tmp_path/'reversed.csv')
+    df.to_csv(csv_path, index=False)
+    save_path = str(tmp_path/'sorted.csv')
+    idh.prepare_kaggle_file(csv_path, save_path, chunk_size=2)
+    results = pd.read_csv(save_path, dtype={'fraction_price': str})
+    expected = notebook_prices(df)
+    assert list(results['index'].values) == list(expected.index.values)
+    assert list(results['fraction_price'].values) == [str(value) for value in expected['fraction_price']]
+    assert list(results['decimal_price'].values) == list(expected['decimal_price'].values)
+
+def test_prepare_kaggle_file_nulls(tmp_path):
+    """Null prices can't be averaged so they should raise a ValueError"""
+    df = kaggle_data(np.arange(5)*60)
+    df.loc[2, 'Close'] = np.nan
+    csv_path = str(tmp_path/'nulls.csv')
+    df.to_csv(csv_path, index=False)
+    with pt.raises(ValueError):
+        idh.prepare_kaggle_file(csv_path, str(tmp_path/'sorted.csv'))
+
+def test_prepare_kaggle_files(tmp_path):
+    """Every file should be prepared in the process pool and saved to its own path"""
+    csv_paths = []
+    for year, row_count in [(2018, 10), (2019, 20)]:
+        csv_paths.append(str(tmp_path/f'full_data__6__{year}.csv'))
+        kaggle_data(np.arange(row_count)[::-1]*60).to_csv(csv_paths[-1], index=False)
+    save_paths = [str(tmp_path/'sorted_2018.csv'), str(tmp_path/'sorted_2019.csv')]
+    assert idh.prepare_kaggle_files(csv_paths, save_paths, chunk_size=4, jobs=2) == [10, 20]
+    for save_path, row_count in zip(save_paths, [10, 20]):
+        assert list(pd.read_csv(save_path)['timestamp'].values) == list(np.arange(row_count)*60)
+
 if __name__ == "__main__":
     pt.main(['tests/test_init_data_helper.py'])
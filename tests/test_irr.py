@@ -0,0 +1,71 @@
+"""
+Testing for the irr.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.irr as irr
+from specific_strategies import dca, all_in_start
+
+def test_xirr_single_flow():
+    """
+    Putting in 100 and getting 121 back 2 years later is 10% a year.
+    """
+    assert np.isclose(irr.xirr([-100, 121], [0, 2*irr.SECONDS_IN_YEAR]), .1, rtol=1e-12)
+    # Losing money gives a negative rate
+    assert np.isclose(irr.xirr([-100, 81], [0, 2*irr.SECONDS_IN_YEAR]), -.1, rtol=1e-12)
+
+def test_xirr_many_series():
+    """
+    Solving many series at once should match solving each one, and the solved rates should make every series add up to 0.
+    Series that are padded with 0 amounts or can't be solved should work too.
+    """
+    rng = np.random.default_rng(0)
+    times = np.sort(rng.uniform(0, 3*irr.SECONDS_IN_YEAR, (50, 40)), axis=1)
+    times[:, 0] = 0
+    amounts = -rng.uniform(10, 100, (50, 40))
+    amounts[:, -1] = rng.uniform(500, 5000, 50)
+    # Pad a series with 0 amounts at the end
+    amounts[3, 20:-1] = 0
+    # No money ever comes back
+    amounts[7, -1] = -1
+    rates = irr.xirr(amounts, times)
+    assert rates.shape == (50,)
+    assert np.isnan(rates[7])
+    for series in [0, 3, 49]:
+        assert np.isclose(rates[series], irr.xirr(amounts[series], times[series]), rtol=1e-10)
+    solved = ~np.isnan(rates)
+    values, _ = irr.npv(amounts[solved], (times[solved]-times[solved, :1])/irr.SECONDS_IN_YEAR, np.log1p(rates[solved]))
+    assert np.allclose(values, 0, atol=1e-8)
+
+def test_strategy_money_weighted_return():
+    """
+    Going all in at the start puts all of the money in at once, so the money weighted return is the compounded return.
+    DCA's cash flows should add up to 0 at its money weighted return.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    all_in_strategy = all_in_start.base_all_in(10000, 60*60, 'irr', price_df=price_df, save_results=False)
+    dca_strategy = dca.base_dca(10000, 60*60, 'irr', price_df=price_df, save_results=False)
+    for strategy in [all_in_strategy, dca_strategy]:
+        # Run the loop without saving results
+        strategy.add_data_to_results = lambda: None
+        strategy.run_logic()
+    years = (all_in_strategy.end_time-all_in_strategy.start_time)/irr.SECONDS_IN_YEAR
+    end_value = float(all_in_strategy.get_total_value())
+    assert np.isclose(all_in_strategy.money_weighted_return(), ((end_value/10000)**(1/years)-1)*100, rtol=1e-9)
+
+    amounts, times = irr.trade_cash_flows(
+        dca_strategy.trade_log, 0, dca_strategy.start_time,
+        float(dca_strategy.current_eth*dca_strategy.current_price), dca_strategy.end_time
+    )
+    # The initial buy and a buy every hour, with the end value last
+    assert len(amounts) == 1+dca_strategy.trades_made+1
+    rate = dca_strategy.money_weighted_return()/100
+    value, _ = irr.npv(amounts[np.newaxis], (times[np.newaxis]-times[0])/irr.SECONDS_IN_YEAR, np.log1p([rate]))
+    # Rounding the rate to 4 decimals leaves a little left over
+    assert abs(value[0]) < 1e-2
+
+if __name__ == "__main__":
+    pt.main(['tests/test_irr.py'])
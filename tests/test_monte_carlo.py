@@ -0,0 +1,105 @@
+"""
+Testing for the monte_carlo.py script
+"""
+from fractions import Fraction as frac
+import functools
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.monte_carlo as mc
+from specific_strategies import dca
+
+def test_generate_paths():
+    """
+    Paths should start at the start price and the same seed should give the same paths.
+    """
+    rngs = [np.random.default_rng(seed) for seed in range(3)]
+    paths = mc.generate_paths(mc.GBM(.5, .9), 2000, rngs, 100)
+    assert paths.shape == (3, 101)
+    assert np.all(paths[:, 0] == 2000)
+    assert np.all(paths > 0)
+    same_paths = mc.generate_paths(mc.GBM(.5, .9), 2000, [np.random.default_rng(seed) for seed in range(3)], 100)
+    assert np.array_equal(paths, same_paths)
+
+def test_gbm_drift():
+    """
+    With no volatility, GBM should grow by exactly mu per year.
+    """
+    paths = mc.generate_paths(mc.GBM(.5, 0), 100, [np.random.default_rng(0)], 365, step_seconds=mc.SECONDS_IN_YEAR/365)
+    assert np.isclose(paths[0, -1], 100*np.exp(.5))
+
+def test_bootstrap():
+    """
+    Bootstrapped moves should only come from the historical price moves, in blocks.
+    Looks at file: test.csv
+    """
+    prices = pd.read_csv(get_test_data_path('test'))['decimal_price'].values
+    model = mc.Bootstrap(prices, block_size=10)
+    log_returns = model.log_returns(np.random.default_rng(0), 95)
+    assert len(log_returns) == 95
+    assert np.all(np.isin(log_returns, model.historical_log_returns))
+    # Each block is 10 moves in a row from the history
+    block_start = np.flatnonzero(model.historical_log_returns == log_returns[0])[0]
+    assert np.array_equal(log_returns[:10], model.historical_log_returns[block_start:block_start+10])
+    with pt.raises(ValueError):
+        mc.Bootstrap(prices, block_size=0)
+
+def test_regime_switching():
+    """
+    With no volatility, every step should move by the drift of its regime and regimes should switch.
+    """
+    model = mc.RegimeSwitching([1, -1], [0, 0], [[.99, .01], [.02, .98]])
+    rng = np.random.default_rng(0)
+    regimes = model.regimes(rng, 10000)
+    assert set(np.unique(regimes)) == {0, 1}
+    assert regimes[0] == 0
+    # Regimes should last about 1/(1-stay chance) steps
+    switches = np.count_nonzero(np.diff(regimes))
+    assert 100 < switches < 200
+    log_returns = model.log_returns(np.random.default_rng(0), 10000)
+    assert set(np.round(log_returns*mc.SECONDS_IN_YEAR/60, 8)) == {1, -1}
+    with pt.raises(ValueError):
+        mc.RegimeSwitching([1, -1], [0, 0], [[.5, .4], [.5, .5]])
+
+def test_evaluate_dca_matches_strategy():
+    """
+    The vectorized DCA should give the same metrics as running base_dca on the same path.
+    """
+    prices = mc.generate_paths(mc.GBM(.5, .9), 2000, [np.random.default_rng(1)], 2*24*60)
+    price_df = pd.DataFrame({
+        'timestamp': 1600000000+60*np.arange(prices.shape[1]),
+        'fraction_price': [frac(price) for price in prices[0]],
+        'decimal_price': prices[0]
+    })
+    dca_strategy = dca.base_dca(
+        starting_usd=10000,
+        time_between_action=6*60*60,
+        price_period_name='monte_carlo',
+        price_df=price_df,
+        save_results=False
+    )
+    # Run the loop without saving results
+    dca_strategy.add_data_to_results = lambda: None
+    dca_strategy.run_logic()
+    expected = dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+    results = mc.evaluate_dca(prices, 6*60*60)
+    for column in ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns']:
+        assert results[column].iloc[0] == expected[column]
+
+def test_simulate_batches():
+    """
+    The same seed should give the same results no matter the batch size.
+    """
+    evaluate = functools.partial(mc.evaluate_dca, time_between_action=60*60)
+    model = mc.GBM(.5, .9)
+    results = mc.simulate(model, evaluate, 10, 24*60, 2000, seed=7)
+    assert len(results.index) == 10
+    assert list(results.columns) == ['Final Annual % Return', 'Sharpe of Returns', 'Sortino of Returns']
+    small_batches = mc.simulate(model, evaluate, 10, 24*60, 2000, seed=7, max_batch_bytes=1)
+    pd.testing.assert_frame_equal(results, small_batches)
+    different_seed = mc.simulate(model, evaluate, 10, 24*60, 2000, seed=8)
+    assert not results.equals(different_seed)
+
+if __name__ == "__main__":
+    pt.main(['tests/test_monte_carlo.py'])
@@ -0,0 +1,49 @@
+"""
+Testing for the plot_data.py script
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.plot_data as pdata
+
+def test_lttb_keeps_peaks():
+    """
+    LTTB should keep the first and last points and the highest and lowest points.
+    """
+    x = np.arange(10000)
+    y = np.sin(x/500)
+    y[1234] = 10
+    y[8765] = -10
+    indices = pdata.lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(x)-1
+    assert np.all(np.diff(indices) > 0)
+    assert 1234 in indices and 8765 in indices
+    # Asking for more points than we have keeps them all
+    assert list(pdata.lttb_indices(x[:50], y[:50], 100)) == list(range(50))
+    with pt.raises(ValueError):
+        pdata.lttb_indices(x, y, 2)
+
+def test_plot_series_cache(tmp_path):
+    """
+    A cut down series should be saved and only remade when the returns history changes.
+    Looks at file: test_month.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test_month'))
+    history_path = str(tmp_path / 'history.csv')
+    price_df[['timestamp', 'decimal_price']].rename(columns={'decimal_price': 'price'}).to_csv(history_path, index=False)
+    cache_dir = str(tmp_path / 'cache')
+    series = pdata.plot_series(history_path, 'price', points=500, cache_dir=cache_dir)
+    assert len(series.index) == 500
+    assert series['timestamp'].iloc[-1] == price_df['timestamp'].iloc[-1]
+    assert len(os.listdir(cache_dir)) == 1
+    # Loading from the cache gives the same series
+    assert pdata.plot_series(history_path, 'price', points=500, cache_dir=cache_dir).equals(series)
+    # A different number of points is a new cache entry
+    pdata.plot_series(history_path, 'price', points=100, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+if __name__ == "__main__":
+    pt.main(['tests/test_plot_data.py'])
@@ -0,0 +1,63 @@
+"""
+Testing for the results_query.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+import lib.results_query as rq
+
+def make_results():
+    """Small Overall_Results table."""
+    strategies = ['DCA every 28 days', 'DCA every 1.0 hour', 'All in start ', 'DCA every 1 day']
+    periods = ['High-Low-1.csv', 'Low-High-1.csv']
+    rows = []
+    for period_number, period in enumerate(periods):
+        for strategy_number, strategy in enumerate(strategies):
+            rows.append({
+                'Strategy': strategy,
+                'Price_Period': period,
+                'Final Annual % Return': float(10*strategy_number+period_number),
+                'Sortino of Returns': 'None' if strategy_number == 0 else str(strategy_number)
+            })
+    return pd.DataFrame(rows)
+
+def test_parse_strategy_name():
+    """
+    Names should be split into family, time between action and resolution.
+    """
+    assert rq.parse_strategy_name('DCA every 7 days') == ('DCA', 60*60*24*7, '1m')
+    assert rq.parse_strategy_name('DCA every 1.0 hour') == ('DCA', 60*60, '1m')
+    assert rq.parse_strategy_name('FOMO every 1 day (1h candles)') == ('FOMO', 60*60*24, '1h')
+    assert rq.parse_strategy_name('DCA every Monday at 00:00 UTC')[0] == 'DCA'
+    family, time_between_action, _ = rq.parse_strategy_name('All in start ')
+    assert family == 'All in start' and np.isnan(time_between_action)
+
+def test_filters_and_pivot():
+    """
+    Filters should match the same rows as boolean masks and the pivot should be in time order.
+    """
+    results_df = make_results()
+    query = rq.ResultsQuery(results_df)
+    dca_rows = query.rows(families=['DCA'], price_periods='Low-High-1.csv')
+    assert len(dca_rows.index) == 3
+    assert set(dca_rows['Strategy']) == {'DCA every 28 days', 'DCA every 1.0 hour', 'DCA every 1 day'}
+    assert len(query.rows(families=['Not a family']).index) == 0
+    table = query.pivot('Final Annual % Return', families='DCA')
+    assert list(table.columns) == ['DCA every 1.0 hour', 'DCA every 1 day', 'DCA every 28 days']
+    assert table.loc['Low-High-1.csv', 'DCA every 28 days'] == 1
+    # 'None' Sortino values are NaN
+    assert query.rows(strategies=['DCA every 28 days'])['Sortino of Returns'].isna().all()
+
+def test_differences():
+    """
+    Pair differences should match subtracting the results by hand.
+    """
+    query = rq.ResultsQuery(make_results())
+    differences = query.differences('Final Annual % Return', families='DCA')
+    # 3 strategies make 3 pairs
+    assert len(differences.columns) == 3
+    assert differences.loc['High-Low-1.csv', ('DCA every 1 day', 'DCA every 28 days')] == 30-0
+    assert differences.loc['Low-High-1.csv', ('DCA every 1.0 hour', 'DCA every 1 day')] == 11-31
+
+if __name__ == "__main__":
+    pt.main(['tests/test_results_query.py'])
@@ -0,0 +1,74 @@
+"""
+Testing for the rolling_analysis.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.rolling_analysis as ra
+from specific_strategies import dca, all_in_start
+
+def test_strided_prefix_sums():
+    """
+    Strided prefix sums should match summing every stride-th value by hand.
+    """
+    values = np.arange(1, 11, dtype=float)
+    sums = ra.strided_prefix_sums(values, 3)
+    assert list(sums) == [1, 2, 3, 5, 7, 9, 12, 15, 18, 22]
+    # values[2+3]+values[2+6] = 6+9
+    assert sums[2+6]-sums[2] == 15
+
+def test_grid_prices():
+    """
+    Missing rows should buy at the next price and be valued at the last price.
+    """
+    price_df = pd.DataFrame({'timestamp': [0, 60, 240, 300], 'decimal_price': [1.0, 2.0, 5.0, 6.0]})
+    grid, buy_prices, value_prices = ra.grid_prices(price_df)
+    assert list(grid) == [0, 60, 120, 180, 240, 300]
+    assert list(buy_prices) == [1, 2, 5, 5, 5, 6]
+    assert list(value_prices) == [1, 2, 2, 2, 5, 6]
+
+def test_rolling_outcomes_match_strategies():
+    """
+    Every start date should give the same results as running base_dca and base_all_in on that date.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    seconds_in_a_day = 60*60*24
+    outcomes = ra.rolling_outcomes(price_df, seconds_in_a_day, 6*60*60, start_every=6*60*60)
+    # About 4 days of data, minus the last day which doesn't have a full horizon after it
+    assert len(outcomes.index) == 12
+    for index in [0, 5, 11]:
+        outcome = outcomes.iloc[index]
+        period_df = price_df.loc[
+            (price_df['timestamp'] >= outcome['start_timestamp']) &
+            (price_df['timestamp'] <= outcome['end_timestamp'])
+        ].reset_index(drop=True)
+        dca_strategy = dca.base_dca(10000, 6*60*60, 'rolling', price_df=period_df, save_results=False)
+        all_in_strategy = all_in_start.base_all_in(10000, 6*60*60, 'rolling', price_df=period_df, save_results=False)
+        for strategy in [dca_strategy, all_in_strategy]:
+            # Run the loop without saving results
+            strategy.add_data_to_results = lambda: None
+            strategy.run_logic()
+        assert np.isclose(outcome['DCA ETH'], float(dca_strategy.current_eth), rtol=1e-12)
+        assert np.isclose(outcome['DCA Total Value'], float(dca_strategy.get_total_value()), rtol=1e-12)
+        assert np.isclose(outcome['DCA Final Annual % Return'], float(dca_strategy.get_returns()), rtol=1e-9)
+        assert np.isclose(outcome['All in ETH'], float(all_in_strategy.current_eth), rtol=1e-12)
+        assert np.isclose(outcome['All in Total Value'], float(all_in_strategy.get_total_value()), rtol=1e-12)
+
+def test_rolling_outcomes_errors():
+    """
+    Periods that don't fit the data or the time steps should raise a ValueError.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    seconds_in_a_day = 60*60*24
+    with pt.raises(ValueError):
+        ra.rolling_outcomes(price_df, seconds_in_a_day, 2*seconds_in_a_day)
+    with pt.raises(ValueError):
+        ra.rolling_outcomes(price_df, 10*seconds_in_a_day, seconds_in_a_day)
+    with pt.raises(ValueError):
+        ra.rolling_outcomes(price_df, seconds_in_a_day, 90)
+
+if __name__ == "__main__":
+    pt.main(['tests/test_rolling_analysis.py'])
@@ -0,0 +1,108 @@
+"""
+Testing for the schedules.py script
+"""
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.base_strategy as bs
+import lib.schedules as sc
+from specific_strategies import dca
+
+def utc_times(timestamps):
+    """Turn timestamps into UTC datetimes."""
+    return [datetime.fromtimestamp(int(timestamp), tz=timezone.utc) for timestamp in timestamps]
+
+def test_every_matches_go_to_next_action():
+    """
+    Every should stop at the same rows as go_to_next_action, even with missing rows.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    # Remove some rows to make gaps
+    price_df = price_df.drop(list(range(100, 130))+list(range(2000, 2003))).reset_index(drop=True)
+    # Every row is searched for 17 minutes, each action is searched for on its own for 6 hours
+    for seconds in [60*17, 60*60*6]:
+        testing_strat = bs.Strategy('Testing', 100, seconds, 'test', price_df=price_df, save_results=False)
+        expected_rows = []
+        try:
+            while True:
+                testing_strat.go_to_next_action()
+                expected_rows.append(testing_strat.current_index)
+        except bs.LoopComplete:
+            pass
+        rows = sc.Every(seconds).compile(price_df['timestamp'].to_numpy())
+        assert list(rows) == expected_rows
+
+def test_calendar_schedules():
+    """
+    Calendar schedules should act on the first row at or after each time.
+    Looks at file: test_month.csv (2018-01-01 08:01 to 2018-02-01 UTC)
+    """
+    timestamps = pd.read_csv(get_test_data_path('test_month'))['timestamp'].to_numpy()
+    # Mondays, the first one (01-01 00:00) is before the data starts
+    mondays = utc_times(timestamps[sc.Weekly(0).compile(timestamps)])
+    assert [day.day for day in mondays] == [8, 15, 22, 29]
+    assert all(day.weekday() == 0 and day.hour == 0 and day.minute == 0 for day in mondays)
+    # Daily at 12:30
+    days = utc_times(timestamps[sc.Daily(12, 30).compile(timestamps)])
+    assert len(days) == 31
+    assert all(day.hour == 12 and day.minute == 30 for day in days)
+    # Monthly on the 15th
+    assert utc_times(timestamps[sc.Monthly(15).compile(timestamps)])[0].day == 15
+    # Rows at or before start_index are not included
+    assert len(sc.Weekly(0).compile(timestamps, start_index=sc.Weekly(0).compile(timestamps)[0])) == 3
+    with pt.raises(ValueError):
+        sc.Monthly(31)
+    with pt.raises(ValueError):
+        sc.Weekly(7)
+
+def test_calendar_schedule_gaps():
+    """
+    If the data is missing at an action time, act on the next row and only once.
+    """
+    # 1514764800 is 2018-01-01 00:00 UTC
+    timestamps = np.array([1514764800-60, 1514764800+3*60*60, 1514764800+60*60*24*3])
+    rows = sc.Daily().compile(timestamps)
+    assert list(rows) == [1, 2]
+
+def test_run_schedule():
+    """
+    run_schedule should yield every row of the schedule and end at the last row with returns_df filled in.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    testing_strat = bs.Strategy('Testing', 100, 60, 'test', price_df=price_df, save_results=False)
+    testing_strat.current_eth = bs.frac(1)
+    rows = list(testing_strat.run_schedule(sc.Daily()))
+    assert rows == list(sc.Daily().compile(price_df['timestamp'].to_numpy()))
+    assert testing_strat.current_index == price_df.index[-1]
+    assert testing_strat.current_time == price_df['timestamp'].iloc[-1]
+    assert testing_strat.current_price == bs.frac(price_df['fraction_price'].iloc[-1])
+    assert testing_strat.returns_df['# of ETH'].notna().all()
+    assert testing_strat.returns_df['# of USD'].notna().all()
+
+def test_dca_schedule():
+    """
+    A weekly DCA should buy on every Monday and end with no USD.
+    Looks at file: test_month.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test_month'))
+    dca_strategy = dca.base_dca(
+        starting_usd=10000,
+        time_between_action=60*60*24*7,
+        price_period_name='test_month',
+        price_df=price_df,
+        save_results=False,
+        schedule=sc.Weekly(0)
+    )
+    dca_strategy.run_logic()
+    assert dca_strategy.name == 'DCA every Monday at 00:00 UTC'
+    # Initial buy plus 4 Mondays
+    assert dca_strategy.trades_made == 5
+    assert dca_strategy.current_usd == 0
+    assert dca_strategy.current_index == price_df.index[-1]
+
+if __name__ == "__main__":
+    pt.main(['tests/test_schedules.py'])
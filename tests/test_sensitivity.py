@@ -0,0 +1,75 @@
+"""
+Testing for the sensitivity.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.sensitivity as sens
+from specific_strategies import dca
+
+def test_dca_surface_matches_strategy():
+    """
+    The 30% initial buy row should match running base_dca, which always buys 30% at the start.
+    Looks at file: test_month.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test_month'))
+    times_between_action = [60*60*24, 60*60*24*7]
+    surface = sens.dca_surface(price_df, [0, 30, 100], times_between_action)
+    assert list(surface.index) == [0, 30, 100]
+    assert list(surface.columns.get_level_values('Metric').unique()) == sens.METRICS
+    for time_between_action in times_between_action:
+        dca_strategy = dca.base_dca(10000, time_between_action, 'sensitivity', price_df=price_df, save_results=False)
+        # Run the loop without saving results
+        dca_strategy.add_data_to_results = lambda: None
+        dca_strategy.run_logic()
+        expected = dca.base_dca.add_data_to_results(dca_strategy, testing=True)
+        assert surface.loc[30, ('Final Annual % Return', time_between_action)] == expected['Final Annual % Return']
+        # Strategy rounds % Return before working out Sharpe and Sortino
+        for metric in ['Sharpe of Returns', 'Sortino of Returns']:
+            assert np.isclose(surface.loc[30, (metric, time_between_action)], expected[metric], atol=1e-3)
+
+def test_dca_surface_every_cell():
+    """
+    Every cell should match working out the value path and metrics for that cell on its own.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    initial_buy_percents = np.linspace(0, 100, 11)
+    times_between_action = [60*60, 6*60*60, 24*60*60]
+    surface = sens.dca_surface(price_df, initial_buy_percents, times_between_action)
+    assert surface.shape == (11, 9)
+    prices = price_df['decimal_price'].to_numpy()
+    years = (price_df['timestamp']-price_df['timestamp'].iloc[0]).to_numpy()/sens.SECONDS_IN_YEAR
+    for time_between_action in times_between_action:
+        buy_rows = sens.sc.Every(time_between_action).compile(price_df['timestamp'].to_numpy())
+        number_of_buys = int((price_df['timestamp'].iloc[-1]-price_df['timestamp'].iloc[0])/time_between_action)
+        for percent in initial_buy_percents:
+            # ETH and USD bought at each row
+            dca_buy_amount = 10000*(1-percent/100)/number_of_buys
+            usd_spent = np.zeros(len(prices))
+            usd_spent[0] = 10000*percent/100
+            usd_spent[buy_rows] = dca_buy_amount
+            eth = np.cumsum(usd_spent/prices*.997)
+            total_value = 10000-np.cumsum(usd_spent)+eth*prices
+            returns = pd.Series(np.r_[0, (total_value[1:]/10000-1)/years[1:]])
+            sharpe = (returns.mean()-.03)/returns.std()
+            sortino = (returns.mean()-.03)/returns.loc[returns < 0].std()
+            cell = surface.loc[percent]
+            assert np.isclose(cell[('Final Annual % Return', time_between_action)], returns.iloc[-1]*100, atol=1e-4)
+            assert np.isclose(cell[('Sharpe of Returns', time_between_action)], sharpe, atol=1e-4)
+            assert np.isclose(cell[('Sortino of Returns', time_between_action)], sortino, atol=1e-4, equal_nan=True)
+
+def test_dca_surface_errors():
+    """
+    Initial buy % must be 0 to 100 and the price period must be longer than the time between action.
+    Looks at file: test.csv
+    """
+    price_df = pd.read_csv(get_test_data_path('test'))
+    with pt.raises(ValueError):
+        sens.dca_surface(price_df, [-10, 30], [60*60])
+    with pt.raises(ValueError):
+        sens.dca_surface(price_df, [30], [60*60*24*365])
+
+if __name__ == "__main__":
+    pt.main(['tests/test_sensitivity.py'])
@@ -0,0 +1,103 @@
+"""
+Testing for the strategy_performance.py command line runner
+"""
+import datetime
+import subprocess
+import sys
+import types
+import pandas as pd
+import pytest as pt
+import strategy_performance as sp
+
+def test_parse_time():
+    """
+    Times on the command line should turn into seconds.
+    """
+    assert sp.parse_time('90s') == 90
+    assert sp.parse_time('1h') == 60*60
+    assert sp.parse_time('7d') == 60*60*24*7
+    assert sp.parse_time('2.4h') == 60*60*2.4
+    assert isinstance(sp.parse_time('0.5h'), int)
+    for text in ['1', 'h', '1y', '-1d']:
+        with pt.raises(ValueError):
+            sp.parse_time(text)
+
+def test_parse_strategies():
+    """
+    Strategy specs should use the given times or the strategy's defaults.
+    """
+    assert sp.parse_strategies(['dca:1h,1d']) == [('dca', 60*60), ('dca', 60*60*24)]
+    assert sp.parse_strategies(['all_in_start']) == [('all_in_start', 60*60*24*28)]
+    assert len(sp.parse_strategies(['all'])) == sum(
+        len(sp.load_strategy(name).default_times_between_action) for name in sp.strategy_names()
+    )
+    with pt.raises(ValueError):
+        sp.parse_strategies(['not_a_strategy:1d'])
+
+def test_find_periods(tmp_path):
+    """
+    Only price periods that match should be found, not candle tiers or other files.
+    """
+    for file_name in ['2022_price_data.csv', '2022_price_data_1h.csv', '2022_price_data_1d.csv',
+                      'low_to_high.csv', 'notes.txt']:
+        (tmp_path / file_name).write_text('')
+    assert sp.find_periods(['all'], folder=str(tmp_path)) == ['2022_price_data', 'low_to_high']
+    assert sp.find_periods(['LOW'], folder=str(tmp_path)) == ['low_to_high']
+
+def test_parser():
+    """
+    Run options should be parsed, with the risk frequency left for run to parse.
+    """
+    args = sp.make_parser().parse_args(['run', '--strategies', 'dca:1d', '--risk-frequency', '1d', '--jobs', '2'])
+    assert args.strategies == ['dca:1d']
+    assert args.jobs == 2
+    assert sp.parse_time(args.risk_frequency) == 60*60*24
+    assert sp.make_parser().parse_args(['run']).risk_frequency == ''
+    assert sp.make_parser().parse_args(['run']).bootstrap == 0
+    assert sp.make_parser().parse_args(['run', '--bootstrap', '1000']).bootstrap == 1000
+
+def test_parse_start():
+    """
+    Start dates can be given with or without seconds.
+    """
+    assert sp.parse_start('2018-01-01-00-00') == datetime.datetime(2018, 1, 1)
+    assert sp.parse_start('2018-01-01-00-00-30') == datetime.datetime(2018, 1, 1, 0, 0, 30)
+    with pt.raises(ValueError):
+        sp.parse_start('2018-01-01')
+
+def test_fetch_start(tmp_path, monkeypatch):
+    """
+    --start should be given to Binance as a UTC timestamp in ms and to CoinBase as YYYY-MM-DD-HH-MM.
+    """
+    import lib.base_strategy as bs
+    monkeypatch.setattr(bs, 'full_path', lambda file_name: str(tmp_path / file_name))
+    calls = {}
+    def get_binance_data(pair, start_date):
+        calls['binance'] = start_date
+        return pd.DataFrame()
+    def get_coinbase_data(start_date):
+        calls['coinbase'] = start_date
+        return pd.DataFrame({'index': [0]})
+    binance = types.ModuleType('lib.get_binance_data')
+    binance.get_binance_data = get_binance_data
+    coinbase = types.ModuleType('lib.get_coinbase_data')
+    coinbase.get_coinbase_data = get_coinbase_data
+    monkeypatch.setitem(sys.modules, 'lib.get_binance_data', binance)
+    monkeypatch.setitem(sys.modules, 'lib.get_coinbase_data', coinbase)
+    sp.main(['fetch', 'binance', '--start', '2018-01-01-00-01'])
+    sp.main(['fetch', 'coinbase', '--start', '2018-01-01-00-01-30'])
+    assert calls == {'binance': 1514764860*1000, 'coinbase': '2018-01-01-00-01'}
+
+def test_lazy_imports():
+    """
+    Parsing a run shouldn't import the exchange clients.
+    """
+    code = (
+        'import sys, strategy_performance as sp; sp.parse_strategies(["all"]); '
+        'print(any(name.startswith(("binance", "lib.get_", "lib.api_data")) for name in sys.modules))'
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    assert output.strip().split('\n')[-1] == 'False'
+
+if __name__ == "__main__":
+    pt.main(['tests/test_strategy_performance.py'])
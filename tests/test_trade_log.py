@@ -0,0 +1,53 @@
+"""
+Testing for the trade_log.py script
+"""
+import numpy as np
+import pandas as pd
+import pytest as pt
+from test_all_tests import get_test_data_path
+import lib.trade_log as tl
+from specific_strategies import FOMO
+
+def test_trade_log_grows(tmp_path):
+    """
+    The log should keep every trade in order as it grows, and save and load them.
+    """
+    trade_log = tl.TradeLog(capacity=1)
+    for trade in range(1000):
+        trade_log.append(trade, trade*60, tl.BUY if trade % 2 == 0 else tl.SELL, trade/10, trade*2, 20, trade/100)
+    assert len(trade_log) == 1000
+    assert list(trade_log.column('index')) == list(range(1000))
+    assert trade_log.column('side')[:2].tolist() == [tl.BUY, tl.SELL]
+    path = str(tmp_path / 'trades.npz')
+    trade_log.save(path)
+    loaded = tl.TradeLog.load(path)
+    assert len(loaded) == 1000
+    assert loaded.to_df().equals(trade_log.to_df())
+    # Empty logs can be saved too
+    tl.TradeLog().save(path)
+    assert len(tl.TradeLog.load(path)) == 0
+
+def test_strategy_trades():
+    """
+    Trades made by a strategy should match its balances.
+    Looks at files: test_daily_2.csv and test_daily_fng_2.csv
+    """
+    FOMO_strategy = FOMO.base_FOMO(
+        starting_usd=10000,
+        time_between_action=60*60*24,
+        price_period_name='test_daily_2',
+        price_df=pd.read_csv(get_test_data_path('test_daily_2')),
+        save_results=False,
+        fear_and_greed_path=get_test_data_path('test_daily_fng_2')
+    )
+    FOMO_strategy.run_logic()
+    trades = FOMO_strategy.trade_log.to_df()
+    assert len(trades.index) == FOMO_strategy.trades_made == 3
+    assert trades['side'].tolist() == [tl.BUY, tl.SELL, tl.BUY]
+    assert np.isclose(trades['fee'].sum(), float(FOMO_strategy.fees_paid))
+    eth_change = np.where(trades['side'] == tl.BUY, trades['eth'], -trades['eth']).sum()
+    assert np.isclose(eth_change, float(FOMO_strategy.current_eth))
+    assert (trades['price'] == FOMO_strategy.price_df['decimal_price'].iloc[trades['index']].to_numpy()).all()
+
+if __name__ == "__main__":
+    pt.main(['tests/test_trade_log.py'])